@@ -0,0 +1,158 @@
+"""
+Query-count and latency regression suite for every router-registered viewset.
+
+Each endpoint is requested against a fixed synthetic dataset. The number of
+SQL queries of the first (cold) request must stay within the committed
+budget in ``benchmarks/budgets.json``; wall times are only recorded. A JSON
+report is written after the run for trend tracking.
+
+    python manage.py test benchmarks
+    BENCHMARK_RECORD=1 python manage.py test benchmarks   # re-record budgets
+"""
+import json
+import os
+import statistics
+import time
+from pathlib import Path
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from properties import synthetic
+from properties.models import Properties
+from universities.models import University
+from user_messages.models import Enquiry
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+BUDGETS_PATH = BENCHMARK_DIR / 'budgets.json'
+REPORT_PATH = Path(os.environ.get('BENCHMARK_REPORT', BENCHMARK_DIR / 'report.json'))
+RECORD = os.environ.get('BENCHMARK_RECORD') == '1'
+
+# Warm requests timed after the cold one
+REPEAT = 5
+
+
+class EndpointBenchmarkTests(APITestCase):
+    results = {}
+
+    @classmethod
+    def setUpTestData(cls):
+        synthetic.generate(properties=60, users=20, reviews=120, messages=80, favourites=60, seed=42)
+        enquiry = Enquiry.objects.select_related('student__user').order_by('id').first()
+        cls.student = enquiry.student.user
+        cls.enquiry_id = enquiry.id
+        cls.property_id = Properties.objects.filter(is_available=True).order_by('id').values_list('id', flat=True)[0]
+        cls.university_id = University.objects.order_by('id').values_list('id', flat=True)[0]
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        with open(BUDGETS_PATH) as f:
+            cls.budgets = json.load(f)
+
+    @classmethod
+    def tearDownClass(cls):
+        report = {
+            'generated_at': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'endpoints': dict(sorted(cls.results.items())),
+        }
+        REPORT_PATH.parent.mkdir(parents=True, exist_ok=True)
+        with open(REPORT_PATH, 'w') as f:
+            json.dump(report, f, indent=2)
+        if RECORD:
+            budgets = {name: result['cold_queries'] for name, result in sorted(cls.results.items())}
+            with open(BUDGETS_PATH, 'w') as f:
+                json.dump(budgets, f, indent=2)
+                f.write('\n')
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+
+    def benchmark(self, name, path, user=None):
+        self.client.force_authenticate(user=user)
+
+        with CaptureQueriesContext(connection) as cold:
+            started = time.perf_counter()
+            response = self.client.get(path)
+            cold_ms = (time.perf_counter() - started) * 1000
+        self.assertEqual(response.status_code, 200, f"{name}: {path} returned {response.status_code}")
+
+        warm_ms = []
+        warm_queries = []
+        for _ in range(REPEAT):
+            with CaptureQueriesContext(connection) as warm:
+                started = time.perf_counter()
+                self.client.get(path)
+                warm_ms.append((time.perf_counter() - started) * 1000)
+            warm_queries.append(len(warm))
+
+        budget = self.budgets.get(name)
+        self.results[name] = {
+            'path': path,
+            'cold_queries': len(cold),
+            # Per run, so a warm request that misses the cache shows up
+            'warm_queries': warm_queries,
+            'max_warm_queries': max(warm_queries),
+            'budget': budget,
+            'cold_ms': round(cold_ms, 2),
+            'median_ms': round(statistics.median(warm_ms), 2),
+            'max_ms': round(max(warm_ms), 2),
+        }
+        if RECORD:
+            return
+        self.assertIsNotNone(budget, f"No query budget committed for {name}")
+        self.assertLessEqual(
+            len(cold),
+            budget,
+            f"{name} ran {len(cold)} queries (budget {budget}):\n"
+            + '\n'.join(query['sql'] for query in cold.captured_queries),
+        )
+
+    # properties
+    def test_properties_list(self):
+        self.benchmark('properties:list', '/api/v1/properties/')
+
+    def test_properties_detail(self):
+        self.benchmark('properties:detail', f'/api/v1/properties/{self.property_id}/')
+
+    def test_properties_marketing_categories(self):
+        self.benchmark('properties:marketing', '/api/v1/properties/marketing-categories/')
+
+    def test_amenities_list(self):
+        self.benchmark('amenities:list', '/api/v1/amenities/')
+
+    # universities and campuses
+    def test_universities_list(self):
+        self.benchmark('universities:list', '/api/v1/universities/')
+
+    def test_universities_detail(self):
+        self.benchmark('universities:detail', f'/api/v1/universities/{self.university_id}/', user=self.student)
+
+    def test_campuses_list(self):
+        self.benchmark('campuses:list', '/api/v1/campuses/', user=self.student)
+
+    # reviews and favourites
+    def test_reviews_list(self):
+        self.benchmark('reviews:list', f'/api/v1/reviews/?property={self.property_id}')
+
+    def test_favourites_list(self):
+        self.benchmark('favourites:list', f'/api/v1/favourites/?user_id={self.student.id}', user=self.student)
+
+    # users
+    def test_users_list(self):
+        self.benchmark('users:list', '/api/v1/users/', user=self.student)
+
+    def test_users_me(self):
+        self.benchmark('users:me', '/api/v1/users/me/', user=self.student)
+
+    # enquiries and messages
+    def test_enquiries_list(self):
+        self.benchmark('enquiries:list', '/api/v1/messages/enquiries/', user=self.student)
+
+    def test_enquiry_messages_list(self):
+        self.benchmark('messages:list', f'/api/v1/messages/enquiries/{self.enquiry_id}/messages/', user=self.student)
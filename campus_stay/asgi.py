@@ -3,8 +3,12 @@ ASGI config for campus_stay project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The hot read endpoints are served by async views (``campus_stay.urls_asgi``)
+unless ``ASYNC_READ_VIEWS`` is set to 0. Run it with uvicorn workers, e.g.
+``SERVER_MODE=asgi gunicorn`` (see gunicorn.conf.py).
+
 For more information on this file, see
-https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
+https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 """
 
 import os
@@ -12,5 +16,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'campus_stay.settings')
+if os.environ.get('ASYNC_READ_VIEWS', '1') == '1':
+    os.environ.setdefault('ROOT_URLCONF', 'campus_stay.urls_asgi')
 
 application = get_asgi_application()
@@ -0,0 +1,93 @@
+"""
+Support for the async read views served under ASGI (``campus_stay.urls_asgi``).
+
+An async view only answers anonymous JSON GETs, which are the bulk of browse
+traffic. Everything else (writes, JWT or session users, the browsable API)
+is handed to the regular DRF view in a thread, so those responses are
+exactly what WSGI serves.
+
+The async views reuse the viewsets for filtering, pagination and
+serialization. They fetch rows with the async ORM and prefetch every
+relation the serializers read, so serialization itself never touches the
+database. Serializers that do go to the cache or the database (the property
+fragment cache) are run in a worker thread instead.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import Throttled
+from rest_framework.request import Request
+
+from campus_stay import db_routers, renderers, throttling
+
+
+async def is_anonymous_json_get(request):
+    """Whether the async path can answer ``request`` exactly like the DRF view would."""
+    if request.method != 'GET' or 'HTTP_AUTHORIZATION' in request.META:
+        return False
+    if request.GET.get('format', 'json') != 'json' or 'text/html' in request.headers.get('Accept', ''):
+        return False
+    user = await request.auser()
+    if user.is_authenticated:
+        return False
+    # Serializers read the user and session synchronously; resolve both up front
+    request.user = user
+    if hasattr(request, 'session'):
+        await request.session.aget('recently_viewed_properties')
+    return True
+
+
+def with_sync_fallback(sync_view, replica=False, throttle_scope=None):
+    """
+    Serve anonymous JSON GETs with the decorated async view and anything else with ``sync_view``.
+
+    With ``replica`` the async view reads from the read replica (anonymous
+    users have no writes of their own to see). ``throttle_scope`` applies the
+    same token bucket the DRF view uses (``campus_stay.throttling``).
+    """
+    fallback = sync_to_async(sync_view)
+
+    def decorator(async_view):
+        @csrf_exempt
+        @wraps(async_view)
+        async def view(request, *args, **kwargs):
+            if await is_anonymous_json_get(request):
+                if throttle_scope:
+                    wait = await throttling.athrottle(request, throttle_scope)
+                    if wait is not None:
+                        return throttled_response(wait)
+                    # An async view that hands the request to sync_view has spent its token already
+                    request.throttle_checked = True
+                with db_routers.routing_scope():
+                    if replica:
+                        db_routers.use_replica()
+                    return await async_view(request, *args, **kwargs)
+            return await fallback(request, *args, **kwargs)
+
+        view.fallback = fallback
+        return view
+
+    return decorator
+
+
+def viewset_for(viewset_class, request, action, **kwargs):
+    """An initialized viewset instance, for its queryset, filter, pagination and serializer hooks."""
+    view = viewset_class(action=action, args=(), kwargs=kwargs, format_kwarg=None, headers={})
+    # No authenticators: the async path only serves anonymous requests
+    view.request = Request(request, authenticators=())
+    return view
+
+
+def throttled_response(wait):
+    """The 429 DRF answers a throttled request with."""
+    exc = Throttled(wait)
+    response = json_response({'detail': exc.detail}, status=exc.status_code)
+    response['Retry-After'] = f"{exc.wait:d}"
+    return response
+
+
+def json_response(data, status=200):
+    """A JSON response rendered exactly like the DRF views render it."""
+    return HttpResponse(renderers.dumps(data), status=status, content_type='application/json')
@@ -0,0 +1,169 @@
+"""
+Shared caching helpers.
+
+Keys are namespaced per app (``universities:catalogue``, ``properties:tiles``)
+and carry a namespace version, so a whole namespace is retired at once with
+``bump_version`` and old entries simply expire.
+
+``get_or_build`` protects expensive entries against stampedes: an entry is
+stored with its own freshness deadline and kept for ``STALE_GRACE`` beyond
+it. When it goes stale, one caller (holding a short lock) rebuilds it while
+everyone else is served the stale copy; on a cold miss the other callers
+wait briefly for the lock holder instead of all querying the database.
+
+The backend is ``CACHES['default']``: Redis when ``REDIS_URL`` is set, so the
+gunicorn workers share entries, otherwise a per-process or file cache.
+"""
+import asyncio
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.utils.http import parse_etags
+
+from campus_stay.instrumentation import record_cache
+
+# How long past its freshness an entry may still be served while it is rebuilt
+STALE_GRACE = 60 * 5
+# Upper bound on one rebuild; the lock expires on its own if the builder dies
+LOCK_TIMEOUT = 30
+# How long callers on a cold miss wait for the lock holder before building themselves
+WAIT_TIMEOUT = 5
+WAIT_INTERVAL = 0.05
+
+
+def _version_key(namespace):
+    return f"{namespace}:version"
+
+
+def version(namespace):
+    """Current version of ``namespace``."""
+    key = _version_key(namespace)
+    current = cache.get(key)
+    if current is None:
+        # Seed from the clock so an evicted version never reuses an old number
+        cache.add(key, int(time.time()), timeout=None)
+        current = cache.get(key)
+    return current
+
+
+async def aversion(namespace):
+    key = _version_key(namespace)
+    current = await cache.aget(key)
+    if current is None:
+        await cache.aadd(key, int(time.time()), timeout=None)
+        current = await cache.aget(key)
+    return current
+
+
+def bump_version(namespace):
+    """Retire every entry of ``namespace``."""
+    key = _version_key(namespace)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, int(time.time()), timeout=None)
+
+
+def digest(value):
+    """Short stable digest for key parts of unbounded length, such as query strings."""
+    return hashlib.sha1(str(value).encode()).hexdigest()[:20]
+
+
+def make_key(namespace, namespace_version, *parts):
+    return ':'.join([namespace, str(namespace_version), *map(str, parts)])
+
+
+def etag_matches(request, etag):
+    """
+    Whether the request's ``If-None-Match`` covers ``etag``.
+
+    Uses the weak comparison (RFC 9110 13.1.2): ``middleware.compression``
+    weakens the ETags of the responses it compresses, and clients send
+    those back.
+    """
+    if_none_match = request.headers.get('If-None-Match', '')
+    if if_none_match.strip() == '*':
+        return True
+    return etag.removeprefix('W/') in {tag.removeprefix('W/') for tag in parse_etags(if_none_match)}
+
+
+def _lock_key(key):
+    return f"{key}:lock"
+
+
+def _fresh(entry):
+    return entry is not None and entry[0] > time.time()
+
+
+def get_or_build(key, build, timeout, metric=None):
+    """
+    Return the value cached at ``key``, calling ``build()`` when it is missing or stale.
+
+    ``metric`` names the cache in the hit/miss counters; a stale value
+    served while another caller rebuilds it counts as a hit.
+    """
+    entry = cache.get(key)
+    if not _fresh(entry):
+        if cache.add(_lock_key(key), 1, LOCK_TIMEOUT):
+            try:
+                entry = (time.time() + timeout, build())
+                cache.set(key, entry, timeout + STALE_GRACE)
+            finally:
+                cache.delete(_lock_key(key))
+            _record(metric, False)
+            return entry[1]
+        if entry is None:
+            entry = _wait_for(key)
+        if entry is None:
+            # The lock holder is slow or gone; don't keep the request waiting any longer
+            _record(metric, False)
+            return build()
+    _record(metric, True)
+    return entry[1]
+
+
+async def aget_or_build(key, abuild, timeout, metric=None):
+    """``get_or_build`` for async views; ``abuild`` is a coroutine function."""
+    entry = await cache.aget(key)
+    if not _fresh(entry):
+        if await cache.aadd(_lock_key(key), 1, LOCK_TIMEOUT):
+            try:
+                entry = (time.time() + timeout, await abuild())
+                await cache.aset(key, entry, timeout + STALE_GRACE)
+            finally:
+                await cache.adelete(_lock_key(key))
+            _record(metric, False)
+            return entry[1]
+        if entry is None:
+            entry = await _await(key)
+        if entry is None:
+            _record(metric, False)
+            return await abuild()
+    _record(metric, True)
+    return entry[1]
+
+
+def _wait_for(key):
+    deadline = time.monotonic() + WAIT_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(WAIT_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry
+    return None
+
+
+async def _await(key):
+    deadline = time.monotonic() + WAIT_TIMEOUT
+    while time.monotonic() < deadline:
+        await asyncio.sleep(WAIT_INTERVAL)
+        entry = await cache.aget(key)
+        if entry is not None:
+            return entry
+    return None
+
+
+def _record(metric, hit):
+    if metric:
+        record_cache(metric, hit)
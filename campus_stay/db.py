@@ -0,0 +1,71 @@
+"""
+Database connection handling.
+
+``connection_settings`` builds the connection part of ``DATABASES['default']``
+for one of three modes (``DB_CONNECTION_MODE``):
+
+- ``pool``: every worker process keeps a psycopg 3 connection pool (Django's
+  native ``OPTIONS['pool']``). Requests borrow a connection that is already
+  open, authenticated and has the PostGIS types registered, and the pool
+  serves the threads of ASGI and threaded workers alike.
+- ``persistent``: each thread keeps its own connection for ``CONN_MAX_AGE``
+  seconds, checked with ``CONN_HEALTH_CHECKS`` before it is reused.
+- ``none``: a new connection per request (Django's default).
+
+The pool of each worker gets an equal share of ``DB_MAX_CONNECTIONS`` (the
+connections the database or Supabase pooler allows this app), less a few
+kept back for management commands and migrations.
+
+This module is imported by the settings, so it must not import Django's
+settings or database modules at import time.
+"""
+CONNECTION_MODES = ('pool', 'persistent', 'none')
+
+# Connections kept out of the worker pools for migrations, shells and cron jobs
+RESERVED_CONNECTIONS = 5
+
+
+def pool_size(workers, max_connections, reserved=RESERVED_CONNECTIONS):
+    """``(min_size, max_size)`` of the pool of one of ``workers`` processes."""
+    max_size = max(1, (max_connections - reserved) // max(workers, 1))
+    return min(2, max_size), max_size
+
+
+def connection_settings(
+    mode, workers, max_connections, options=None, conn_max_age=600, pool_timeout=10,
+):
+    """``CONN_MAX_AGE``, ``CONN_HEALTH_CHECKS`` and ``OPTIONS`` for a ``DATABASES`` entry."""
+    if mode not in CONNECTION_MODES:
+        raise ValueError(f"DB_CONNECTION_MODE must be one of {', '.join(CONNECTION_MODES)}, not {mode!r}")
+    options = dict(options or {})
+    if mode == 'pool':
+        min_size, max_size = pool_size(workers, max_connections)
+        # Django requires CONN_MAX_AGE = 0 with a pool; closing returns the connection to it
+        options['pool'] = {
+            'min_size': min_size,
+            'max_size': max_size,
+            # Fail a request instead of queueing it forever when the pool is exhausted
+            'timeout': pool_timeout,
+            # Recycle connections now and then so server-side state cannot pile up
+            'max_lifetime': conn_max_age,
+        }
+        return {'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False, 'OPTIONS': options}
+    if mode == 'persistent':
+        return {'CONN_MAX_AGE': conn_max_age, 'CONN_HEALTH_CHECKS': True, 'OPTIONS': options}
+    return {'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False, 'OPTIONS': options}
+
+
+def pool_stats(alias='default'):
+    """Size, idle connections and waiting requests of the pool of ``alias``, or None without a pool."""
+    from django.db import connections
+
+    pool = getattr(connections[alias], 'pool', None)
+    if pool is None:
+        return None
+    stats = pool.get_stats()
+    return {
+        'size': stats.get('pool_size', 0),
+        'available': stats.get('pool_available', 0),
+        'waiting': stats.get('requests_waiting', 0),
+        'max_size': pool.max_size,
+    }
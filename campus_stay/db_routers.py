@@ -0,0 +1,96 @@
+"""
+Read replica routing.
+
+Reads go to the primary unless the code handling the request opts in with
+``use_replica()``; ``ReplicaReadMixin`` does that for the read-only actions
+a viewset lists in ``replica_actions``. Writes always go to the primary.
+
+A user who has just written is kept on the primary for
+``REPLICA_STICKY_SECONDS`` (``ReadYourWritesMiddleware`` records the write),
+so a landlord reloading a listing right after editing it never sees the
+replica's older copy.
+
+Routing is disabled while ``REPLICA_DATABASE`` is None. In tests the replica
+alias mirrors the test database (``TEST['MIRROR']``), so any second alias
+pointing at a local Postgres works.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+
+_use_replica = ContextVar('use_replica', default=False)
+
+
+@contextmanager
+def routing_scope():
+    """Confine ``use_replica()`` calls to the block, e.g. one request."""
+    token = _use_replica.set(False)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+def use_replica():
+    """Send the remaining reads of the current scope to the replica."""
+    _use_replica.set(True)
+
+
+def _sticky_key(user):
+    return f"db:replica:sticky:{user.pk}"
+
+
+def mark_write(user):
+    """Keep ``user`` reading from the primary until the replica has caught up."""
+    if user is not None and user.is_authenticated:
+        cache.set(_sticky_key(user), True, settings.REPLICA_STICKY_SECONDS)
+
+
+def is_sticky(user):
+    return user is not None and user.is_authenticated and cache.get(_sticky_key(user)) is not None
+
+
+class ReplicaRouter:
+    """Route reads to ``REPLICA_DATABASE`` inside a scope that called ``use_replica()``."""
+
+    def db_for_read(self, model, **hints):
+        if settings.REPLICA_DATABASE and _use_replica.get():
+            return settings.REPLICA_DATABASE
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == settings.REPLICA_DATABASE:
+            return False
+        return None
+
+
+class ReplicaReadMixin:
+    """
+    Viewset mixin serving the actions in ``replica_actions`` from the read replica.
+
+    Only safe methods are routed, and only for users without a recent write.
+    """
+    replica_actions = ()
+
+    def dispatch(self, request, *args, **kwargs):
+        with routing_scope():
+            return super().dispatch(request, *args, **kwargs)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if (
+            request.method in SAFE_METHODS
+            and self.action in self.replica_actions
+            and not is_sticky(request.user)
+        ):
+            use_replica()
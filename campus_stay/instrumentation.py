@@ -0,0 +1,124 @@
+"""
+Per-request instrumentation.
+
+``RequestMetrics`` collects DB query count/time, named timing sections
+(e.g. serialization) and cache hits for the request being handled. The
+current instance lives in a context variable, so helpers can be called from
+anywhere in the request without passing it around; outside a request they
+are no-ops.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from rest_framework_gis.serializers import GeoFeatureModelListSerializer
+
+from campus_stay import metrics as prometheus, slow_queries
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    def __init__(self, request=None):
+        self.request = request
+        self.started = time.perf_counter()
+        self.slow_query_seconds = getattr(settings, 'SLOW_QUERY_MS', 200) / 1000
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.sections = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._open_sections = set()
+
+    @property
+    def total_seconds(self):
+        return time.perf_counter() - self.started
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        """``connection.execute_wrapper`` hook counting queries and DB time and logging slow queries."""
+        started = time.perf_counter()
+        try:
+            result = execute(sql, params, many, context)
+        finally:
+            seconds = time.perf_counter() - started
+            self.db_queries += 1
+            self.db_seconds += seconds
+        if seconds >= self.slow_query_seconds:
+            slow_queries.record(self, sql, params, many, context, seconds)
+        return result
+
+    def as_dict(self):
+        return {
+            'db_queries': self.db_queries,
+            'db_ms': round(self.db_seconds * 1000, 2),
+            **{f"{name}_ms": round(seconds * 1000, 2) for name, seconds in self.sections.items()},
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'total_ms': round(self.total_seconds * 1000, 2),
+        }
+
+    def server_timing(self):
+        """Value for the ``Server-Timing`` response header."""
+        entries = [f'db;dur={self.db_seconds * 1000:.1f};desc="{self.db_queries} queries"']
+        entries += [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.sections.items()]
+        if self.cache_hits or self.cache_misses:
+            entries.append(f'cache;desc="{self.cache_hits} hits, {self.cache_misses} misses"')
+        entries.append(f"total;dur={self.total_seconds * 1000:.1f}")
+        return ', '.join(entries)
+
+
+def start(request=None):
+    """Begin collecting metrics for ``request``; returns (metrics, reset token)."""
+    metrics = RequestMetrics(request)
+    return metrics, _current.set(metrics)
+
+
+def stop(token):
+    _current.reset(token)
+
+
+def current():
+    """Metrics of the request being handled, or None."""
+    return _current.get()
+
+
+@contextmanager
+def timed(section):
+    """Add the wall time of the block to ``section``; nested blocks of the same section count once."""
+    metrics = _current.get()
+    if metrics is None or section in metrics._open_sections:
+        yield
+        return
+    metrics._open_sections.add(section)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics._open_sections.discard(section)
+        metrics.sections[section] = metrics.sections.get(section, 0.0) + time.perf_counter() - started
+
+
+def record_cache(name, hit):
+    """Count a lookup in cache ``name`` against the current request and the process metrics."""
+    prometheus.record_cache(name, hit)
+    metrics = _current.get()
+    if metrics is None:
+        return
+    if hit:
+        metrics.cache_hits += 1
+    else:
+        metrics.cache_misses += 1
+
+
+class TimedSerializerMixin:
+    """Serializer mixin recording the time spent building ``.data`` as the ``serializer`` section."""
+
+    @property
+    def data(self):
+        with timed('serializer'):
+            return super().data
+
+
+class TimedGeoFeatureListSerializer(TimedSerializerMixin, GeoFeatureModelListSerializer):
+    """FeatureCollection list serializer that records serialization time."""
@@ -0,0 +1,127 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from campus_stay import perf
+from properties.models import Properties
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the WSGI (sync workers) and ASGI (uvicorn workers, async read views) servers "
+        "at a fixed worker count across increasing client concurrency"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=3, help="Server worker processes (default: 3)")
+        parser.add_argument(
+            '--concurrency', default='1,8,32,64', help="Comma-separated client concurrency levels"
+        )
+        parser.add_argument('--requests', type=int, default=400, help="Requests per concurrency level")
+        parser.add_argument('--modes', default='wsgi,asgi', help="Comma-separated server modes to compare")
+        parser.add_argument('--port', type=int, default=8765, help="Port the server under test binds to")
+        parser.add_argument('--seed', type=int, default=0, help="Random seed for the request mix")
+        parser.add_argument('--json', help="Also write the results to this JSON file")
+
+    def handle(self, *args, **options):
+        try:
+            levels = [int(value) for value in options['concurrency'].split(',') if value.strip()]
+        except ValueError:
+            raise CommandError("--concurrency must be a comma-separated list of integers")
+        modes = [mode.strip() for mode in options['modes'].split(',') if mode.strip()]
+        if set(modes) - {'wsgi', 'asgi'}:
+            raise CommandError("--modes accepts wsgi and asgi")
+
+        property_ids = list(Properties.objects.filter(is_available=True).values_list('id', flat=True)[:5000])
+        if not property_ids:
+            raise CommandError("No data to test against; run seed_universities and generate_fixtures first")
+        # The anonymous read traffic the async views serve
+        mix = [
+            (45, 'properties:list', lambda rng: f"/api/v1/properties/?page={rng.randint(1, 5)}", False),
+            (30, 'properties:detail', lambda rng: f"/api/v1/properties/{rng.choice(property_ids)}/", False),
+            (15, 'properties:marketing', lambda rng: "/api/v1/properties/marketing-categories/", False),
+            (10, 'universities:list', lambda rng: "/api/v1/universities/", False),
+        ]
+
+        base_url = f"http://127.0.0.1:{options['port']}"
+        results = []
+        for mode in modes:
+            server = self._start_server(mode, options['workers'], options['port'])
+            try:
+                self._wait_until_ready(base_url, server)
+                for concurrency in levels:
+                    planned = perf.plan_requests(mix, options['requests'], seed=options['seed'])
+                    started = time.perf_counter()
+                    samples = perf.run_http(planned, base_url, concurrency=concurrency)
+                    elapsed = time.perf_counter() - started
+                    if perf.throttled(samples):
+                        raise CommandError(
+                            f"{perf.throttled(samples)} of {len(samples)} requests were throttled (429); "
+                            "req/s would count rejections"
+                        )
+                    row = perf.summarize(samples)['ALL']
+                    results.append({
+                        'mode': mode,
+                        'workers': options['workers'],
+                        'concurrency': concurrency,
+                        'requests_per_second': round(len(samples) / elapsed, 1),
+                        **row,
+                    })
+                    self.stdout.write(self._format_row(results[-1]))
+            finally:
+                server.terminate()
+                server.wait(timeout=30)
+
+        if options['json']:
+            with open(options['json'], 'w') as f:
+                json.dump(results, f, indent=2)
+
+    def _start_server(self, mode, workers, port):
+        env = {
+            **os.environ,
+            'SERVER_MODE': mode,
+            'WEB_CONCURRENCY': str(workers),
+            'GUNICORN_BIND': f"127.0.0.1:{port}",
+            # Sampled request logging would skew the comparison
+            'REQUEST_LOG_SAMPLE_RATE': '0',
+            # Every request comes from 127.0.0.1, so the per-IP buckets would turn the run into 429s
+            'THROTTLE_RATE_SEARCH': '',
+            'THROTTLE_RATE_AUTH': '',
+            'THROTTLE_RATE_WRITE': '',
+            # gunicorn.conf.py empties this on start; never share it with a running server
+            'PROMETHEUS_MULTIPROC_DIR': tempfile.mkdtemp(prefix='bench_metrics_'),
+        }
+        self.stdout.write(f"Starting {mode} server with {workers} workers")
+        return subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '--config', str(settings.BASE_DIR / 'gunicorn.conf.py')],
+            cwd=settings.BASE_DIR,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+
+    def _wait_until_ready(self, base_url, server, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError(f"Server exited with status {server.returncode}")
+            try:
+                requests.get(f"{base_url}/api/v1/universities/", timeout=1)
+                return
+            except requests.ConnectionError:
+                time.sleep(0.25)
+        raise CommandError(f"Server did not start within {timeout}s")
+
+    def _format_row(self, row):
+        return (
+            f"{row['mode']:<5} workers={row['workers']:<3} concurrency={row['concurrency']:<4} "
+            f"{row['requests_per_second']:>8} req/s  p50={row['p50_ms']}ms  p95={row['p95_ms']}ms  "
+            f"p99={row['p99_ms']}ms  errors={row['errors']} (4xx {row['client_errors']})"
+        )
@@ -0,0 +1,80 @@
+import copy
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.utils import load_backend
+
+from campus_stay import db, perf
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the per-request cost of getting a database connection in each "
+        "DB_CONNECTION_MODE (pool, persistent, none) against the configured database"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help="Simulated requests per mode")
+        parser.add_argument('--modes', default='none,persistent,pool', help="Comma-separated modes to compare")
+        parser.add_argument('--database', default='default', help="Database alias to connect to")
+        parser.add_argument('--json', help="Also write the results to this JSON file")
+
+    def handle(self, *args, **options):
+        modes = [mode.strip() for mode in options['modes'].split(',') if mode.strip()]
+        if set(modes) - set(db.CONNECTION_MODES):
+            raise CommandError(f"--modes accepts {', '.join(db.CONNECTION_MODES)}")
+
+        results = []
+        for mode in modes:
+            wrapper = self._connection(options['database'], mode)
+            try:
+                samples, connects = self._simulate(wrapper, mode, options['requests'])
+            finally:
+                wrapper.close()
+                if mode == 'pool':
+                    wrapper.close_pool()
+            row = perf.summarize(samples)[mode]
+            results.append({'mode': mode, 'new_connections': connects, **row})
+            self.stdout.write(
+                f"{mode:<10} requests={row['requests']:<5} new connections={connects:<5} "
+                f"p50={row['p50_ms']}ms  p95={row['p95_ms']}ms  p99={row['p99_ms']}ms"
+            )
+
+        if options['json']:
+            with open(options['json'], 'w') as f:
+                json.dump(results, f, indent=2)
+
+    def _connection(self, alias, mode):
+        """A standalone connection to ``alias`` configured for ``mode``."""
+        settings_dict = copy.deepcopy(connections.settings[alias])
+        options = {key: value for key, value in settings_dict['OPTIONS'].items() if key != 'pool'}
+        settings_dict.update(
+            db.connection_settings(mode, workers=1, max_connections=db.RESERVED_CONNECTIONS + 2, options=options)
+        )
+        backend = load_backend(settings_dict['ENGINE'])
+        # A distinct alias keeps the benchmark pool apart from the app's own
+        return backend.DatabaseWrapper(settings_dict, alias=f"bench_{mode}")
+
+    def _simulate(self, wrapper, mode, total):
+        """
+        Run ``total`` request cycles the way Django's request signals do:
+        check the connection at the start and end of each request and run one
+        query in between. Returns the samples and the connections opened.
+        """
+        samples = []
+        connects = 0
+        for _ in range(total):
+            started = time.perf_counter()
+            wrapper.close_if_unusable_or_obsolete()
+            connects += wrapper.connection is None
+            with wrapper.cursor() as cursor:
+                cursor.execute("SELECT 1")
+                cursor.fetchone()
+            wrapper.close_if_unusable_or_obsolete()
+            samples.append(perf.Sample(mode, 200, time.perf_counter() - started, 1))
+        if mode == 'pool':
+            # Handing a pooled connection back looks like a close; count what the pool really opened
+            connects = wrapper.pool.get_stats().get('connections_num', 0)
+        return samples, connects
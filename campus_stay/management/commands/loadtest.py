@@ -0,0 +1,123 @@
+import json
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from campus_stay import perf
+from properties.models import Properties
+from universities.models import University
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay a weighted request mix against the main API endpoints and report "
+        "p50/p95/p99 latency and query counts"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help="Total number of requests to replay")
+        parser.add_argument('--concurrency', type=int, default=1, help="Number of concurrent clients")
+        parser.add_argument(
+            '--base-url',
+            help="Send requests over HTTP to this server instead of in-process (no query counts)",
+        )
+        parser.add_argument('--user', help="Email of the user to authenticate as (default: any student)")
+        parser.add_argument('--seed', type=int, default=0, help="Random seed for the request mix")
+        parser.add_argument('--json', help="Also write the summary to this JSON file")
+
+    def handle(self, *args, **options):
+        property_ids = list(Properties.objects.filter(is_available=True).values_list('id', flat=True)[:5000])
+        university_ids = list(University.objects.values_list('id', flat=True))
+        if not property_ids or not university_ids:
+            raise CommandError("No data to test against; run seed_universities and generate_fixtures first")
+
+        user = self._get_user(options['user'])
+        auth_header = None
+        if user:
+            auth_header = f"Bearer {RefreshToken.for_user(user).access_token}"
+        else:
+            self.stdout.write(self.style.WARNING("No student user found; authenticated endpoints are skipped"))
+
+        mix = self._build_mix(property_ids, university_ids, user)
+        planned = perf.plan_requests(mix, options['requests'], seed=options['seed'])
+
+        started = time.perf_counter()
+        if options['base_url']:
+            samples = perf.run_http(planned, options['base_url'], auth_header, options['concurrency'])
+        else:
+            # Every replayed request comes from one client, which the per-IP buckets would throttle
+            unthrottled = {**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {}}
+            with override_settings(REST_FRAMEWORK=unthrottled):
+                samples = perf.run_in_process(planned, auth_header, options['concurrency'], host=self._host())
+        elapsed = time.perf_counter() - started
+        if perf.throttled(samples):
+            raise CommandError(
+                f"{perf.throttled(samples)} of {len(samples)} requests were throttled (429), so the run "
+                "measured rejections; unthrottle the server (empty THROTTLE_RATE_SEARCH, THROTTLE_RATE_AUTH "
+                "and THROTTLE_RATE_WRITE) and rerun"
+            )
+
+        summary = perf.summarize(samples)
+        self.stdout.write(perf.format_summary(summary))
+        self.stdout.write(f"\n{len(samples)} requests in {elapsed:.1f}s ({len(samples) / elapsed:.1f} req/s)")
+
+        if options['json']:
+            with open(options['json'], 'w') as f:
+                json.dump(
+                    {'requests': len(samples), 'seconds': round(elapsed, 3), 'endpoints': summary},
+                    f,
+                    indent=2,
+                )
+
+    def _get_user(self, email):
+        if email:
+            try:
+                return User.objects.get(email=email)
+            except User.DoesNotExist:
+                raise CommandError(f"User {email} not found")
+        return User.objects.filter(roles='student', student_profile__isnull=False).order_by('id').first()
+
+    def _host(self):
+        for host in settings.ALLOWED_HOSTS:
+            if host != '*' and not host.startswith('.'):
+                return host
+        return 'localhost'
+
+    def _build_mix(self, property_ids, university_ids, user):
+        """(weight, endpoint, path factory, authenticated) for the typical traffic mix."""
+        property_types = [choice for choice, _ in Properties.PROPERTY_TYPE_CHOICES]
+        mix = [
+            (30, 'properties:list', lambda rng: f"/api/v1/properties/?page={rng.randint(1, 5)}", False),
+            (
+                15,
+                'properties:filtered',
+                lambda rng: (
+                    f"/api/v1/properties/?property_type={rng.choice(property_types)}"
+                    f"&max_price={rng.choice([100000, 200000, 500000])}&bedrooms__gte=1"
+                ),
+                False,
+            ),
+            (
+                10,
+                'properties:near',
+                lambda rng: f"/api/v1/properties/?university_id={rng.choice(university_ids)}&distance=3",
+                False,
+            ),
+            (20, 'properties:detail', lambda rng: f"/api/v1/properties/{rng.choice(property_ids)}/", False),
+            (10, 'properties:marketing', lambda rng: "/api/v1/properties/marketing-categories/", False),
+            (5, 'universities:list', lambda rng: "/api/v1/universities/", False),
+            (3, 'reviews:property', lambda rng: f"/api/v1/reviews/?property={rng.choice(property_ids)}", False),
+        ]
+        if user:
+            mix += [
+                (3, 'universities:detail', lambda rng: f"/api/v1/universities/{rng.choice(university_ids)}/", True),
+                (2, 'campuses:list', lambda rng: "/api/v1/campuses/", True),
+                (3, 'favourites:list', lambda rng: f"/api/v1/favourites/?user_id={user.id}", True),
+                (3, 'enquiries:list', lambda rng: "/api/v1/messages/enquiries/", True),
+                (2, 'users:me', lambda rng: "/api/v1/users/me/", True),
+            ]
+        return mix
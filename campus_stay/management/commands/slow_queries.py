@@ -0,0 +1,92 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+from campus_stay import perf, slow_queries
+
+
+class Command(BaseCommand):
+    help = "Summarise the slow query log, grouped by normalized SQL fingerprint"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', help="Slow query log to read (default: SLOW_QUERY_LOG)")
+        parser.add_argument('--since', help="Only include queries logged at or after this ISO datetime")
+        parser.add_argument('--view', help="Only include queries issued by this view name")
+        parser.add_argument(
+            '--sort',
+            choices=['total', 'count', 'max'],
+            default='total',
+            help="Order groups by total time, occurrences or slowest run",
+        )
+        parser.add_argument('--limit', type=int, default=20, help="Number of groups to show")
+        parser.add_argument('--plans', action='store_true', help="Print the slowest captured plan of each group")
+
+    def handle(self, *args, **options):
+        path = options['file'] or settings.SLOW_QUERY_LOG
+        since = None
+        if options['since']:
+            since = parse_datetime(options['since'])
+            if since is None:
+                raise CommandError(f"Invalid --since datetime: {options['since']}")
+
+        groups = {}
+        skipped = 0
+        try:
+            with open(path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        skipped += 1
+                        continue
+                    if since and parse_datetime(entry['time']) < since:
+                        continue
+                    if options['view'] and entry.get('view') != options['view']:
+                        continue
+                    key = slow_queries.fingerprint(entry['sql'])
+                    groups.setdefault(key, []).append(entry)
+        except FileNotFoundError:
+            raise CommandError(f"No slow query log at {path}")
+
+        if not groups:
+            self.stdout.write("No slow queries logged")
+            return
+
+        sort_keys = {
+            'total': lambda entries: sum(entry['ms'] for entry in entries),
+            'count': len,
+            'max': lambda entries: max(entry['ms'] for entry in entries),
+        }
+        ordered = sorted(groups.items(), key=lambda item: sort_keys[options['sort']](item[1]), reverse=True)
+
+        for key, entries in ordered[:options['limit']]:
+            durations = [entry['ms'] for entry in entries]
+            slowest = max(entries, key=lambda entry: entry['ms'])
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"{key}  {len(entries)}x  total {sum(durations):.0f} ms  "
+                f"p95 {perf.percentile(durations, 95):.0f} ms  max {slowest['ms']:.0f} ms"
+            ))
+            self.stdout.write(f"  {slow_queries.normalize(slowest['sql'])}")
+            for label, values in (
+                ('views', {entry.get('view') for entry in entries}),
+                ('origins', {entry.get('origin') for entry in entries}),
+                ('serializer fields', {entry.get('serializer_field') for entry in entries}),
+            ):
+                values.discard(None)
+                if values:
+                    self.stdout.write(f"  {label}: {', '.join(sorted(values))}")
+            if options['plans']:
+                plan = next(
+                    (entry['plan'] for entry in sorted(entries, key=lambda e: -e['ms']) if entry.get('plan')),
+                    None,
+                )
+                if plan:
+                    self.stdout.write(json.dumps(plan, indent=2))
+            self.stdout.write("")
+
+        summary = f"{len(groups)} distinct queries, {sum(len(entries) for entries in groups.values())} slow executions"
+        if skipped:
+            summary += f" ({skipped} unreadable lines skipped)"
+        self.stdout.write(summary)
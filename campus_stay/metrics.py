@@ -0,0 +1,114 @@
+"""
+Prometheus metrics for the API hot paths.
+
+Under gunicorn every worker writes its samples to ``PROMETHEUS_MULTIPROC_DIR``
+(set in ``gunicorn.conf.py``) and ``/metrics`` aggregates them, so a scrape
+sees the whole server regardless of which worker answers it. Without that
+variable (runserver, tests) the default in-process registry is used.
+"""
+import hmac
+import os
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden, HttpResponseNotFound
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest
+from prometheus_client import multiprocess
+
+from campus_stay import db
+
+REQUEST_LATENCY = Histogram(
+    'campusstay_http_request_duration_seconds',
+    "Time to handle a request, by route",
+    ['method', 'route', 'status'],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+REQUEST_DB_QUERIES = Histogram(
+    'campusstay_http_request_db_queries',
+    "SQL queries run per request, by route",
+    ['method', 'route'],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000),
+)
+CACHE_REQUESTS = Counter(
+    'campusstay_cache_requests_total',
+    "Cache lookups by cache and result (hit/miss)",
+    ['cache', 'result'],
+)
+CLOUDINARY_UPLOAD_SECONDS = Histogram(
+    'campusstay_cloudinary_upload_duration_seconds',
+    "Time to upload a property media file to Cloudinary",
+    ['media_type'],
+    buckets=(0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+)
+ENQUIRY_MESSAGES = Counter(
+    'campusstay_enquiry_messages_total',
+    "Enquiry messages sent, by sender role",
+    ['sender_role'],
+)
+AUTH_LOGIN_SECONDS = Histogram(
+    'campusstay_auth_login_duration_seconds',
+    "Time to authenticate a username/password login and issue JWTs",
+    ['outcome'],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5),
+)
+THROTTLE_REQUESTS = Counter(
+    'campusstay_throttle_requests_total',
+    "Throttled-scope requests by scope and result (allowed/throttled)",
+    ['scope', 'result'],
+)
+
+# Summed over live workers: the connections the whole server holds or waits for
+DB_POOL_CONNECTIONS = Gauge(
+    'campusstay_db_pool_connections',
+    "Database pool connections by state (size, available, waiting, max_size)",
+    ['state'],
+    multiprocess_mode='livesum',
+)
+
+
+def observe_request(request, response, metrics):
+    """Record a finished request; ``metrics`` is its ``RequestMetrics``."""
+    match = getattr(request, 'resolver_match', None)
+    # The view name keeps label cardinality bounded (no ids in the route)
+    route = match.view_name if match and match.view_name else 'unmatched'
+    REQUEST_LATENCY.labels(request.method, route, str(response.status_code)).observe(metrics.total_seconds)
+    REQUEST_DB_QUERIES.labels(request.method, route).observe(metrics.db_queries)
+    observe_db_pool()
+
+
+def observe_db_pool():
+    """Publish the connection pool of this worker, if the database uses one."""
+    stats = db.pool_stats()
+    if stats is None:
+        return
+    for state, value in stats.items():
+        DB_POOL_CONNECTIONS.labels(state).set(value)
+
+
+def record_cache(cache, hit):
+    CACHE_REQUESTS.labels(cache, 'hit' if hit else 'miss').inc()
+
+
+def record_throttle(scope, allowed):
+    THROTTLE_REQUESTS.labels(scope, 'allowed' if allowed else 'throttled').inc()
+
+
+def metrics_view(request):
+    """
+    Prometheus exposition endpoint, protected by ``METRICS_TOKEN``.
+
+    Without a token the endpoint is only served with ``DEBUG`` on.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if token:
+        supplied = request.META.get('HTTP_AUTHORIZATION', '').removeprefix('Bearer ')
+        if not hmac.compare_digest(supplied, token):
+            return HttpResponseForbidden()
+    elif not settings.DEBUG:
+        return HttpResponseNotFound()
+
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,163 @@
+"""
+Helpers for replaying a request mix and summarising latency and query counts.
+
+Requests either go through Django's test client in-process (query counts are
+captured per request) or over HTTP against a running server.
+"""
+import math
+import random
+import statistics
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import close_old_connections, connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+Sample = namedtuple('Sample', ['endpoint', 'status', 'seconds', 'queries'])
+
+# One entry per replayed request: (endpoint label, path, authenticated)
+PlannedRequest = namedtuple('PlannedRequest', ['endpoint', 'path', 'authenticated'])
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of ``values`` (``pct`` in 0-100)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def plan_requests(mix, total, seed=None):
+    """
+    Draw ``total`` requests from a weighted ``mix``.
+
+    ``mix`` is a list of ``(weight, endpoint, path_factory, authenticated)``
+    tuples; ``path_factory`` receives a ``random.Random`` and returns a path.
+    """
+    rng = random.Random(seed)
+    weights = [entry[0] for entry in mix]
+    planned = []
+    for _ in range(total):
+        _, endpoint, path_factory, authenticated = rng.choices(mix, weights)[0]
+        planned.append(PlannedRequest(endpoint, path_factory(rng), authenticated))
+    return planned
+
+
+def run_in_process(planned, auth_header=None, concurrency=1, host='localhost'):
+    """Replay requests through the Django test client, counting queries."""
+    def worker(batch):
+        client = Client(HTTP_HOST=host)
+        samples = []
+        try:
+            for request in batch:
+                headers = {'HTTP_AUTHORIZATION': auth_header} if request.authenticated and auth_header else {}
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    response = client.get(request.path, **headers)
+                    elapsed = time.perf_counter() - started
+                samples.append(Sample(request.endpoint, response.status_code, elapsed, len(queries)))
+        finally:
+            close_old_connections()
+        return samples
+
+    return _run_batches(planned, worker, concurrency)
+
+
+def run_http(planned, base_url, auth_header=None, concurrency=1, timeout=30):
+    """Replay requests over HTTP; query counts are not available."""
+    import requests
+
+    def worker(batch):
+        session = requests.Session()
+        samples = []
+        for request in batch:
+            headers = {'Authorization': auth_header} if request.authenticated and auth_header else {}
+            started = time.perf_counter()
+            response = session.get(base_url.rstrip('/') + request.path, headers=headers, timeout=timeout)
+            elapsed = time.perf_counter() - started
+            samples.append(Sample(request.endpoint, response.status_code, elapsed, None))
+        return samples
+
+    return _run_batches(planned, worker, concurrency)
+
+
+def _run_batches(planned, worker, concurrency):
+    concurrency = max(1, concurrency)
+    batches = [planned[i::concurrency] for i in range(concurrency)]
+    if concurrency == 1:
+        return worker(batches[0])
+    samples = []
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for result in executor.map(worker, batches):
+            samples.extend(result)
+    return samples
+
+
+def throttled(samples):
+    """Number of requests rejected by throttling (429)."""
+    return sum(1 for sample in samples if sample.status == 429)
+
+
+def succeeded(sample):
+    """Whether a sample got a 2xx or 3xx response."""
+    return 200 <= sample.status < 400
+
+
+def summarize(samples):
+    """
+    Aggregate samples per endpoint, plus an ``ALL`` row.
+
+    Every response that isn't 2xx or 3xx is an error (``client_errors``
+    counts the 4xx among them, throttling included). Latency percentiles
+    only cover the successful requests, since fast rejections would pull
+    them down.
+    """
+    groups = {}
+    for sample in samples:
+        groups.setdefault(sample.endpoint, []).append(sample)
+    groups['ALL'] = list(samples)
+
+    summary = {}
+    for endpoint, group in groups.items():
+        if not group:
+            continue
+        latencies = [sample.seconds * 1000 for sample in group if succeeded(sample)]
+        queries = [sample.queries for sample in group if sample.queries is not None]
+        summary[endpoint] = {
+            'requests': len(group),
+            'errors': sum(1 for sample in group if not succeeded(sample)),
+            'client_errors': sum(1 for sample in group if 400 <= sample.status < 500),
+            'p50_ms': _rounded(percentile(latencies, 50)),
+            'p95_ms': _rounded(percentile(latencies, 95)),
+            'p99_ms': _rounded(percentile(latencies, 99)),
+            'mean_queries': round(statistics.mean(queries), 1) if queries else None,
+            'max_queries': max(queries) if queries else None,
+        }
+    return summary
+
+
+def _rounded(value):
+    return None if value is None else round(value, 2)
+
+
+def format_summary(summary):
+    """Render a summary as a fixed-width text table."""
+    header = (
+        f"{'endpoint':<28} {'reqs':>6} {'errs':>5} {'4xx':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+        f"{'queries':>8} {'max q':>6}"
+    )
+    lines = [header, '-' * len(header)]
+    for endpoint, row in summary.items():
+        cells = {
+            name: '-' if row[name] is None else row[name]
+            for name in ('p50_ms', 'p95_ms', 'p99_ms', 'mean_queries', 'max_queries')
+        }
+        lines.append(
+            f"{endpoint:<28} {row['requests']:>6} {row['errors']:>5} {row['client_errors']:>5} "
+            f"{cells['p50_ms']:>9} {cells['p95_ms']:>9} {cells['p99_ms']:>9} "
+            f"{cells['mean_queries']:>8} {cells['max_queries']:>6}"
+        )
+    return '\n'.join(lines)
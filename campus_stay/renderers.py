@@ -0,0 +1,41 @@
+"""
+orjson-backed JSON rendering and parsing.
+
+``ORJSONRenderer`` produces the same compact JSON as DRF's ``JSONRenderer``
+several times faster. Types orjson does not handle natively (Decimal, lazy
+translations) and datetimes go through DRF's ``JSONEncoder``, so their
+representation does not change. Indented output (the browsable API,
+``; indent=`` in the Accept header) is left to ``JSONRenderer``.
+"""
+import orjson
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+_encoder = JSONEncoder()
+
+# Datetimes are passed to DRF's encoder, which trims microseconds and writes UTC as "Z"
+OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+
+def dumps(data):
+    """Serialize ``data`` to compact UTF-8 JSON bytes."""
+    return orjson.dumps(data, default=_encoder.default, option=OPTIONS)
+
+
+class ORJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
+
+
+class ORJSONParser(JSONParser):
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
@@ -7,6 +7,8 @@ import os
 import environ
 from datetime import timedelta
 
+from campus_stay import db
+
 # Cloudinary imports
 import cloudinary
 import cloudinary.api
@@ -60,25 +62,33 @@ INSTALLED_APPS = [
     'user_messages',
     'reviews',
     'favourites',
+    'campus_stay',  # Project-wide tooling (management commands)
 ]
 
 # Site ID required for django-allauth
 SITE_ID = 1
 
 MIDDLEWARE = [
+    'middleware.request_timing.RequestTimingMiddleware',  # Per-request SQL/timing instrumentation (keep first)
+    'middleware.compression.CompressionMiddleware',  # Brotli/gzip; before anything that reads the body
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'middleware.read_your_writes.ReadYourWritesMiddleware',  # Keeps writers on the primary database
     'allauth.account.middleware.AccountMiddleware',  
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'middleware.property_tracking.PropertyViewTrackingMiddleware',  # Custom middleware for property view tracking
+    'middleware.property_tracking.PropertyViewTrackingMiddleware',  # Property view tracking (async-capable, keeps ASGI async)
 ]
 
-ROOT_URLCONF = 'campus_stay.urls'
+# Responses smaller than this are sent uncompressed (middleware.compression)
+COMPRESSION_MIN_BYTES = env.int('COMPRESSION_MIN_BYTES', default=1024)
+
+# campus_stay.asgi switches to campus_stay.urls_asgi, which adds async read views
+ROOT_URLCONF = env('ROOT_URLCONF', default='campus_stay.urls')
 
 TEMPLATES = [
     {
@@ -109,12 +119,53 @@ DATABASES = {
         'HOST': env('SUPABASE_DB_HOST'),
         'PORT': env('SUPABASE_DB_PORT', default='5432'),
         'POOL_MODE': env('SUPABASE_DB_POOL_MODE', default='threaded'),
-        'OPTIONS': {
-            'sslmode': 'require',
-        },
+        # The Supabase transaction pooler cannot hold a cursor open across transactions
+        'DISABLE_SERVER_SIDE_CURSORS': env('SUPABASE_DB_POOL_MODE', default='threaded') == 'transaction',
+        # 'pool' (psycopg 3 pool per worker), 'persistent' or 'none'; see campus_stay/db.py
+        **db.connection_settings(
+            mode=env('DB_CONNECTION_MODE', default='pool'),
+            workers=env.int('WEB_CONCURRENCY', default=3),
+            max_connections=env.int('DB_MAX_CONNECTIONS', default=60),
+            options={'sslmode': 'require'},
+            conn_max_age=env.int('DB_CONN_MAX_AGE', default=600),
+            pool_timeout=env.float('DB_POOL_TIMEOUT', default=10),
+        ),
     }
 }
 
+# Read replica for list and search traffic (campus_stay/db_routers.py); unset reads from the primary.
+# Under test the replica mirrors the test database, so any reachable second host will do.
+REPLICA_DB_HOST = env('SUPABASE_REPLICA_DB_HOST', default=None)
+if REPLICA_DB_HOST:
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': REPLICA_DB_HOST,
+        'PORT': env('SUPABASE_REPLICA_DB_PORT', default=DATABASES['default']['PORT']),
+        'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+        'TEST': {'MIRROR': 'default'},
+    }
+REPLICA_DATABASE = 'replica' if REPLICA_DB_HOST else None
+# How long a user's reads stay on the primary after they write
+REPLICA_STICKY_SECONDS = env.int('REPLICA_STICKY_SECONDS', default=10)
+DATABASE_ROUTERS = ['campus_stay.db_routers.ReplicaRouter']
+
+# Cache shared by every worker (helpers in campus_stay/cache.py). Without REDIS_URL each
+# process keeps its own in-memory cache, or a file cache under CACHE_DIR when that is set.
+REDIS_URL = env('REDIS_URL', default=None)
+CACHE_DIR = env('CACHE_DIR', default=None)
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'campusstay',
+        },
+    }
+elif CACHE_DIR:
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': CACHE_DIR}}
+else:
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'campus-stay'}}
+
 AUTH_USER_MODEL = 'users.User'
 
 # Password validation
@@ -186,7 +237,28 @@ REST_FRAMEWORK = {
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
     ],
+    # orjson-backed JSON (campus_stay/renderers.py); output matches DRF's JSONRenderer
+    'DEFAULT_RENDERER_CLASSES': [
+        'campus_stay.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'campus_stay.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    # Token buckets per user or client IP in the shared cache (campus_stay/throttling.py)
+    'DEFAULT_THROTTLE_CLASSES': [
+        'campus_stay.throttling.TokenBucketThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'search': env('THROTTLE_RATE_SEARCH', default='120/min'),
+        'auth': env('THROTTLE_RATE_AUTH', default='10/min'),
+        'write': env('THROTTLE_RATE_WRITE', default='60/min'),
+    },
+    # Client IPs come from X-Forwarded-For behind this many proxies
+    'NUM_PROXIES': env.int('NUM_PROXIES', default=None),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
 }
@@ -202,6 +274,26 @@ SECURE_SSL_REDIRECT = False
 SESSION_COOKIE_SECURE = False
 CSRF_COOKIE_SECURE = False
 
+# Request instrumentation (middleware.request_timing)
+# Fraction of requests logged as JSON lines; requests slower than SLOW_REQUEST_MS are always logged
+REQUEST_LOG_SAMPLE_RATE = env.float('REQUEST_LOG_SAMPLE_RATE', default=0.01)
+SLOW_REQUEST_MS = env.int('SLOW_REQUEST_MS', default=1000)
+# ?_profile=1 returns a cProfile breakdown of a request; only honoured with an
+# X-Profile-Token header matching REQUEST_PROFILING_TOKEN (profiling stays off without one)
+REQUEST_PROFILING_ENABLED = env.bool('REQUEST_PROFILING_ENABLED', default=False)
+REQUEST_PROFILING_TOKEN = env('REQUEST_PROFILING_TOKEN', default=None)
+# Bearer token required to scrape /metrics (unset: /metrics is only served with DEBUG on)
+METRICS_TOKEN = env('METRICS_TOKEN', default=None)
+
+# Slow query log (campus_stay.slow_queries), one JSON object per line; see `manage.py slow_queries`
+SLOW_QUERY_MS = env.int('SLOW_QUERY_MS', default=200)
+SLOW_QUERY_LOG = env('SLOW_QUERY_LOG', default=str(BASE_DIR / 'logs' / 'slow_queries.log'))
+# Attach EXPLAIN (ANALYZE, BUFFERS) plans; re-runs each slow SELECT, so keep it to debugging
+SLOW_QUERY_EXPLAIN = env.bool('SLOW_QUERY_EXPLAIN', default=DEBUG)
+
+# Map viewport queries (?in_bbox= / ?within= on /properties/) return at most this many properties
+VIEWPORT_MAX_RESULTS = env.int('VIEWPORT_MAX_RESULTS', default=500)
+
 # Logging configuration - ALL LOGS TO CONSOLE
 LOGGING = {
     'version': 1,
@@ -215,6 +307,10 @@ LOGGING = {
             'format': '{levelname} {message}',
             'style': '{',
         },
+        'message_only': {
+            'format': '{message}',
+            'style': '{',
+        },
     },
     'handlers': {
         'console': {
@@ -222,6 +318,13 @@ LOGGING = {
             'class': 'logging.StreamHandler',
             'formatter': 'verbose'
         },
+        'slow_queries': {
+            'level': 'WARNING',
+            'class': 'logging.handlers.WatchedFileHandler',
+            'filename': SLOW_QUERY_LOG,
+            'formatter': 'message_only',
+            'delay': True,
+        },
     },
     'loggers': {
         'django': {
@@ -249,6 +352,16 @@ LOGGING = {
             'level': 'INFO',
             'propagate': False,
         },
+        'middleware.request_timing': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'campus_stay.slow_queries': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
         'cloudinary': {
             'handlers': ['console'],
             'level': 'DEBUG',
@@ -0,0 +1,122 @@
+"""
+Slow query log.
+
+Queries slower than ``SLOW_QUERY_MS`` during a request are written as one
+JSON object per line to the ``campus_stay.slow_queries`` logger (see
+``LOGGING``), together with the view, the first project frame that issued
+them and, when it came from a serializer, the serializer field being
+rendered. With ``SLOW_QUERY_EXPLAIN`` (on in DEBUG) the PostgreSQL plan from
+``EXPLAIN (ANALYZE, BUFFERS)`` is attached; this re-runs the query, so only
+SELECTs are explained.
+
+``manage.py slow_queries`` groups the log by ``fingerprint()``.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+from rest_framework.fields import Field
+
+logger = logging.getLogger(__name__)
+
+# Set while running EXPLAIN so the extra query is not itself logged
+_explaining = ContextVar('explaining_slow_query', default=False)
+
+_SKIPPED_FILES = (
+    os.path.abspath(__file__),
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instrumentation.py'),
+)
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_VALUES_RE = re.compile(r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize(sql):
+    """SQL with literals and placeholder lists collapsed, so similar queries compare equal."""
+    sql = _STRING_RE.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = _PLACEHOLDER_LIST_RE.sub('(...)', sql)
+    sql = _VALUES_RE.sub('(...)', sql)
+    return _WHITESPACE_RE.sub(' ', sql).strip()
+
+
+def fingerprint(sql):
+    return hashlib.sha1(normalize(sql).encode()).hexdigest()[:12]
+
+
+def record(metrics, sql, params, many, context, seconds):
+    """Log a slow query; called from ``RequestMetrics.execute_wrapper``."""
+    if _explaining.get():
+        return
+    request = metrics.request
+    match = getattr(request, 'resolver_match', None) if request is not None else None
+    origin, serializer_field = _origin()
+    connection = context['connection']
+    entry = {
+        'time': timezone.now().isoformat(),
+        'ms': round(seconds * 1000, 2),
+        'db': connection.alias,
+        'view': match.view_name if match else None,
+        'path': request.path if request is not None else None,
+        'origin': origin,
+        'serializer_field': serializer_field,
+        'sql': sql,
+        'params': None if many else params,
+    }
+    if (
+        getattr(settings, 'SLOW_QUERY_EXPLAIN', False)
+        and not many
+        and connection.vendor == 'postgresql'
+        and sql.lstrip()[:6].upper() == 'SELECT'
+    ):
+        entry['plan'] = _explain(connection, sql, params)
+    logger.warning(json.dumps(entry, default=str))
+
+
+def _origin():
+    """First project frame on the stack, and the serializer field being rendered if any."""
+    project_root = str(settings.BASE_DIR)
+    location = field_name = None
+    frame = sys._getframe(2)
+    while frame is not None and (location is None or field_name is None):
+        code = frame.f_code
+        filename = os.path.abspath(code.co_filename)
+        if (
+            location is None
+            and filename.startswith(project_root)
+            and 'site-packages' not in filename
+            and filename not in _SKIPPED_FILES
+        ):
+            location = f"{os.path.relpath(filename, project_root)}:{frame.f_lineno} in {code.co_name}"
+        if field_name is None and code.co_name == 'to_representation':
+            field = frame.f_locals.get('field')
+            serializer = frame.f_locals.get('self')
+            if isinstance(field, Field) and serializer is not None:
+                field_name = f"{type(serializer).__name__}.{field.field_name}"
+        frame = frame.f_back
+    return location, field_name
+
+
+def _explain(connection, sql, params):
+    token = _explaining.set(True)
+    try:
+        # Savepoint so a failing EXPLAIN cannot abort the request's transaction
+        with transaction.atomic(using=connection.alias):
+            with connection.cursor() as cursor:
+                cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}", params)
+                return cursor.fetchone()[0]
+    except DatabaseError as e:
+        return {'error': str(e)}
+    finally:
+        _explaining.reset(token)
@@ -0,0 +1,478 @@
+import datetime
+import gzip
+import hashlib
+import io
+import json
+from decimal import Decimal
+import os
+import tempfile
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.http import HttpResponse
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from campus_stay import (
+    cache as shared_cache, db, db_routers, instrumentation, metrics, perf, renderers, slow_queries, throttling,
+)
+from middleware import compression
+from middleware.read_your_writes import ReadYourWritesMiddleware
+from middleware.request_timing import RequestTimingMiddleware
+
+
+class PerfHelperTests(SimpleTestCase):
+    """Test the load harness aggregation helpers."""
+
+    def test_percentile_nearest_rank(self):
+        values = list(range(1, 101))
+
+        self.assertEqual(perf.percentile(values, 50), 50)
+        self.assertEqual(perf.percentile(values, 95), 95)
+        self.assertEqual(perf.percentile(values, 99), 99)
+        self.assertIsNone(perf.percentile([], 50))
+
+    def test_plan_requests_is_reproducible(self):
+        mix = [
+            (3, 'list', lambda rng: '/list/', False),
+            (1, 'detail', lambda rng: f"/detail/{rng.randint(1, 10)}/", False),
+        ]
+
+        self.assertEqual(perf.plan_requests(mix, 20, seed=1), perf.plan_requests(mix, 20, seed=1))
+
+    def test_summarize_groups_by_endpoint(self):
+        samples = [
+            perf.Sample('list', 200, 0.010, 4),
+            perf.Sample('list', 200, 0.030, 6),
+            perf.Sample('detail', 500, 0.020, 12),
+        ]
+
+        summary = perf.summarize(samples)
+
+        self.assertEqual(summary['list']['requests'], 2)
+        self.assertEqual(summary['list']['mean_queries'], 5)
+        self.assertEqual(summary['detail']['errors'], 1)
+        self.assertEqual(summary['ALL']['max_queries'], 12)
+        self.assertIn('detail', perf.format_summary(summary))
+
+    def test_throttled_counts_rejected_requests(self):
+        samples = [perf.Sample('list', 200, 0.010, 4), perf.Sample('list', 429, 0.001, 0)]
+
+        self.assertEqual(perf.throttled(samples), 1)
+        self.assertEqual(perf.throttled(samples[:1]), 0)
+
+    def test_summarize_counts_client_errors_and_keeps_them_out_of_latency(self):
+        samples = [
+            perf.Sample('list', 200, 0.050, 4),
+            perf.Sample('list', 304, 0.030, 1),
+            perf.Sample('list', 429, 0.001, 0),
+            perf.Sample('list', 404, 0.002, 1),
+        ]
+
+        row = perf.summarize(samples)['list']
+
+        self.assertEqual(row['errors'], 2)
+        self.assertEqual(row['client_errors'], 2)
+        self.assertEqual(row['p50_ms'], 30)
+        self.assertEqual(perf.summarize([perf.Sample('list', 429, 0.001, 0)])['list']['p95_ms'], None)
+        self.assertIn(' 4xx ', perf.format_summary(perf.summarize(samples)))
+
+
+class InstrumentationTests(SimpleTestCase):
+    """Test per-request metric collection helpers."""
+
+    def test_helpers_are_noops_outside_a_request(self):
+        with instrumentation.timed('serializer'):
+            pass
+        instrumentation.record_cache('test', hit=True)
+
+        self.assertIsNone(instrumentation.current())
+
+    def test_nested_sections_count_once(self):
+        metrics, token = instrumentation.start()
+        try:
+            with instrumentation.timed('serializer'):
+                with instrumentation.timed('serializer'):
+                    time.sleep(0.01)
+        finally:
+            instrumentation.stop(token)
+
+        self.assertGreaterEqual(metrics.sections['serializer'], 0.01)
+        self.assertLess(metrics.sections['serializer'], 0.02)
+        self.assertIsNone(instrumentation.current())
+
+    def test_server_timing_header(self):
+        metrics, token = instrumentation.start()
+        try:
+            metrics.execute_wrapper(lambda *args: None, 'SELECT 1', None, False, {})
+            instrumentation.record_cache('test', hit=True)
+            instrumentation.record_cache('test', hit=False)
+            with instrumentation.timed('serializer'):
+                pass
+        finally:
+            instrumentation.stop(token)
+
+        header = metrics.server_timing()
+
+        self.assertIn('desc="1 queries"', header)
+        self.assertIn('serializer;dur=', header)
+        self.assertIn('cache;desc="1 hits, 1 misses"', header)
+        self.assertIn('total;dur=', header)
+
+
+class ConnectionSettingsTests(SimpleTestCase):
+    """Test the database connection settings for each connection mode."""
+
+    def test_pool_shares_the_connection_budget_between_workers(self):
+        self.assertEqual(db.pool_size(workers=3, max_connections=65), (2, 20))
+        self.assertEqual(db.pool_size(workers=8, max_connections=10), (1, 1))
+
+    def test_pool_mode(self):
+        config = db.connection_settings('pool', workers=4, max_connections=45, options={'sslmode': 'require'})
+
+        self.assertEqual(config['CONN_MAX_AGE'], 0)
+        self.assertEqual(config['OPTIONS']['sslmode'], 'require')
+        self.assertEqual(config['OPTIONS']['pool']['max_size'], 10)
+
+    def test_persistent_mode_checks_connections_before_reuse(self):
+        config = db.connection_settings('persistent', workers=4, max_connections=45, conn_max_age=300)
+
+        self.assertEqual(config['CONN_MAX_AGE'], 300)
+        self.assertTrue(config['CONN_HEALTH_CHECKS'])
+        self.assertNotIn('pool', config['OPTIONS'])
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            db.connection_settings('pgbouncer', workers=1, max_connections=10)
+
+
+@override_settings(REPLICA_DATABASE='replica', REPLICA_STICKY_SECONDS=10)
+class ReplicaRouterTests(SimpleTestCase):
+    """Test read replica routing and read-your-writes stickiness."""
+
+    def setUp(self):
+        cache.clear()
+        self.router = db_routers.ReplicaRouter()
+        self.user = SimpleNamespace(pk=7, is_authenticated=True)
+
+    def test_reads_use_the_replica_only_inside_an_opted_in_scope(self):
+        self.assertIsNone(self.router.db_for_read(None))
+        with db_routers.routing_scope():
+            db_routers.use_replica()
+            self.assertEqual(self.router.db_for_read(None), 'replica')
+            self.assertEqual(self.router.db_for_write(None), 'default')
+        self.assertIsNone(self.router.db_for_read(None))
+
+    @override_settings(REPLICA_DATABASE=None)
+    def test_no_replica_configured(self):
+        with db_routers.routing_scope():
+            db_routers.use_replica()
+            self.assertIsNone(self.router.db_for_read(None))
+
+    def test_replica_is_never_migrated(self):
+        self.assertFalse(self.router.allow_migrate('replica', 'properties'))
+        self.assertIsNone(self.router.allow_migrate('default', 'properties'))
+
+    def test_successful_writes_make_the_user_sticky(self):
+        factory = RequestFactory()
+
+        def request(method, status):
+            request = getattr(factory, method)('/api/v1/properties/1/')
+            request.user = self.user
+            ReadYourWritesMiddleware(lambda request: HttpResponse(status=status))(request)
+
+        request('get', 200)
+        request('patch', 400)
+        self.assertFalse(db_routers.is_sticky(self.user))
+
+        request('patch', 200)
+        self.assertTrue(db_routers.is_sticky(self.user))
+        self.assertFalse(db_routers.is_sticky(SimpleNamespace(pk=None, is_authenticated=False)))
+
+
+class SharedCacheTests(SimpleTestCase):
+    """Test versioned keys and the stampede-protected get_or_build."""
+
+    def setUp(self):
+        cache.clear()
+        self.builds = 0
+
+    def build(self):
+        self.builds += 1
+        return self.builds
+
+    def test_bumping_the_version_changes_keys(self):
+        before = shared_cache.make_key('ns', shared_cache.version('ns'), 'a')
+        shared_cache.bump_version('ns')
+
+        self.assertNotEqual(shared_cache.make_key('ns', shared_cache.version('ns'), 'a'), before)
+
+    def test_builds_once_while_fresh(self):
+        self.assertEqual(shared_cache.get_or_build('k', self.build, 60), 1)
+        self.assertEqual(shared_cache.get_or_build('k', self.build, 60), 1)
+
+    def test_stale_value_served_while_another_caller_rebuilds(self):
+        cache.set('k', (time.time() - 1, 'stale'), 60)
+        cache.add('k:lock', 1)
+
+        self.assertEqual(shared_cache.get_or_build('k', self.build, 60), 'stale')
+        self.assertEqual(self.builds, 0)
+
+    def test_stale_value_rebuilt_by_the_lock_holder(self):
+        cache.set('k', (time.time() - 1, 'stale'), 60)
+
+        self.assertEqual(shared_cache.get_or_build('k', self.build, 60), 1)
+        self.assertIsNone(cache.get('k:lock'))
+
+    def test_etag_matches_weakly(self):
+        request = RequestFactory().get('/', HTTP_IF_NONE_MATCH='"other", W/"1-abc"')
+
+        self.assertTrue(shared_cache.etag_matches(request, '"1-abc"'))
+        self.assertFalse(shared_cache.etag_matches(request, '"2-abc"'))
+        self.assertFalse(shared_cache.etag_matches(RequestFactory().get('/'), '"1-abc"'))
+
+
+@override_settings(COMPRESSION_MIN_BYTES=100)
+class CompressionMiddlewareTests(SimpleTestCase):
+    """Test encoding negotiation, the pass-through cases and the compressed body cache."""
+
+    body = json.dumps([{'id': i, 'title': 'Chumba Sinza'} for i in range(50)]).encode()
+
+    def setUp(self):
+        cache.clear()
+
+    def respond(self, response, accept_encoding='gzip, deflate'):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept_encoding)
+        return compression.CompressionMiddleware(lambda request: response)(request)
+
+    def test_negotiation(self):
+        self.assertEqual(compression.accepted_encoding('gzip, deflate'), 'gzip')
+        self.assertIsNone(compression.accepted_encoding('gzip;q=0, identity'))
+        self.assertIsNone(compression.accepted_encoding(''))
+        self.assertEqual(compression.accepted_encoding('*'), 'br' if compression.brotli else 'gzip')
+
+    def test_gzip(self):
+        response = self.respond(HttpResponse(self.body, content_type='application/json'))
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), self.body)
+        self.assertEqual(response['Content-Length'], str(len(response.content)))
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_small_and_incompressible_responses_pass_through(self):
+        small = self.respond(HttpResponse(b'{"id": 1}', content_type='application/json'))
+        image = self.respond(HttpResponse(self.body, content_type='image/webp'))
+        encoded = HttpResponse(self.body, content_type='application/json')
+        encoded['Content-Encoding'] = 'gzip'
+
+        self.assertFalse(small.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', small['Vary'])
+        self.assertFalse(image.has_header('Content-Encoding'))
+        self.assertEqual(self.respond(encoded).content, self.body)
+
+    def test_strong_etag_is_weakened(self):
+        response = HttpResponse(self.body, content_type='application/json')
+        response['ETag'] = '"1-abc"'
+
+        self.assertEqual(self.respond(response)['ETag'], 'W/"1-abc"')
+
+    def test_reusable_bodies_are_compressed_once(self):
+        def reusable():
+            response = HttpResponse(self.body, content_type='application/json')
+            response['Cache-Control'] = 'public, max-age=60'
+            return response
+
+        compressed = self.respond(reusable()).content
+        key = f"compression:gzip:{hashlib.sha1(self.body).hexdigest()}"
+        self.assertEqual(cache.get(key), compressed)
+
+        # A second hit is served from the cache rather than compressed again
+        cache.set(key, b'cached')
+        self.assertEqual(self.respond(reusable()).content, b'cached')
+
+
+@override_settings(REST_FRAMEWORK={'DEFAULT_THROTTLE_RATES': {'search': '2/min', 'auth': None}})
+class ThrottlingTests(SimpleTestCase):
+    """Test the token bucket throttle and how requests are given a scope."""
+
+    def setUp(self):
+        cache.clear()
+        self.throttle = throttling.TokenBucketThrottle()
+        self.view = SimpleNamespace(action='list', throttle_scopes={'list': 'search'})
+
+    def request(self, method='get', user=None, ip='10.0.0.1'):
+        request = getattr(RequestFactory(), method)('/', REMOTE_ADDR=ip)
+        request.user = user or SimpleNamespace(pk=None, is_authenticated=False)
+        return request
+
+    def test_parse_rate(self):
+        self.assertEqual(throttling.parse_rate('120/min'), (120, 2.0))
+        self.assertEqual(throttling.parse_rate('10/hour'), (10, 10 / 3600))
+
+    def test_scopes(self):
+        self.assertEqual(throttling.scope_for(self.request(), self.view), 'search')
+        self.assertEqual(throttling.scope_for(self.request('post'), SimpleNamespace(action='create')), 'write')
+        self.assertEqual(throttling.scope_for(self.request(), SimpleNamespace(throttle_scope='auth')), 'auth')
+        self.assertIsNone(throttling.scope_for(self.request(), SimpleNamespace(action='retrieve')))
+
+    def test_bucket_allows_a_burst_then_throttles(self):
+        self.assertTrue(self.throttle.allow_request(self.request(), self.view))
+        self.assertTrue(self.throttle.allow_request(self.request(), self.view))
+        self.assertFalse(self.throttle.allow_request(self.request(), self.view))
+        self.assertAlmostEqual(self.throttle.wait(), 30, delta=1)
+
+    def test_buckets_are_per_client(self):
+        user = SimpleNamespace(pk=7, is_authenticated=True)
+        for _ in range(2):
+            self.throttle.allow_request(self.request(), self.view)
+
+        self.assertTrue(self.throttle.allow_request(self.request(ip='10.0.0.2'), self.view))
+        self.assertTrue(self.throttle.allow_request(self.request(user=user), self.view))
+
+    def test_bucket_refills(self):
+        for _ in range(2):
+            self.throttle.allow_request(self.request(), self.view)
+        tokens, stamp = cache.get('throttle:search:ip:10.0.0.1')
+        cache.set('throttle:search:ip:10.0.0.1', (tokens, stamp - 30))
+
+        self.assertTrue(self.throttle.allow_request(self.request(), self.view))
+
+    def test_unrated_scopes_are_not_throttled(self):
+        view = SimpleNamespace(throttle_scope='auth')
+        for _ in range(5):
+            self.assertTrue(self.throttle.allow_request(self.request('post'), view))
+
+    def test_decisions_are_counted(self):
+        for _ in range(3):
+            self.throttle.allow_request(self.request(), self.view)
+
+        throttled = metrics.REGISTRY.get_sample_value(
+            'campusstay_throttle_requests_total', {'scope': 'search', 'result': 'throttled'}
+        )
+        self.assertGreaterEqual(throttled, 1)
+
+
+class RendererTests(SimpleTestCase):
+    """Test that the orjson renderer and parser behave like DRF's JSON ones."""
+
+    def test_output_matches_drf(self):
+        data = {
+            'price': Decimal('85000.00'),
+            'created_at': datetime.datetime(2025, 1, 2, 3, 4, 5, 678901, tzinfo=datetime.timezone.utc),
+            'name': 'Nyumba ya Sinza – chumba',
+            1: [None, True, 1.5],
+        }
+
+        self.assertEqual(renderers.ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_indented_output_falls_back_to_drf(self):
+        rendered = renderers.ORJSONRenderer().render({'a': 1}, 'application/json; indent=2')
+
+        self.assertEqual(rendered, b'{\n  "a": 1\n}')
+
+    def test_parser(self):
+        parser = renderers.ORJSONParser()
+
+        self.assertEqual(parser.parse(io.BytesIO(b'{"amenity_ids": [1, 2]}')), {'amenity_ids': [1, 2]})
+        with self.assertRaises(ParseError):
+            parser.parse(io.BytesIO(b'{"amenity_ids": ['))
+
+
+class MetricsEndpointTests(SimpleTestCase):
+    """Test the Prometheus exposition view."""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_token_required_when_configured(self):
+        self.assertEqual(metrics.metrics_view(self.factory.get('/metrics')).status_code, 403)
+
+        response = metrics.metrics_view(self.factory.get('/metrics', HTTP_AUTHORIZATION='Bearer secret'))
+
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(METRICS_TOKEN=None, DEBUG=False)
+    def test_not_served_without_token_outside_debug(self):
+        self.assertEqual(metrics.metrics_view(self.factory.get('/metrics')).status_code, 404)
+
+    @override_settings(METRICS_TOKEN=None, DEBUG=True)
+    def test_exposes_cache_counters(self):
+        metrics.record_cache('universities', hit=True)
+
+        response = metrics.metrics_view(self.factory.get('/metrics'))
+
+        self.assertIn(b'campusstay_cache_requests_total{cache="universities",result="hit"}', response.content)
+
+
+@override_settings(REQUEST_PROFILING_ENABLED=True, REQUEST_PROFILING_TOKEN='secret', REQUEST_LOG_SAMPLE_RATE=0.0)
+class RequestProfilingTests(SimpleTestCase):
+    """Test that ?_profile=1 is only honoured with the profiling token."""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.middleware = RequestTimingMiddleware(lambda request: HttpResponse(b'ok'))
+
+    def test_profiler_not_started_without_token(self):
+        for headers in ({}, {'HTTP_X_PROFILE_TOKEN': 'wrong'}):
+            with mock.patch('middleware.request_timing.cProfile.Profile') as profile:
+                response = self.middleware(self.factory.get('/api/properties/?_profile=1', **headers))
+
+            profile.assert_not_called()
+            self.assertEqual(response.content, b'ok')
+
+    def test_profiles_with_token(self):
+        response = self.middleware(self.factory.get('/api/properties/?_profile=1', HTTP_X_PROFILE_TOKEN='secret'))
+
+        self.assertEqual(response['Content-Type'], 'text/plain; charset=utf-8')
+        self.assertIn(b'cumulative', response.content)
+
+    @override_settings(REQUEST_PROFILING_TOKEN=None)
+    def test_disabled_without_configured_token(self):
+        middleware = RequestTimingMiddleware(lambda request: HttpResponse(b'ok'))
+
+        response = middleware(self.factory.get('/api/properties/?_profile=1', HTTP_X_PROFILE_TOKEN=''))
+
+        self.assertEqual(response.content, b'ok')
+
+
+class SlowQueryTests(SimpleTestCase):
+    """Test slow query fingerprinting and the report command."""
+
+    def test_fingerprint_ignores_literals_and_list_lengths(self):
+        first = 'SELECT "id" FROM "properties_properties" WHERE "price" > 60000 AND "id" IN (%s, %s)'
+        second = "SELECT \"id\" FROM \"properties_properties\"\n WHERE \"price\" > 90000 AND \"id\" IN (%s, %s, %s)"
+
+        self.assertEqual(slow_queries.fingerprint(first), slow_queries.fingerprint(second))
+        self.assertEqual(
+            slow_queries.normalize("SELECT * FROM t WHERE name = 'O''Brien'"),
+            "SELECT * FROM t WHERE name = ?",
+        )
+
+    def test_report_groups_by_fingerprint(self):
+        entries = [
+            {'time': '2026-01-01T10:00:00+00:00', 'ms': 250, 'view': 'properties-list',
+             'origin': 'properties/api/views.py:10 in list', 'serializer_field': None,
+             'sql': 'SELECT 1 FROM t WHERE id = %s'},
+            {'time': '2026-01-01T10:01:00+00:00', 'ms': 400, 'view': 'properties-list',
+             'origin': 'properties/api/views.py:10 in list', 'serializer_field': 'PropertiesListSerializer.review_count',
+             'sql': 'SELECT 1 FROM t WHERE id = %s'},
+            {'time': '2026-01-01T10:02:00+00:00', 'ms': 300, 'view': 'universities-list',
+             'origin': None, 'serializer_field': None, 'sql': 'SELECT 2 FROM u'},
+        ]
+        with tempfile.NamedTemporaryFile('w', suffix='.log', delete=False) as f:
+            f.write('\n'.join(json.dumps(entry) for entry in entries) + '\n')
+        self.addCleanup(os.remove, f.name)
+        out = io.StringIO()
+
+        call_command('slow_queries', file=f.name, stdout=out)
+
+        output = out.getvalue()
+        self.assertIn('2x  total 650 ms', output)
+        self.assertIn('PropertiesListSerializer.review_count', output)
+        self.assertIn('2 distinct queries, 3 slow executions', output)
+        self.assertLess(output.index('2x'), output.index('1x'))
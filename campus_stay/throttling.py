@@ -0,0 +1,145 @@
+"""
+Token bucket request throttling in the shared cache.
+
+Every scope (``search``, ``auth``, ``write``) has a rate in
+``REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']``, written as DRF rates
+(``'120/min'``): the bucket holds that many requests and refills evenly over
+the period, so clients can burst up to the full rate and then continue at
+the average. Authenticated users get a bucket per user, everyone else one
+per client IP (``NUM_PROXIES`` decides which address that is).
+
+A request costs one cache round trip. With Redis the bucket is a hash
+updated by a Lua script on the server's clock, which is atomic across
+workers. Other backends are per-process and take a lock instead.
+
+Viewsets pick a scope per action with ``throttle_scopes``; plain API views
+with ``throttle_scope``. Any other unsafe request is a ``write``.
+"""
+import math
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.core.cache import caches
+from django.core.cache.backends.redis import RedisCache
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from campus_stay import metrics
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 60 * 60 * 24}
+
+# KEYS[1] bucket; ARGV capacity, tokens per second, expiry in seconds.
+# Returns {allowed, seconds until the next token} (as a string; Lua numbers come back truncated).
+BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'stamp')
+local tokens = tonumber(bucket[1]) or capacity
+local stamp = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - stamp) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'stamp', tostring(now))
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return {allowed, tostring(math.max(0, 1 - tokens) / rate)}
+"""
+
+_lock = threading.Lock()
+_script = None
+
+
+def parse_rate(rate):
+    """``'120/min'`` -> ``(capacity, tokens per second)``."""
+    count, period = rate.split('/')
+    capacity = int(count)
+    return capacity, capacity / PERIODS[period[0]]
+
+
+def rate_for(scope):
+    """The parsed rate of ``scope``, or None when the scope is not throttled."""
+    rate = api_settings.DEFAULT_THROTTLE_RATES.get(scope) if scope else None
+    return parse_rate(rate) if rate else None
+
+
+def scope_for(request, view):
+    """The throttle scope of a request to ``view``, or None."""
+    scope = getattr(view, 'throttle_scopes', {}).get(getattr(view, 'action', None))
+    scope = scope or getattr(view, 'throttle_scope', None)
+    if scope is None and request.method not in SAFE_METHODS:
+        scope = 'write'
+    return scope
+
+
+def take(scope, ident, rate):
+    """Take a token from the ``scope`` bucket of ``ident``; returns None if allowed, else seconds to wait."""
+    capacity, per_second = rate
+    key = f"throttle:{scope}:{ident}"
+    # Idle buckets are full again after this long, so they can simply expire
+    expiry = math.ceil(capacity / per_second) + 1
+    backend = caches['default']
+    if isinstance(backend, RedisCache):
+        allowed, wait = _take_redis(backend, backend.make_key(key), capacity, per_second, expiry)
+    else:
+        allowed, wait = _take_local(backend, key, capacity, per_second, expiry)
+    metrics.record_throttle(scope, allowed)
+    return None if allowed else wait
+
+
+async def athrottle(request, scope):
+    """Throttle an anonymous request outside DRF (the async views); returns None or seconds to wait."""
+    rate = rate_for(scope)
+    if rate is None:
+        return None
+    return await sync_to_async(take)(scope, f"ip:{BaseThrottle().get_ident(request)}", rate)
+
+
+def _take_redis(backend, key, capacity, per_second, expiry):
+    global _script
+    client = backend._cache.get_client(key, write=True)
+    if _script is None:
+        _script = client.register_script(BUCKET_SCRIPT)
+    allowed, wait = _script(keys=[key], args=[capacity, per_second, expiry], client=client)
+    return bool(allowed), float(wait)
+
+
+def _take_local(backend, key, capacity, per_second, expiry):
+    with _lock:
+        now = time.time()
+        tokens, stamp = backend.get(key) or (capacity, now)
+        tokens = min(capacity, tokens + max(0.0, now - stamp) * per_second)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        backend.set(key, (tokens, now), expiry)
+    return allowed, max(0.0, 1 - tokens) / per_second
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Throttle a request against the token bucket of its scope and client."""
+
+    def allow_request(self, request, view):
+        self.wait_seconds = None
+        if getattr(request, 'throttle_checked', False):
+            return True
+        self.scope = scope_for(request, view)
+        rate = rate_for(self.scope)
+        if rate is None:
+            return True
+        self.wait_seconds = take(self.scope, self.identity(request), rate)
+        return self.wait_seconds is None
+
+    def identity(self, request):
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            return f"user:{user.pk}"
+        return f"ip:{self.get_ident(request)}"
+
+    def wait(self):
+        return self.wait_seconds
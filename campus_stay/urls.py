@@ -7,7 +7,7 @@ from users.api.views import UserViewSet
 from favourites.api.views import FavouritesViewSet
 from users.api.views import CustomTokenObtainPairView
 from drf_spectacular.views import SpectacularAPIView, SpectacularRedocView, SpectacularSwaggerView
-from properties.api.views import PropertiesViewSet
+from properties.api.views import AmenitiesViewSet, PropertiesViewSet
 from rest_framework_simplejwt.views import (
     TokenRefreshView,
     TokenVerifyView,
@@ -16,11 +16,13 @@ from rest_framework_simplejwt.views import (
 from universities.api.views import UniversitiesViewSet
 from universities.api.views import CampusViewSet
 from user_messages.urls import urlpatterns as user_messages_urls
+from campus_stay.metrics import metrics_view
 
 router = DefaultRouter()
 
 router.register(r'users', UserViewSet)
 router.register(r'properties', PropertiesViewSet)
+router.register(r'amenities', AmenitiesViewSet, basename='amenity')
 router.register(r'universities', UniversitiesViewSet)
 router.register(r'campuses', CampusViewSet)
 router.register(r'reviews',PropertyReviewViewSet,basename='propertyreview')
@@ -34,6 +36,7 @@ urlpatterns = [
     path('api/v1/auth/token/verify/', TokenVerifyView.as_view(), name='token_verify'),
     path('api/v1/auth/token/blacklist/', TokenBlacklistView.as_view(), name='token_blacklist'),
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),
     
     ### API documentation
      path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
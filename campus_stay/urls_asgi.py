@@ -0,0 +1,23 @@
+"""
+URL configuration for ASGI deployments.
+
+The hot read endpoints resolve to async views first; every other route (and
+any request those views hand back) is served by ``campus_stay.urls``.
+Selected by ``campus_stay.asgi`` through the ``ROOT_URLCONF`` setting.
+"""
+from django.urls import path
+
+from campus_stay.urls import urlpatterns as sync_urlpatterns
+from properties import async_views as property_views
+from universities import async_views as university_views
+
+urlpatterns = [
+    path('api/v1/properties/', property_views.property_list, name='properties-list'),
+    path(
+        'api/v1/properties/marketing-categories/',
+        property_views.marketing_categories,
+        name='properties-marketing-categories',
+    ),
+    path('api/v1/properties/<int:pk>/', property_views.property_detail, name='properties-detail'),
+    path('api/v1/universities/', university_views.university_list, name='universities-list'),
+] + sync_urlpatterns
@@ -0,0 +1,38 @@
+"""
+Gunicorn configuration.
+
+SERVER_MODE=asgi serves campus_stay.asgi (async read views) with uvicorn
+workers instead of campus_stay.wsgi with sync workers; WEB_CONCURRENCY sets
+the worker count either way, and the settings size each worker's database
+connection pool from it (campus_stay.db).
+
+Workers share Prometheus samples through PROMETHEUS_MULTIPROC_DIR; the
+directory is emptied when the master starts and a dead worker's live gauges
+are discarded when it exits.
+"""
+import os
+import shutil
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('WEB_CONCURRENCY', 3))
+
+if os.environ.get('SERVER_MODE', 'wsgi') == 'asgi':
+    wsgi_app = 'campus_stay.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    wsgi_app = 'campus_stay.wsgi:application'
+
+# Must be set before prometheus_client is imported in the workers
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/campus_stay_metrics')
+
+
+def on_starting(server):
+    metrics_dir = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
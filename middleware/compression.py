@@ -0,0 +1,144 @@
+import gzip
+import hashlib
+import re
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_vary_headers
+
+from campus_stay.instrumentation import record_cache
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+# Dynamic responses are compressed on every request, so favour speed over ratio
+BROTLI_QUALITY = 5
+GZIP_LEVEL = 6
+# Compressed bodies are kept for hot payloads that are served again unchanged
+CACHE_TIMEOUT = 60 * 10
+CACHE_MAX_BYTES = 1024 * 1024
+
+COMPRESSIBLE_TYPES = re.compile(
+    r'^(text/.*|application/(json|.*\+json|javascript|xml|.*\+xml|vnd\.mapbox-vector-tile|csv))$'
+)
+
+
+def accepted_encoding(accept_encoding):
+    """The encoding to answer an ``Accept-Encoding`` header with: ``br``, ``gzip`` or None."""
+    qualities = {}
+    for item in accept_encoding.split(','):
+        coding, _, params = item.strip().partition(';')
+        coding = coding.strip().lower()
+        quality = 1.0
+        match = re.search(r'q=([0-9.]+)', params)
+        if match:
+            try:
+                quality = float(match.group(1))
+            except ValueError:
+                quality = 0.0
+        if coding:
+            qualities[coding] = quality
+    wildcard = qualities.get('*', 0.0)
+    candidates = ['br', 'gzip'] if brotli is not None else ['gzip']
+    best = None
+    for coding in candidates:
+        quality = qualities.get(coding, wildcard)
+        if quality > 0 and (best is None or quality > best[1]):
+            best = (coding, quality)
+    return best[0] if best else None
+
+
+def compress(content, encoding):
+    if encoding == 'br':
+        return brotli.compress(content, quality=BROTLI_QUALITY)
+    return gzip.compress(content, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class CompressionMiddleware:
+    """
+    Compress responses with Brotli or gzip, whichever the client prefers.
+
+    Bodies shorter than ``COMPRESSION_MIN_BYTES``, streaming responses,
+    responses that already have a ``Content-Encoding`` (the gzipped export)
+    and content types that don't compress (images) are passed through.
+
+    Responses that caches may reuse (an ``ETag`` or ``Cache-Control: public``)
+    are the same bytes on every hit, so their compressed bodies are cached on
+    a digest of the body and encoding instead of being compressed again.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.min_bytes = getattr(settings, 'COMPRESSION_MIN_BYTES', 1024)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        encoding = self._negotiate(request, response)
+        if encoding is None:
+            return response
+        if not self._reusable(response):
+            return self._finish(response, encoding, compress(response.content, encoding))
+        key = self._cache_key(response, encoding)
+        compressed = cache.get(key)
+        record_cache('compression', compressed is not None)
+        if compressed is None:
+            compressed = compress(response.content, encoding)
+            cache.set(key, compressed, CACHE_TIMEOUT)
+        return self._finish(response, encoding, compressed)
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        encoding = self._negotiate(request, response)
+        if encoding is None:
+            return response
+        if not self._reusable(response):
+            return self._finish(response, encoding, compress(response.content, encoding))
+        key = self._cache_key(response, encoding)
+        compressed = await cache.aget(key)
+        record_cache('compression', compressed is not None)
+        if compressed is None:
+            compressed = compress(response.content, encoding)
+            await cache.aset(key, compressed, CACHE_TIMEOUT)
+        return self._finish(response, encoding, compressed)
+
+    def _negotiate(self, request, response):
+        """The encoding to compress ``response`` with, or None to send it as it is."""
+        if response.streaming or response.has_header('Content-Encoding'):
+            return None
+        content_type = response.get('Content-Type', '').partition(';')[0].strip().lower()
+        if not COMPRESSIBLE_TYPES.match(content_type):
+            return None
+        # The representation depends on Accept-Encoding even when this one goes out uncompressed
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if len(response.content) < self.min_bytes:
+            return None
+        return accepted_encoding(request.headers.get('Accept-Encoding', ''))
+
+    def _finish(self, response, encoding, compressed):
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response.headers['Content-Length'] = str(len(compressed))
+        response.headers['Content-Encoding'] = encoding
+        # A strong ETag would claim byte equality with the uncompressed body (RFC 9110 8.8.1)
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        return response
+
+    def _cache_key(self, response, encoding):
+        return f"compression:{encoding}:{hashlib.sha1(response.content).hexdigest()}"
+
+    def _reusable(self, response):
+        if len(response.content) > CACHE_MAX_BYTES:
+            return False
+        return response.has_header('ETag') or 'public' in response.get('Cache-Control', '').lower()
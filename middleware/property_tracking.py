@@ -1,4 +1,5 @@
-
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
 from django.utils import timezone
 from django.db import models
 from properties.models import Properties
@@ -6,57 +7,93 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+RECENTLY_VIEWED_KEY = 'recently_viewed_properties'
+RECENTLY_VIEWED_LIMIT = 20
+
+
+def viewed_property_id(request):
+    """The property ID of a property detail GET, or None."""
+    if (request.method == 'GET' and
+        '/api/v1/properties/' in request.path and
+        request.path.endswith('/') and
+        request.path.count('/') == 4):
+        path_parts = request.path.strip('/').split('/')
+        if len(path_parts) >= 3 and path_parts[2].isdigit():
+            return int(path_parts[2])
+    return None
+
+
+def has_session(request):
+    """
+    Whether the request already carries a session.
+
+    Sessionless detail responses are public (shared caches keep them), so a
+    view must not start a session for them: the Set-Cookie would go out with
+    every cached copy.
+    """
+    return settings.SESSION_COOKIE_NAME in request.COOKIES
+
+
+def with_recently_viewed(viewed_properties, property_id):
+    """``viewed_properties`` with ``property_id`` moved to the front, keeping the last 20."""
+    viewed_properties = [pk for pk in viewed_properties if pk != property_id]
+    return [property_id, *viewed_properties][:RECENTLY_VIEWED_LIMIT]
+
+
 class PropertyViewTrackingMiddleware:
-    """Middleware to automatically track property views."""
-    
+    """
+    Middleware to automatically track property views.
+
+    Every view counts; the recently viewed list is only kept for requests
+    that already have a session (see ``has_session``).
+
+    Under ASGI it runs async (counter update with ``aupdate``, session through
+    the async session API) so the middleware chain isn't adapted to sync.
+    """
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
-        response = self.process_request(request)
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        property_id = viewed_property_id(request)
+        if property_id is None:
+            return response
+        try:
+            Properties.objects.filter(id=property_id).update(
+                view_count=models.F('view_count') + 1,
+                last_viewed=timezone.now()
+            )
+            if has_session(request):
+                request.session[RECENTLY_VIEWED_KEY] = with_recently_viewed(
+                    request.session.get(RECENTLY_VIEWED_KEY, []), property_id
+                )
+            logger.info(f"Property {property_id} view tracked automatically")
+        except Exception as e:
+            logger.error(f"Error in property view tracking middleware: {str(e)}")
         return response
 
-    def process_request(self, request):
-        response = self.get_response(request)
-        
-        # Check if this is a property detail view
-        if (request.method == 'GET' and 
-            '/api/v1/properties/' in request.path and 
-            request.path.endswith('/') and
-            request.path.count('/') == 4): 
-            
-            try:
-                # Extract property ID from URL
-                path_parts = request.path.strip('/').split('/')
-                if len(path_parts) >= 3 and path_parts[2].isdigit():
-                    property_id = int(path_parts[2])
-                    
-                    # Update view tracking
-                    Properties.objects.filter(id=property_id).update(
-                        view_count=models.F('view_count') + 1,
-                        last_viewed=timezone.now()
-                    )
-                    
-                    # Track in session for recently viewed
-                    if 'recently_viewed_properties' not in request.session:
-                        request.session['recently_viewed_properties'] = []
-                    
-                    viewed_properties = request.session['recently_viewed_properties']
-                    
-                    # Remove if already exists
-                    if property_id in viewed_properties:
-                        viewed_properties.remove(property_id)
-                    
-                    # Add to beginning
-                    viewed_properties.insert(0, property_id)
-                    
-                    # Keep only last 20
-                    request.session['recently_viewed_properties'] = viewed_properties[:20]
-                    request.session.modified = True
-                    
-                    logger.info(f"Property {property_id} view tracked automatically")
-                    
-            except (ValueError, IndexError, Exception) as e:
-                logger.error(f"Error in property view tracking middleware: {str(e)}")
-        
-        return response
\ No newline at end of file
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        property_id = viewed_property_id(request)
+        if property_id is None:
+            return response
+        try:
+            await Properties.objects.filter(id=property_id).aupdate(
+                view_count=models.F('view_count') + 1,
+                last_viewed=timezone.now()
+            )
+            if has_session(request):
+                await request.session.aset(RECENTLY_VIEWED_KEY, with_recently_viewed(
+                    await request.session.aget(RECENTLY_VIEWED_KEY, []), property_id
+                ))
+            logger.info(f"Property {property_id} view tracked automatically")
+        except Exception as e:
+            logger.error(f"Error in property view tracking middleware: {str(e)}")
+        return response
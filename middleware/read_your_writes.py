@@ -0,0 +1,38 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+
+from campus_stay import db_routers
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class ReadYourWritesMiddleware:
+    """
+    Keep a user on the primary database for ``REPLICA_STICKY_SECONDS`` after a successful write.
+
+    Runs after the view, so JWT users authenticated by DRF are seen too (DRF
+    copies the user it authenticates onto the Django request).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        if self._is_write(request, response):
+            db_routers.mark_write(request.user)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if self._is_write(request, response):
+            await sync_to_async(db_routers.mark_write)(request.user)
+        return response
+
+    def _is_write(self, request, response):
+        return request.method not in SAFE_METHODS and response.status_code < 400 and hasattr(request, 'user')
@@ -0,0 +1,140 @@
+import cProfile
+import hmac
+import io
+import json
+import logging
+import pstats
+import random
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
+
+from campus_stay import instrumentation, metrics as prometheus
+
+logger = logging.getLogger(__name__)
+
+
+class RequestTimingMiddleware:
+    """
+    Record DB queries, DB time, serializer time, cache hits and total time per request.
+
+    Queries slower than ``SLOW_QUERY_MS`` go to the slow query log
+    (``campus_stay.slow_queries``).
+
+    The numbers are returned in a ``Server-Timing`` header and logged as a JSON
+    line for a sample of requests (and always for slow ones). A request with
+    ``?_profile=1`` and an ``X-Profile-Token`` header matching
+    ``REQUEST_PROFILING_TOKEN`` gets a cProfile breakdown instead of the normal
+    response; the token is checked before the profiler starts, so nobody else
+    can make a request run under it.
+
+    Under ASGI the middleware runs async so async views are not forced onto a
+    thread. Query wrappers are then installed on the connections of the
+    request's sync thread, where the async ORM runs its queries; profiling is
+    only available on the sync path.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'REQUEST_LOG_SAMPLE_RATE', 0.0)
+        self.slow_request_ms = getattr(settings, 'SLOW_REQUEST_MS', 1000)
+        self.profiling_token = getattr(settings, 'REQUEST_PROFILING_TOKEN', None)
+        self.profiling_enabled = getattr(settings, 'REQUEST_PROFILING_ENABLED', False) and bool(self.profiling_token)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        metrics, token = instrumentation.start(request)
+        profiler = None
+        if self._profiling_requested(request):
+            profiler = cProfile.Profile()
+        try:
+            with self._wrap_connections(metrics):
+                if profiler:
+                    profiler.enable()
+                try:
+                    response = self.get_response(request)
+                finally:
+                    if profiler:
+                        profiler.disable()
+        finally:
+            instrumentation.stop(token)
+
+        if profiler:
+            return self._profile_response(request, metrics, profiler)
+        response = self._finish(request, response, metrics)
+        if self._should_log(metrics):
+            self._log(request, response, metrics)
+        return response
+
+    async def __acall__(self, request):
+        metrics, token = instrumentation.start(request)
+        try:
+            stack = await sync_to_async(self._wrap_connections)(metrics)
+            try:
+                response = await self.get_response(request)
+            finally:
+                await sync_to_async(stack.close)()
+        finally:
+            instrumentation.stop(token)
+        response = self._finish(request, response, metrics)
+        if self._should_log(metrics):
+            # Resolving request.user may load the session, so log from a thread
+            await sync_to_async(self._log)(request, response, metrics)
+        return response
+
+    def _profiling_requested(self, request):
+        if not self.profiling_enabled or request.GET.get('_profile') != '1':
+            return False
+        return hmac.compare_digest(request.headers.get('X-Profile-Token', ''), self.profiling_token)
+
+    def _wrap_connections(self, metrics):
+        """Wrap every connection of the calling thread; closing the returned stack unwraps them."""
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(metrics.execute_wrapper))
+        return stack
+
+    def _finish(self, request, response, metrics):
+        response['Server-Timing'] = metrics.server_timing()
+        prometheus.observe_request(request, response, metrics)
+        return response
+
+    def _should_log(self, metrics):
+        """Slow requests are always logged, others at REQUEST_LOG_SAMPLE_RATE."""
+        return metrics.total_seconds * 1000 >= self.slow_request_ms or random.random() < self.sample_rate
+
+    def _log(self, request, response, metrics):
+        values = metrics.as_dict()
+        slow = values['total_ms'] >= self.slow_request_ms
+        match = getattr(request, 'resolver_match', None)
+        user = getattr(request, 'user', None)
+        entry = {
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'user': user.pk if user is not None and user.is_authenticated else None,
+            'slow': slow,
+            **values,
+        }
+        logger.log(logging.WARNING if slow else logging.INFO, json.dumps(entry))
+
+    def _profile_response(self, request, metrics, profiler):
+        output = io.StringIO()
+        output.write(f"{request.method} {request.get_full_path()}\n")
+        output.write(json.dumps(metrics.as_dict()) + "\n\n")
+        stats = pstats.Stats(profiler, stream=output)
+        stats.strip_dirs().sort_stats('cumulative').print_stats(60)
+        logger.info(f"Profiled {request.method} {request.path}")
+        response = HttpResponse(output.getvalue(), content_type='text/plain; charset=utf-8')
+        response['Server-Timing'] = metrics.server_timing()
+        return response
@@ -0,0 +1,67 @@
+"""
+In-process amenity registry.
+
+The amenity table is a handful of rows that change only through the admin
+or ``seed_amenities``, so every worker keeps the whole catalogue in memory.
+Property payloads carry amenity ids only and clients resolve them against
+``/api/v1/amenities/``.
+
+Saving or deleting an amenity bumps the shared ``NAMESPACE`` version
+(``properties.signals``). The worker that made the change reloads at once;
+other workers notice the new version within ``CHECK_INTERVAL`` seconds.
+"""
+import threading
+import time
+
+from campus_stay.cache import bump_version, version
+from properties.models import Amenity
+
+NAMESPACE = 'properties:amenities'
+# How often a worker looks at the shared version; bounds how stale another worker's copy can be
+CHECK_INTERVAL = 5
+
+FIELDS = ('id', 'name', 'description', 'icon')
+
+_lock = threading.Lock()
+_state = {'version': None, 'checked_at': 0.0, 'amenities': {}}
+
+
+def _current():
+    """The amenity catalogue as an ordered ``{id: dict}``, reloaded when its version moved on."""
+    now = time.monotonic()
+    if _state['version'] is not None and now - _state['checked_at'] < CHECK_INTERVAL:
+        return _state['amenities']
+    with _lock:
+        current_version = version(NAMESPACE)
+        if current_version != _state['version']:
+            rows = Amenity.objects.order_by('name', 'id').values(*FIELDS)
+            _state['amenities'] = {row['id']: row for row in rows}
+            _state['version'] = current_version
+        _state['checked_at'] = now
+    return _state['amenities']
+
+
+def all_amenities():
+    return list(_current().values())
+
+
+def get(amenity_id):
+    return _current().get(amenity_id)
+
+
+def unknown_ids(amenity_ids):
+    """The ids in ``amenity_ids`` that are not amenities, sorted."""
+    return sorted(set(amenity_ids) - _current().keys())
+
+
+def catalogue_version():
+    """Version of the catalogue this worker serves, for ETags."""
+    _current()
+    return _state['version']
+
+
+def invalidate():
+    """Retire the catalogue in every worker; this one reloads on its next lookup."""
+    bump_version(NAMESPACE)
+    with _lock:
+        _state['version'] = None
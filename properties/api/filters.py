@@ -1,17 +1,27 @@
 import django_filters
+from django import forms
+from django.contrib.gis.gdal import GDALException
+from django.contrib.gis.geos import GEOSException, GEOSGeometry, Polygon
 from django.db import models
+from django.db.models import Count
 from django_filters import rest_framework as filters
-from properties.models import Properties, Amenity
+from rest_framework.exceptions import ValidationError
+from properties import amenities as amenity_registry
+from properties.models import Properties, PropertyAmenity
+
+
+class IntegerInFilter(filters.BaseInFilter, filters.NumberFilter):
+    # NumberFilter parses decimals, which int() would silently truncate
+    field_class = forms.IntegerField
+
 
 class PropertyFilter(filters.FilterSet):
     min_price = filters.NumberFilter(field_name="price", lookup_expr='gte')
     max_price = filters.NumberFilter(field_name="price", lookup_expr='lte')
     property_type = filters.BaseInFilter(field_name='property_type', lookup_expr='in')
-    amenities = filters.ModelMultipleChoiceFilter(
-        field_name='amenities__amenity__id',
-        to_field_name='id',
-        queryset=Amenity.objects.all(),
-        conjoined=True  # All specified amenities must match (AND condition)
+    amenities = IntegerInFilter(
+        method='filter_amenities',
+        help_text="Comma-separated amenity ids; all of them must be present."
     )
     
     electricity_type = filters.MultipleChoiceFilter(
@@ -20,6 +30,18 @@ class PropertyFilter(filters.FilterSet):
         lookup_expr='iexact',
         help_text="Filter by electricity type. Can specify multiple values."
     )
+
+    # Map viewport filters; both match with the bounding-box operator (&&) on the spatial index
+    in_bbox = filters.CharFilter(
+        method='filter_in_bbox',
+        help_text="Only properties inside minlon,minlat,maxlon,maxlat (WGS84)."
+    )
+    within = filters.CharFilter(
+        method='filter_within',
+        help_text="Only properties inside a GeoJSON Polygon or MultiPolygon (WGS84)."
+    )
+
+    VIEWPORT_PARAMS = ('in_bbox', 'within')
     
     class Meta:
         model = Properties
@@ -49,6 +71,50 @@ class PropertyFilter(filters.FilterSet):
                 price_lookup['price__lte'] = params['max_price']
             queryset = queryset.filter(**price_lookup)
         
-        # Handle amenities (already handled by ModelMultipleChoiceFilter)
-        
         return queryset
+
+    def filter_amenities(self, queryset, name, value):
+        # The repeated form (amenities=1&amenities=2) is still accepted alongside amenities=1,2
+        amenity_ids = set(value)
+        for raw in self.data.getlist(name)[:-1] if hasattr(self.data, 'getlist') else []:
+            try:
+                amenity_ids.update(int(part) for part in raw.split(',') if part)
+            except ValueError:
+                raise ValidationError({name: "Expected comma-separated amenity ids"})
+        if not amenity_ids:
+            return queryset
+        unknown = amenity_registry.unknown_ids(amenity_ids)
+        if unknown:
+            raise ValidationError({name: f"Unknown amenity ids: {unknown}"})
+        # One grouped subquery instead of a join per amenity
+        with_all = (
+            PropertyAmenity.objects.filter(amenity_id__in=amenity_ids)
+            .values('property_id')
+            .annotate(matched=Count('amenity_id'))
+            .filter(matched=len(amenity_ids))
+            .values('property_id')
+        )
+        return queryset.filter(id__in=with_all)
+
+    def filter_in_bbox(self, queryset, name, value):
+        try:
+            min_lon, min_lat, max_lon, max_lat = (float(part) for part in value.split(','))
+        except ValueError:
+            raise ValidationError({name: "Expected minlon,minlat,maxlon,maxlat"})
+        if not (-180 <= min_lon < max_lon <= 180 and -90 <= min_lat < max_lat <= 90):
+            raise ValidationError({name: "Coordinates out of range or min not below max"})
+        bbox = Polygon.from_bbox((min_lon, min_lat, max_lon, max_lat))
+        bbox.srid = 4326
+        # For points, overlapping the box is being inside it
+        return queryset.filter(location__bboverlaps=bbox)
+
+    def filter_within(self, queryset, name, value):
+        try:
+            area = GEOSGeometry(value)
+        except (GEOSException, GDALException, ValueError, TypeError):
+            raise ValidationError({name: "Expected a GeoJSON Polygon or MultiPolygon"})
+        if area.geom_type not in ('Polygon', 'MultiPolygon') or not area.valid:
+            raise ValidationError({name: "Expected a valid GeoJSON Polygon or MultiPolygon"})
+        area.srid = 4326
+        # The bounding-box match narrows candidates on the index before the exact test
+        return queryset.filter(location__bboverlaps=area, location__within=area)
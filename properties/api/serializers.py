@@ -2,14 +2,67 @@ import logging
 from rest_framework import serializers
 from django.contrib.gis.db.models.functions import Distance
 from django.contrib.gis.geos import Point
-from django.db.models import Avg
+from rest_framework_gis.fields import GeometryField
 from rest_framework_gis.serializers import GeoFeatureModelSerializer
+from django.db.models import Prefetch
 from properties.models import Properties, PropertyAmenity, PropertyMedia, PropertyNearByPlaces, NearByPlaces, Amenity
 from reviews.models import PropertyReview  # Import the PropertyReview model
 from django.db import transaction
 from drf_spectacular.utils import extend_schema_field
 from typing import List, Optional
 
+from campus_stay.instrumentation import TimedSerializerMixin
+from properties import amenities as amenity_registry
+from properties.fragments import FragmentCachedSerializerMixin, FragmentListSerializer
+
+
+_MISSING = object()
+
+# Relations read by the property serializers, loaded once per page instead of per property
+PROPERTY_PREFETCHES = [
+    "media",
+    # Amenity ids only; the amenity rows come from the in-process registry
+    "amenities",
+    Prefetch("reviews", queryset=PropertyReview.objects.select_related("reviewer")),
+    Prefetch(
+        "nearby_places",
+        queryset=PropertyNearByPlaces.objects.select_related("place").order_by("distance"),
+    ),
+]
+
+
+def _media_of(obj, media_type):
+    """Media of one type in display order, read from the (prefetched) ``media`` relation."""
+    media = [item for item in obj.media.all() if item.media_type == media_type]
+    return sorted(media, key=lambda item: (item.display_order, item.created_at))
+
+
+def _primary_image(obj):
+    """The image flagged primary, or the first image in display order."""
+    images = _media_of(obj, 'image')
+    return next((image for image in images if image.is_primary), images[0] if images else None)
+
+
+def _ratings_of(obj):
+    """Ratings from the (prefetched) ``reviews`` relation."""
+    return [review.rating for review in obj.reviews.all()]
+
+
+class PointCoordinatesField(GeometryField):
+    """
+    Point field that emits GeoJSON straight from ``<field>_lng``/``<field>_lat``
+    annotations (``properties.spatial.with_coordinates``) when they are present,
+    and from the geometry otherwise. Input is parsed like any GeometryField.
+    """
+
+    def get_attribute(self, instance):
+        lng = getattr(instance, f"{self.source}_lng", _MISSING)
+        if lng is _MISSING:
+            return super().get_attribute(instance)
+        if lng is None:
+            return None
+        return {"type": "Point", "coordinates": [lng, getattr(instance, f"{self.source}_lat")]}
+
 
 class PropertyMediaSerializer(serializers.ModelSerializer):
     url = serializers.SerializerMethodField()
@@ -60,14 +113,10 @@ class PropertyMediaSerializer(serializers.ModelSerializer):
         return None
 
 
-class PropertyAmenitySerializer(serializers.ModelSerializer):
-    amenity_name = serializers.CharField(source='amenity.name', read_only=True)
-    amenity_description = serializers.CharField(source='amenity.description', read_only=True)
-    amenity_icon = serializers.CharField(source='amenity.icon', read_only=True)
-    
+class AmenitySerializer(serializers.ModelSerializer):
     class Meta:
-        model = PropertyAmenity
-        fields = ['id', 'amenity', 'amenity_name', 'amenity_description', 'amenity_icon']
+        model = Amenity
+        fields = list(amenity_registry.FIELDS)
 
 
 class NearByPlacesSerializer(GeoFeatureModelSerializer):
@@ -97,14 +146,21 @@ class PropertyReviewSerializer(serializers.ModelSerializer):
         fields = ['id', 'rating', 'comment', 'reviewer_name', 'reviewer_username', 'created_at']
 
 
-class PropertiesSerializer(GeoFeatureModelSerializer):
+class PropertiesSerializer(FragmentCachedSerializerMixin, TimedSerializerMixin, GeoFeatureModelSerializer):
+    # Per-user fields and view counters (updated without touching updated_at) bypass the fragment cache
+    live_fields = ('distance_to_university', 'is_recently_viewed', 'view_count', 'last_viewed')
+    fragment_prefetches = PROPERTY_PREFETCHES
+
+    location = PointCoordinatesField(required=False, allow_null=True)  # Optional for easier testing
+
     # Display fields
     property_type_display = serializers.CharField(source='get_property_type_display', read_only=True)
     windows_type_display = serializers.CharField(source='get_windows_type_display', read_only=True)
     electricity_type_display = serializers.CharField(source='get_electricity_type_display', read_only=True)
     
     # Related data
-    amenities = PropertyAmenitySerializer(many=True, read_only=True)
+    # Amenity ids only; names and icons come from /api/v1/amenities/
+    amenities = serializers.SerializerMethodField()
     nearby_places = PropertyNearByPlacesSerializer(many=True, read_only=True)
     media = PropertyMediaSerializer(many=True, read_only=True)
     
@@ -117,6 +173,7 @@ class PropertiesSerializer(GeoFeatureModelSerializer):
     average_rating = serializers.SerializerMethodField()
     review_count = serializers.SerializerMethodField()
     is_recently_viewed = serializers.SerializerMethodField()
+    nearest_campus_name = serializers.CharField(source='nearest_campus.name', read_only=True, default=None)
     
     # Separate image and video URLs for easier frontend handling
     images = serializers.SerializerMethodField()
@@ -136,6 +193,7 @@ class PropertiesSerializer(GeoFeatureModelSerializer):
     class Meta:
         model = Properties
         geo_field = 'location'
+        list_serializer_class = FragmentListSerializer
         fields = [
             'id', 'name', 'title', 'description', 'location',
             'property_type', 'property_type_display', 'price', 'bedrooms',
@@ -146,6 +204,7 @@ class PropertiesSerializer(GeoFeatureModelSerializer):
             'water_supply', 'size', 'safety_score',
             'transportation_score', 'amenities_score',
             'overall_score', 'distance_to_university',
+            'nearest_campus', 'nearest_campus_name', 'nearest_campus_distance',
             'amenities', 'nearby_places', 'media',
             'images', 'image_thumbnails', 'videos', 'primary_image', 'primary_image_thumbnail',
             'amenity_ids', 'created_at', 'updated_at',
@@ -155,18 +214,24 @@ class PropertiesSerializer(GeoFeatureModelSerializer):
         ]
         extra_kwargs = {
             'location': {'required': False},  # Make location optional for easier testing
+            'nearest_campus': {'read_only': True},  # Maintained by properties.spatial
+            'nearest_campus_distance': {'read_only': True},
         }
 
+    @extend_schema_field(serializers.ListField(child=serializers.IntegerField()))
+    def get_amenities(self, obj) -> List[int]:
+        return sorted(link.amenity_id for link in obj.amenities.all())
+
     @extend_schema_field(serializers.ListField(child=PropertyReviewSerializer()))
     def get_recent_reviews(self, obj) -> List[dict]:
         """Get the 3 most recent reviews for the property"""
-        recent_reviews = obj.reviews.select_related('reviewer').order_by('-created_at')[:3]
+        recent_reviews = sorted(obj.reviews.all(), key=lambda review: review.created_at, reverse=True)[:3]
         return PropertyReviewSerializer(recent_reviews, many=True).data
 
     @extend_schema_field(serializers.ListField(child=serializers.URLField()))
     def get_images(self, obj) -> List[str]:
         """Get all image URLs"""
-        images = obj.media.filter(media_type='image').order_by('display_order', 'created_at')
+        images = _media_of(obj, 'image')
         request = self.context.get('request')
         if request:
             return [img.file.url for img in images if img.file]  # Cloudinary URLs are already absolute
@@ -176,16 +241,13 @@ class PropertiesSerializer(GeoFeatureModelSerializer):
     @extend_schema_field(serializers.ListField(child=serializers.URLField()))
     def get_videos(self, obj) -> List[str]:
          """Get all video URLs"""
-         videos = obj.media.filter(media_type='video').order_by('display_order', 'created_at')
+         videos = _media_of(obj, 'video')
          # No need for request.build_absolute_uri for Cloudinary
          return [vid.file.url for vid in videos if vid.file]
     @extend_schema_field(serializers.URLField(allow_null=True))
     def get_primary_image(self, obj) -> Optional[str]:
         """Get primary image URL"""
-        primary_image = obj.media.filter(media_type='image', is_primary=True).first()
-        if not primary_image:
-            # Fallback to first image if no primary set
-            primary_image = obj.media.filter(media_type='image').order_by('display_order', 'created_at').first()
+        primary_image = _primary_image(obj)
         
         if primary_image and primary_image.file:
             # Cloudinary URLs are already absolute
@@ -195,10 +257,7 @@ class PropertiesSerializer(GeoFeatureModelSerializer):
     @extend_schema_field(serializers.URLField(allow_null=True))
     def get_primary_image_thumbnail(self, obj) -> Optional[str]:
         """Get primary image thumbnail URL"""
-        primary_image = obj.media.filter(media_type='image', is_primary=True).first()
-        if not primary_image:
-            # Fallback to first image if no primary set
-            primary_image = obj.media.filter(media_type='image').order_by('display_order', 'created_at').first()
+        primary_image = _primary_image(obj)
         
         if primary_image and primary_image.file and hasattr(primary_image.file, 'url'):
             # Generate thumbnail URL with Cloudinary transformations
@@ -211,7 +270,7 @@ class PropertiesSerializer(GeoFeatureModelSerializer):
     @extend_schema_field(serializers.ListField(child=serializers.URLField()))
     def get_image_thumbnails(self, obj) -> List[str]:
         """Get all image thumbnail URLs"""
-        images = obj.media.filter(media_type='image').order_by('display_order', 'created_at')
+        images = _media_of(obj, 'image')
         thumbnails = []
         
         for img in images:
@@ -254,7 +313,8 @@ class PropertiesSerializer(GeoFeatureModelSerializer):
     def get_average_rating(self, obj) -> Optional[float]:
         """Get average rating from PropertyReviews."""
         try:
-            avg_rating = obj.reviews.aggregate(rating_avg=Avg('rating'))['rating_avg']
+            ratings = _ratings_of(obj)
+            avg_rating = sum(ratings) / len(ratings) if ratings else None
             return round(avg_rating, 1) if avg_rating else None
         except Exception as e:
             logger = logging.getLogger(__name__)
@@ -265,7 +325,7 @@ class PropertiesSerializer(GeoFeatureModelSerializer):
     def get_review_count(self, obj) -> int:
         """Get total number of PropertyReviews."""
         try:
-            return obj.reviews.count()
+            return len(_ratings_of(obj))
         except Exception as e:
             logger = logging.getLogger(__name__)
             logger.error(f"Error getting review count: {str(e)}")
@@ -337,11 +397,10 @@ class PropertiesSerializer(GeoFeatureModelSerializer):
         if value:
             # Remove duplicates from input
             unique_ids = list(set(value))
-            existing_ids = set(Amenity.objects.filter(id__in=unique_ids).values_list('id', flat=True))
-            invalid_ids = set(unique_ids) - existing_ids
+            invalid_ids = amenity_registry.unknown_ids(unique_ids)
             if invalid_ids:
                 raise serializers.ValidationError(
-                    f"Invalid amenity IDs: {list(invalid_ids)}"
+                    f"Invalid amenity IDs: {invalid_ids}"
                 )
             return unique_ids  # Return the deduplicated list
         return value
@@ -374,32 +433,38 @@ class PropertiesSerializer(GeoFeatureModelSerializer):
 
 
 # Lightweight serializer for property lists (without full review data)
-class PropertiesListSerializer(GeoFeatureModelSerializer):
+class PropertiesListSerializer(FragmentCachedSerializerMixin, TimedSerializerMixin, GeoFeatureModelSerializer):
     """Lighter version of PropertiesSerializer for list views"""
+    live_fields = ('distance_to_university',)
+    fragment_prefetches = ('media', 'reviews')
+
+    location = PointCoordinatesField(required=False, allow_null=True)
     property_type_display = serializers.CharField(source='get_property_type_display', read_only=True)
     primary_image = serializers.SerializerMethodField()
     primary_image_thumbnail = serializers.SerializerMethodField()
     average_rating = serializers.SerializerMethodField()
     review_count = serializers.SerializerMethodField()
     distance_to_university = serializers.SerializerMethodField()
+    nearest_campus_name = serializers.CharField(source='nearest_campus.name', read_only=True, default=None)
 
     class Meta:
         model = Properties
         geo_field = 'location'
+        list_serializer_class = FragmentListSerializer
         fields = [
             'id', 'name', 'title', 'price', 'bedrooms', 'toilets',
             'address', 'property_type', 'property_type_display',
             'is_furnished', 'is_available', 'primary_image', 'primary_image_thumbnail',
             'average_rating', 'review_count', 'distance_to_university',
+            'nearest_campus', 'nearest_campus_name', 'nearest_campus_distance',
             'overall_score', 'created_at'
         ]
+        read_only_fields = ['nearest_campus', 'nearest_campus_distance']
 
     @extend_schema_field(serializers.URLField(allow_null=True))
     def get_primary_image(self, obj) -> Optional[str]:
         """Get primary image URL"""
-        primary_image = obj.media.filter(media_type='image', is_primary=True).first()
-        if not primary_image:
-            primary_image = obj.media.filter(media_type='image').order_by('display_order', 'created_at').first()
+        primary_image = _primary_image(obj)
         
         if primary_image and primary_image.file:
             return primary_image.file.url
@@ -408,9 +473,7 @@ class PropertiesListSerializer(GeoFeatureModelSerializer):
     @extend_schema_field(serializers.URLField(allow_null=True))
     def get_primary_image_thumbnail(self, obj) -> Optional[str]:
         """Get primary image thumbnail URL"""
-        primary_image = obj.media.filter(media_type='image', is_primary=True).first()
-        if not primary_image:
-            primary_image = obj.media.filter(media_type='image').order_by('display_order', 'created_at').first()
+        primary_image = _primary_image(obj)
         
         if primary_image and primary_image.file and hasattr(primary_image.file, 'url'):
             base_url = primary_image.file.url
@@ -423,7 +486,8 @@ class PropertiesListSerializer(GeoFeatureModelSerializer):
     def get_average_rating(self, obj) -> Optional[float]:
         """Get average rating from PropertyReviews."""
         try:
-            avg_rating = obj.reviews.aggregate(rating_avg=Avg('rating'))['rating_avg']
+            ratings = _ratings_of(obj)
+            avg_rating = sum(ratings) / len(ratings) if ratings else None
             return round(avg_rating, 1) if avg_rating else None
         except Exception:
             return None
@@ -432,7 +496,7 @@ class PropertiesListSerializer(GeoFeatureModelSerializer):
     def get_review_count(self, obj) -> int:
         """Get total number of PropertyReviews."""
         try:
-            return obj.reviews.count()
+            return len(_ratings_of(obj))
         except Exception:
             return 0
 
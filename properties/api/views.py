@@ -1,24 +1,120 @@
+from django.conf import settings
 from django.contrib.gis.db.models.functions import Distance
 from django.contrib.gis.measure import D
-from django.db import transaction
+from django.db import router, transaction
+from django.db.models import Avg, Count, OuterRef, Subquery
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe
 from django_filters.rest_framework import DjangoFilterBackend
 from .filters import PropertyFilter
 from drf_spectacular.openapi import OpenApiTypes
 from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter
 from rest_framework import filters, permissions, status, viewsets
 from rest_framework.decorators import action
-from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
+from rest_framework.parsers import FormParser, MultiPartParser
 from rest_framework.response import Response
 
+from campus_stay import metrics
+from campus_stay.cache import digest, etag_matches, get_or_build, make_key, version
+from campus_stay.db_routers import ReplicaReadMixin
+from campus_stay.renderers import ORJSONParser
+from properties import amenities as amenity_registry, bulk_io, recommendations, spatial, tiles
 from properties.models import Properties, PropertyAmenity, PropertyMedia
+from reviews.models import PropertyReview
 from universities.models import University
-from .serializers import PropertiesSerializer
+from .serializers import AmenitySerializer, PropertiesListSerializer, PropertiesSerializer
 
 import json
 import logging
 
 logger = logging.getLogger(__name__)
 
+# The marketing page only changes as properties do; a short TTL keeps it fresh enough
+MARKETING_NAMESPACE = "properties:marketing"
+MARKETING_CACHE_SECONDS = 60
+
+# Browsers and proxies may reuse the amenity catalogue this long without revalidating
+AMENITIES_MAX_AGE = 60 * 10
+
+# A CDN may serve an anonymous property detail this long without revalidating
+DETAIL_MAX_AGE = 60
+
+
+def marketing_cache_key(current_version, limit, distance_km):
+    """Key of the marketing page shown to everyone but students (near the most popular university)."""
+    return make_key(MARKETING_NAMESPACE, current_version, limit, distance_km)
+
+
+def mark_recently_viewed(categories, viewed_ids):
+    """Set ``is_recently_viewed`` on cached marketing categories for the current visitor."""
+    viewed_ids = set(viewed_ids)
+    for collection in categories.values():
+        for feature in collection["features"]:
+            feature["properties"]["is_recently_viewed"] = feature["id"] in viewed_ids
+    return categories
+
+
+def detail_freshness(pk):
+    """
+    One-row query for the validators of an available property's detail.
+
+    Yields ``(updated_at, latest review, latest media change, review count,
+    media count)``; the counts catch deletions that leave the latest
+    timestamps unchanged. View counters are not covered, so ``view_count``
+    and ``last_viewed`` in a reused response lag until the next change.
+    """
+    reviews = PropertyReview.objects.filter(property=OuterRef("pk")).order_by()
+    media = PropertyMedia.objects.filter(property=OuterRef("pk")).order_by()
+    return Properties.objects.filter(pk=pk, is_available=True).annotate(
+        last_review=Subquery(reviews.order_by("-created_at").values("created_at")[:1]),
+        last_media=Subquery(media.order_by("-updated_at").values("updated_at")[:1]),
+        review_total=Subquery(reviews.values("property").annotate(total=Count("pk")).values("total")),
+        media_total=Subquery(media.values("property").annotate(total=Count("pk")).values("total")),
+    ).values_list("updated_at", "last_review", "last_media", "review_total", "media_total")
+
+
+def detail_validators(freshness, variant):
+    """The ETag and Last-Modified of a property detail; ``variant`` covers who is asking and the format."""
+    updated_at, last_review, last_media, review_total, media_total = freshness
+    last_modified = max(stamp for stamp in (updated_at, last_review, last_media) if stamp is not None)
+    etag = f'"{digest(f"{last_modified.isoformat()}:{review_total}:{media_total}:{variant}")}"'
+    return etag, last_modified
+
+
+def distance_origin(user):
+    """The university a student's ``distance_to_university`` is measured from, which the detail ETag covers."""
+    if getattr(user, "roles", None) != "student":
+        return None
+    # A missing profile raises RelatedObjectDoesNotExist, an AttributeError
+    profile = getattr(user, "student_profile", None)
+    return profile.university_id if profile is not None else None
+
+
+def detail_not_modified(request, etag, last_modified):
+    """Whether the client's copy is current; If-None-Match takes precedence over If-Modified-Since."""
+    if request.headers.get("If-None-Match"):
+        return etag_matches(request, etag)
+    if_modified_since = parse_http_date_safe(request.headers.get("If-Modified-Since", ""))
+    return if_modified_since is not None and int(last_modified.timestamp()) <= if_modified_since
+
+
+def finish_detail(response, etag, last_modified, public):
+    """
+    Add the validators, and let shared caches keep ``public`` (anonymous, sessionless) responses.
+
+    View tracking doesn't start a session for sessionless requests, so a
+    public response never sets a cookie.
+    """
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified.timestamp())
+    if public:
+        patch_cache_control(response, public=True, max_age=DETAIL_MAX_AGE)
+    else:
+        patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ["Accept", "Authorization", "Cookie"])
+    return response
+
 
 class ConditionalAuthenticationPermission(permissions.BasePermission):
     """
@@ -91,6 +187,24 @@ class ConditionalAuthenticationPermission(permissions.BasePermission):
                 location=OpenApiParameter.QUERY,
                 description="Comma-separated list of electricity types to include (e.g., Submetered,Shared,Individual)",
             ),
+            OpenApiParameter(
+                name="in_bbox",
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description="Map viewport: only properties inside minlon,minlat,maxlon,maxlat. Disables pagination.",
+            ),
+            OpenApiParameter(
+                name="within",
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description="Map viewport: only properties inside a GeoJSON Polygon or MultiPolygon. Disables pagination.",
+            ),
+            OpenApiParameter(
+                name="compact",
+                type=OpenApiTypes.BOOL,
+                location=OpenApiParameter.QUERY,
+                description="With a viewport filter, return [id, price, lng, lat] rows instead of features.",
+            ),
         ],
     ),
     create=extend_schema(description="Create a new property with media and amenities. Authentication required."),
@@ -99,129 +213,303 @@ class ConditionalAuthenticationPermission(permissions.BasePermission):
     partial_update=extend_schema(description="Partially update property information. Authentication required."),
     destroy=extend_schema(description="Delete a property. Authentication required."),
 )
-class PropertiesViewSet(viewsets.ModelViewSet):
+class PropertiesViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """ViewSet for managing property CRUD operations with media and proximity filtering."""
     
     queryset = Properties.objects.prefetch_related(
         'reviews__reviewer',  # Changed from 'reviews__user' to 'reviews__reviewer'
         'media',
-        'amenities__amenity'
+        'amenities'
     )
     serializer_class = PropertiesSerializer
     permission_classes = [ConditionalAuthenticationPermission]  # Updated permission class
-    parser_classes = [MultiPartParser, FormParser, JSONParser]
+    parser_classes = [MultiPartParser, FormParser, ORJSONParser]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_class = PropertyFilter
     search_fields = ["title", "description", "address"]
     ordering_fields = ["price", "created_at", "overall_score"]
     ordering = ["-created_at"]
+    # Map tiles stay on the primary: a tile re-rendered from a lagging replica would stay cached
+    replica_actions = (
+        "list", "retrieve", "marketing_categories", "export", "similar", "recommended", "near_university",
+    )
+    # Public listings and search are what scrapers hammer (campus_stay.throttling)
+    throttle_scopes = {"list": "search", "marketing_categories": "search"}
 
     # Custom Actions
+    def marketing_querysets(self, limit, distance_km, university=None):
+        """Lazy querysets of the marketing page categories, in display order."""
+        # Base queryset for available properties; the serializers prefetch relations for fragment cache misses
+        base_queryset = spatial.with_coordinates(
+            Properties.objects.filter(is_available=True).select_related("nearest_campus")
+        )
+        near_university = base_queryset.none()
+        if university is not None:
+            near_university = base_queryset.annotate(
+                distance=Distance("location", university.location)
+            ).filter(distance__lte=D(km=distance_km)).order_by("distance")[:limit]
+        return {
+            # Cheap properties (60,000 to 90,000)
+            "cheap": base_queryset.filter(price__gte=60000, price__lte=90000).order_by("price")[:limit],
+            "near_university": near_university,
+            # Top-rated properties (using reviews)
+            "top_rated": (
+                base_queryset.annotate(avg_rating=Avg("reviews__rating"), review_count=Count("reviews"))
+                .filter(review_count__gt=0)
+                .order_by("-avg_rating", "-review_count")[:limit]
+            ),
+            # Special needs properties (wheelchair accessible)
+            "special_needs": base_queryset.filter(is_special_needs=True).order_by("-created_at")[:limit],
+            # Popular properties (based on view count)
+            "popular": base_queryset.order_by("-view_count")[:limit],
+        }
+
     @action(detail=False, methods=["get"], url_path="marketing-categories")
     def marketing_categories(self, request):
         """Retrieve properties categorized for marketing page display. No authentication required."""
         try:
             limit = int(request.query_params.get("limit", 6))
             distance_km = float(request.query_params.get("distance", 5))
-            
-            categories = {
-                "cheap": [],
-                "near_university": [],
-                "top_rated": [],
-                "special_needs": [],
-                "popular": [],
-            }
-            
-            # Base queryset for available properties
-            base_queryset = Properties.objects.filter(is_available=True)
-            
-            # Cheap properties (60,000 to 90,000)
-            cheap_properties = base_queryset.filter(
-                price__gte=60000, price__lte=90000
-            ).order_by("price")[:limit]
-            categories["cheap"] = self.get_serializer(
-                cheap_properties, many=True, context={"request": request}
-            ).data
-            
-            # Top-rated properties (using reviews)
-            from django.db.models import Avg, Count
-            top_rated_properties = (
-                base_queryset.annotate(
-                    avg_rating=Avg('reviews__rating'),
-                    review_count=Count('reviews')
-                )
-                .filter(review_count__gt=0)
-                .order_by('-avg_rating', '-review_count')[:limit]
-            )
-            categories["top_rated"] = self.get_serializer(
-                top_rated_properties, many=True, context={"request": request}
-            ).data
-            
-            # Special needs properties (wheelchair accessible)
-            special_needs_properties = base_queryset.filter(
-                is_special_needs=True
-            ).order_by("-created_at")[:limit]
-            categories["special_needs"] = self.get_serializer(
-                special_needs_properties, many=True, context={"request": request}
-            ).data
-            
-            # Popular properties (based on view count)
-            popular_properties = base_queryset.order_by("-view_count")[:limit]
-            categories["popular"] = self.get_serializer(
-                popular_properties, many=True, context={"request": request}
-            ).data
-            
-            # Near university properties - modified to handle unauthenticated users
-            near_university_properties = []
-            if request.user.is_authenticated:
+
+            def build_categories(university):
+                return {
+                    name: self.get_serializer(queryset, many=True, context={"request": request}).data
+                    for name, queryset in self.marketing_querysets(limit, distance_km, university).items()
+                }
+
+            # Near university properties: the student's own university, else the most popular one
+            if request.user.is_authenticated and getattr(request.user, "roles", None) == "student":
+                university = None
                 try:
-                    if (
-                        hasattr(request.user, "roles")
-                        and request.user.roles == "student"
-                        and hasattr(request.user, "student_profile")
-                        and request.user.student_profile.university_id
-                    ):
-                        university = University.objects.get(
-                            id=request.user.student_profile.university_id
-                        )
-                        near_university_properties = base_queryset.annotate(
-                            distance=Distance("location", university.location)
-                        ).filter(distance__lte=D(km=distance_km)).order_by("distance")[:limit]
-                    
-                    elif not near_university_properties:
-                        popular_university = University.objects.first()
-                        if popular_university:
-                            near_university_properties = base_queryset.annotate(
-                                distance=Distance("location", popular_university.location)
-                            ).filter(distance__lte=D(km=distance_km)).order_by("distance")[:limit]
+                    if hasattr(request.user, "student_profile") and request.user.student_profile.university_id:
+                        university = University.objects.get(id=request.user.student_profile.university_id)
+                    else:
+                        university = University.objects.first()
                 except University.DoesNotExist:
                     logger.warning(f"University not found for user {request.user.id}")
                 except Exception as e:
                     logger.error(f"Error fetching near-university properties: {str(e)}")
-            else:
-                # For unauthenticated users, show properties near the most popular university
+                # Students also see the distance to their university, so their page is not shared
+                return Response(build_categories(university))
+
+            def build_shared_categories():
+                university = None
                 try:
-                    popular_university = University.objects.first()
-                    if popular_university:
-                        near_university_properties = base_queryset.annotate(
-                            distance=Distance("location", popular_university.location)
-                        ).filter(distance__lte=D(km=distance_km)).order_by("distance")[:limit]
+                    university = University.objects.first()
                 except Exception as e:
-                    logger.error(f"Error fetching near-university properties for unauthenticated user: {str(e)}")
-            
-            categories["near_university"] = self.get_serializer(
-                near_university_properties, many=True, context={"request": request}
-            ).data
-            
-            return Response(categories)
+                    logger.error(f"Error fetching near-university properties: {str(e)}")
+                return build_categories(university)
+
+            # Everyone else gets the same page, shared through the cache
+            categories = get_or_build(
+                marketing_cache_key(version(MARKETING_NAMESPACE), limit, distance_km),
+                build_shared_categories,
+                MARKETING_CACHE_SECONDS,
+                metric="marketing_categories",
+            )
+            return Response(mark_recently_viewed(categories, request.session.get("recently_viewed_properties", [])))
         except Exception as e:
             logger.error(f"Error in marketing_categories: {str(e)}", exc_info=True)
             raise
 
+    @extend_schema(
+        description="""Stream the property catalogue for analytics. Admin only.
+
+        Accepts the same filters as the list endpoint. Rows are read through a
+        server-side cursor, so memory use stays flat at any catalogue size.
+        """,
+        parameters=[
+            OpenApiParameter(
+                name="export_format",
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description="One of ndjson (default), geojson or csv.",
+            ),
+            OpenApiParameter(
+                name="gzip",
+                type=OpenApiTypes.BOOL,
+                location=OpenApiParameter.QUERY,
+                description="Gzip the export on the fly.",
+            ),
+            OpenApiParameter(
+                name="include_unavailable",
+                type=OpenApiTypes.BOOL,
+                location=OpenApiParameter.QUERY,
+                description="Also export properties that are not available.",
+            ),
+        ],
+    )
+    @action(detail=False, methods=["get"], url_path="export", permission_classes=[permissions.IsAdminUser])
+    def export(self, request):
+        """Stream the (filtered) property catalogue as NDJSON, GeoJSON or CSV. Admin only."""
+        fmt = request.query_params.get("export_format", "ndjson")
+        if fmt not in bulk_io.SUPPORTED_FORMATS:
+            return Response(
+                {"export_format": f"Must be one of: {', '.join(bulk_io.SUPPORTED_FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        use_gzip = request.query_params.get("gzip", "false").lower() in ("1", "true")
+        include_unavailable = request.query_params.get("include_unavailable", "false").lower() in ("1", "true")
+
+        queryset = Properties.objects.all() if include_unavailable else self.get_queryset()
+        queryset = self.filter_queryset(queryset)
+        if "ordering" not in request.query_params:
+            queryset = queryset.order_by("id")
+        # The rows are streamed after the view returns, outside the request's routing scope
+        queryset = queryset.using(router.db_for_read(Properties))
+        rows = bulk_io.export_queryset(queryset).iterator(chunk_size=2000)
+
+        chunks = bulk_io.iter_export(rows, fmt)
+        filename = f"properties.{fmt}"
+        content_type = bulk_io.CONTENT_TYPES[fmt]
+        if use_gzip:
+            chunks = bulk_io.gzip_stream(chunks)
+            filename += ".gz"
+            content_type = "application/gzip"
+
+        logger.info(f"Property export ({fmt}, gzip={use_gzip}) started by user {request.user.id}")
+        response = StreamingHttpResponse(chunks, content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+    # Map Viewport
+    def list(self, request, *args, **kwargs):
+        """List properties; viewport queries (in_bbox/within) are capped instead of paginated."""
+        if not any(param in request.query_params for param in PropertyFilter.VIEWPORT_PARAMS):
+            return super().list(request, *args, **kwargs)
+
+        max_results = settings.VIEWPORT_MAX_RESULTS
+        queryset = self.filter_queryset(self.get_queryset())
+        compact = request.query_params.get("compact", "false").lower() in ("1", "true")
+        if compact:
+            rows = list(
+                spatial.with_coordinates(queryset)
+                .values_list("id", "price", "location_lng", "location_lat")[:max_results + 1]
+            )
+        else:
+            rows = list(queryset[:max_results + 1])
+
+        # One extra row tells whether the viewport holds more than the cap
+        truncated = len(rows) > max_results
+        rows = rows[:max_results]
+        if compact:
+            data = {
+                "fields": ["id", "price", "lng", "lat"],
+                "results": [[pk, float(price), lng, lat] for pk, price, lng, lat in rows],
+            }
+        else:
+            data = dict(self.get_serializer(rows, many=True).data)
+        data.update({"count": len(rows), "truncated": truncated, "max_results": max_results})
+        if truncated:
+            data["detail"] = "Too many results, zoom in"
+        return Response(data)
+
+    # Map Tiles
+    @extend_schema(
+        description=f"""Map tile of available property locations. No authentication required.
+
+        Tiles use the XYZ scheme in Web Mercator. Up to zoom {tiles.CLUSTER_MAX_ZOOM} properties are
+        clustered on a grid and each row is {tiles.CLUSTER_FIELDS}; above it each row is
+        {tiles.POINT_FIELDS}. Pass mvt=1 for a Mapbox vector tile instead of JSON.
+        """,
+        parameters=[
+            OpenApiParameter(
+                name="mvt",
+                type=OpenApiTypes.BOOL,
+                location=OpenApiParameter.QUERY,
+                description=f"Return a vector tile ({tiles.MVT_CONTENT_TYPE}, layer '{tiles.MVT_LAYER}').",
+            ),
+        ],
+    )
+    @action(detail=False, methods=["get"], url_path=r"tiles/(?P<z>\d+)/(?P<x>\d+)/(?P<y>\d+)")
+    def map_tiles(self, request, z=None, x=None, y=None):
+        """Retrieve a clustered (low zoom) or per-property (high zoom) map tile. No authentication required."""
+        z, x, y = int(z), int(x), int(y)
+        if not tiles.is_valid_tile(z, x, y):
+            return Response({"error": "Tile out of range"}, status=status.HTTP_404_NOT_FOUND)
+
+        if request.query_params.get("mvt", "false").lower() in ("1", "true"):
+            response = HttpResponse(tiles.get_tile(z, x, y, "mvt"), content_type=tiles.MVT_CONTENT_TYPE)
+        else:
+            response = Response(tiles.get_tile(z, x, y, "json"))
+        patch_cache_control(response, public=True, max_age=60)
+        return response
+
+    # Recommendations
+    def _recommendation_limit(self, request):
+        """The ``limit`` query parameter, capped at the neighbours stored per property."""
+        try:
+            limit = int(request.query_params.get("limit", 10))
+        except ValueError:
+            limit = 10
+        return max(1, min(limit, recommendations.TOP_K))
+
+    def _ordered_properties(self, request, property_ids, limit=None):
+        """Serialize up to ``limit`` available properties in ``property_ids`` order."""
+        # Relations are only loaded for properties missing from the fragment cache
+        by_id = spatial.with_coordinates(
+            Properties.objects.filter(is_available=True).select_related("nearest_campus")
+        ).in_bulk(property_ids)
+        properties = [by_id[property_id] for property_id in property_ids if property_id in by_id][:limit]
+        return Response(PropertiesListSerializer(properties, many=True, context={"request": request}).data)
+
+    @extend_schema(
+        description="Properties most similar to this one, from the precomputed similarity index. No authentication required.",
+        parameters=[
+            OpenApiParameter(
+                name="limit",
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                description=f"Number of properties to return (default: 10, max: {recommendations.TOP_K}).",
+            ),
+        ],
+        responses=PropertiesListSerializer(many=True),
+    )
+    @action(detail=True, methods=["get"], url_path="similar")
+    def similar(self, request, pk=None):
+        """Retrieve properties similar to this one. No authentication required."""
+        property_instance = self.get_object()
+        limit = self._recommendation_limit(request)
+        # Over-fetch so unavailable neighbours can be dropped without a second lookup
+        property_ids = recommendations.similar_ids(property_instance.id, limit=recommendations.TOP_K)
+        return self._ordered_properties(request, property_ids, limit)
+
+    @extend_schema(
+        description="""Properties recommended for the current user. No authentication required.
+
+        Seeds are the user's favourites and well-rated reviews plus the properties
+        viewed in this session; their precomputed neighbours are ranked by
+        similarity. Without any seeds, the best scored properties are returned.
+        """,
+        parameters=[
+            OpenApiParameter(
+                name="limit",
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                description=f"Number of properties to return (default: 10, max: {recommendations.TOP_K}).",
+            ),
+        ],
+        responses=PropertiesListSerializer(many=True),
+    )
+    @action(detail=False, methods=["get"], url_path="recommended")
+    def recommended(self, request):
+        """Retrieve properties recommended for the current user or session. No authentication required."""
+        limit = self._recommendation_limit(request)
+        property_ids = recommendations.recommended_ids(
+            user=request.user,
+            viewed_ids=request.session.get("recently_viewed_properties", []),
+            limit=limit * 2,
+        )
+        return self._ordered_properties(request, property_ids, limit)
+
     # Queryset Customization
     def get_queryset(self):
         """Filter queryset, optionally by university proximity."""
-        queryset = Properties.objects.filter(is_available=True)
+        # The serializers prefetch relations for the properties missing from the fragment cache
+        queryset = Properties.objects.filter(is_available=True).select_related("nearest_campus")
+        if self.request.method in permissions.SAFE_METHODS:
+            # Reads emit the point from plain coordinates; writes need the geometry for the save signals
+            queryset = spatial.with_coordinates(queryset)
         university_id = self.request.query_params.get("university_id")
         distance = self.request.query_params.get("distance", 5)
 
@@ -241,14 +529,40 @@ class PropertiesViewSet(viewsets.ModelViewSet):
                 raise
         return queryset
 
+    def retrieve(self, request, *args, **kwargs):
+        """Retrieve a property, answering conditional requests from one query before serializing."""
+        pk = str(kwargs[self.lookup_field])
+        freshness = detail_freshness(pk).first() if pk.isdigit() else None
+        if freshness is None:
+            # Not found (or not an id); let the normal lookup produce the 404
+            return super().retrieve(request, *args, **kwargs)
+        public = not request.user.is_authenticated and settings.SESSION_COOKIE_NAME not in request.COOKIES
+        viewed_ids = [] if public else request.session.get("recently_viewed_properties", [])
+        variant = (
+            request.accepted_renderer.format,
+            request.user.pk,
+            getattr(request.user, "roles", None),
+            distance_origin(request.user),
+            int(pk) in viewed_ids,
+        )
+        etag, last_modified = detail_validators(freshness, variant)
+        if detail_not_modified(request, etag, last_modified):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = super().retrieve(request, *args, **kwargs)
+        return finish_detail(response, etag, last_modified, public)
+
+    def _create_media(self, **fields):
+        """Create a PropertyMedia row, timing the Cloudinary upload it triggers."""
+        with metrics.CLOUDINARY_UPLOAD_SECONDS.labels(fields["media_type"]).time():
+            return PropertyMedia.objects.create(**fields)
+
     # Create Operations
     def create(self, request, *args, **kwargs):
         """Create a new property with associated media and amenities. Authentication required."""
-        logger.info(f"==== Incoming Property Create Request ====\n"
-                    f"User: {request.user.id}\n"
-                    f"Data: {dict(request.data)}\n"
-                    f"Files: {{k: [f.name for f in v] for k, v in request.FILES.lists()}}\n"
-                    f"Headers: {{k: v for k, v in request.META.items() if k.startswith('HTTP_')}}")
+        logger.debug(f"Property create request by user {request.user.id}: "
+                     f"fields={sorted(request.data.keys())}, "
+                     f"files={ {k: len(v) for k, v in request.FILES.lists()} }")
 
         try:
             with transaction.atomic():
@@ -301,7 +615,7 @@ class PropertiesViewSet(viewsets.ModelViewSet):
                 for i, image in enumerate(images):
                     try:
                         # Create the media instance - Cloudinary will handle the upload
-                        media_instance = PropertyMedia.objects.create(
+                        media_instance = self._create_media(
                             property=property_instance,
                             media_type="image",
                             file=image,
@@ -323,7 +637,7 @@ class PropertiesViewSet(viewsets.ModelViewSet):
                 for i, video in enumerate(videos, start=len(images)):  # Continue display order after images
                     try:
                         # Create the media instance - Cloudinary will handle the upload
-                        media_instance = PropertyMedia.objects.create(
+                        media_instance = self._create_media(
                             property=property_instance,
                             media_type="video",
                             file=video,
@@ -340,8 +654,8 @@ class PropertiesViewSet(viewsets.ModelViewSet):
                         logger.error(f"Error uploading video {video.name} to Cloudinary: {str(e)}")
                         raise
 
-                # Prepare response
-                response_serializer = self.get_serializer(property_instance, context={"request": request})
+                # Prepare response; the changed parts are only touched on commit, so skip the fragment cache
+                response_serializer = self.get_serializer(property_instance, context={"request": request, "fragments": False})
                 logger.info(f"Property created successfully: {property_instance.id}")
                 return Response(response_serializer.data, status=status.HTTP_201_CREATED)
         except Exception as e:
@@ -394,7 +708,7 @@ class PropertiesViewSet(viewsets.ModelViewSet):
                 for i, image in enumerate(images, start=existing_count):
                     try:
                         # Create the media instance - Cloudinary will handle the upload
-                        media_instance = PropertyMedia.objects.create(
+                        media_instance = self._create_media(
                             property=instance,
                             media_type="image",
                             file=image,
@@ -417,7 +731,7 @@ class PropertiesViewSet(viewsets.ModelViewSet):
                 for i, video in enumerate(videos, start=video_start):
                     try:
                         # Create the media instance - Cloudinary will handle the upload
-                        media_instance = PropertyMedia.objects.create(
+                        media_instance = self._create_media(
                             property=instance,
                             media_type="video",
                             file=video,
@@ -448,7 +762,7 @@ class PropertiesViewSet(viewsets.ModelViewSet):
                         logger.error(f"Error updating amenities for property {instance.id}: {str(e)}")
                         raise
 
-                response_serializer = self.get_serializer(instance, context={"request": request})
+                response_serializer = self.get_serializer(instance, context={"request": request, "fragments": False})
                 logger.info(f"Property updated successfully: {instance.id}")
                 return Response(response_serializer.data)
         except Exception as e:
@@ -495,7 +809,7 @@ class PropertiesViewSet(viewsets.ModelViewSet):
                 for i, image in enumerate(images, start=existing_count):
                     try:
                         # Create the media instance - Cloudinary will handle the upload
-                        media_instance = PropertyMedia.objects.create(
+                        media_instance = self._create_media(
                             property=property_instance,
                             media_type="image",
                             file=image,
@@ -518,7 +832,7 @@ class PropertiesViewSet(viewsets.ModelViewSet):
                 for i, video in enumerate(videos, start=video_start):
                     try:
                         # Create the media instance - Cloudinary will handle the upload
-                        media_instance = PropertyMedia.objects.create(
+                        media_instance = self._create_media(
                             property=property_instance,
                             media_type="video",
                             file=video,
@@ -533,7 +847,7 @@ class PropertiesViewSet(viewsets.ModelViewSet):
                         logger.error(f"Error uploading video {video.name} to Cloudinary: {str(e)}")
                         raise
 
-                serializer = self.get_serializer(property_instance, context={"request": request})
+                serializer = self.get_serializer(property_instance, context={"request": request, "fragments": False})
                 logger.info(f"Media added to property {property_instance.id} by user {request.user.id}")
                 return Response(serializer.data)
         except Exception as e:
@@ -597,7 +911,8 @@ class PropertiesViewSet(viewsets.ModelViewSet):
         try:
             university = University.objects.get(id=university_id)
             properties = (
-                Properties.objects.filter(is_available=True)
+                spatial.with_coordinates(Properties.objects.filter(is_available=True))
+                .select_related("nearest_campus")
                 .annotate(distance=Distance("location", university.location))
                 .filter(distance__lte=D(km=float(distance)))
                 .order_by("distance")
@@ -610,4 +925,36 @@ class PropertiesViewSet(viewsets.ModelViewSet):
             return Response({"error": "University not found"}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
             logger.error(f"Error retrieving properties near university {university_id} for user {request.user.id}: {str(e)}", exc_info=True)
-            return Response({"error": "An unexpected error occurred"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+            return Response({"error": "An unexpected error occurred"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@extend_schema_view(
+    list=extend_schema(description="List all amenities. Properties reference them by id. No authentication required."),
+    retrieve=extend_schema(description="Retrieve a single amenity. No authentication required."),
+)
+class AmenitiesViewSet(viewsets.ViewSet):
+    """Read-only amenity catalogue, served from the in-process registry without touching the database."""
+
+    permission_classes = [permissions.AllowAny]
+    serializer_class = AmenitySerializer
+
+    def list(self, request):
+        return self._cacheable(request, amenity_registry.all_amenities())
+
+    def retrieve(self, request, pk=None):
+        amenity = amenity_registry.get(int(pk)) if str(pk).isdigit() else None
+        if amenity is None:
+            return Response({"error": "Amenity not found"}, status=status.HTTP_404_NOT_FOUND)
+        return self._cacheable(request, amenity)
+
+    def _cacheable(self, request, data):
+        """Answer with an ETag on the catalogue version, or 304 when the client already has it."""
+        etag = f'"{amenity_registry.catalogue_version()}-{request.accepted_renderer.format}"'
+        if etag_matches(request, etag):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(data)
+        response["ETag"] = etag
+        patch_cache_control(response, public=True, max_age=AMENITIES_MAX_AGE)
+        patch_vary_headers(response, ["Accept"])
+        return response
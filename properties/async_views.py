@@ -0,0 +1,127 @@
+"""
+Async variants of the hot property read endpoints, routed by ``campus_stay.urls_asgi``.
+
+See ``campus_stay.async_views`` for when a request takes the async path.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.paginator import InvalidPage
+from django.http import HttpResponseNotModified
+from rest_framework.exceptions import ValidationError
+
+from campus_stay.async_views import json_response, viewset_for, with_sync_fallback
+from campus_stay.cache import aget_or_build, aversion
+from properties.api.filters import PropertyFilter
+from properties.api.views import (
+    MARKETING_CACHE_SECONDS,
+    MARKETING_NAMESPACE,
+    PropertiesViewSet,
+    detail_freshness,
+    detail_not_modified,
+    detail_validators,
+    finish_detail,
+    marketing_cache_key,
+    mark_recently_viewed,
+)
+from universities.models import University
+
+
+async def _fetch(queryset):
+    """Evaluate a queryset (and its prefetches) without blocking the event loop."""
+    return [instance async for instance in queryset]
+
+
+async def _serialize(view, instances, **kwargs):
+    """
+    Serialize in a worker thread: fragment cache lookups and the relation
+    prefetches for misses are sync calls that would block the event loop.
+    """
+    return await sync_to_async(lambda: view.get_serializer(instances, **kwargs).data)()
+
+
+@with_sync_fallback(
+    PropertiesViewSet.as_view({"get": "list", "post": "create"}), replica=True, throttle_scope="search"
+)
+async def property_list(request):
+    if any(param in request.GET for param in PropertyFilter.VIEWPORT_PARAMS):
+        # Capped viewport listings are cheap already; keep one implementation
+        return await property_list.fallback(request)
+
+    view = viewset_for(PropertiesViewSet, request, "list")
+    # Filtering may load the amenity registry or look up a university; those are small sync queries
+    try:
+        queryset = await sync_to_async(lambda: view.filter_queryset(view.get_queryset()))()
+    except ValidationError as exc:
+        return json_response(exc.detail, status=400)
+
+    paginator = view.paginator
+    django_paginator = paginator.django_paginator_class(queryset, paginator.get_page_size(view.request))
+    django_paginator.count = await queryset.acount()
+    try:
+        page = django_paginator.page(request.GET.get(paginator.page_query_param, 1))
+    except InvalidPage:
+        return json_response({"detail": "Invalid page."}, status=404)
+    page.object_list = await _fetch(page.object_list)
+
+    paginator.page = page
+    paginator.request = view.request
+    data = await _serialize(view, page.object_list, many=True)
+    return json_response(paginator.get_paginated_response(data).data)
+
+
+@with_sync_fallback(
+    PropertiesViewSet.as_view(
+        {"get": "retrieve", "put": "update", "patch": "partial_update", "delete": "destroy"}
+    ),
+    replica=True,
+)
+async def property_detail(request, pk):
+    freshness = await detail_freshness(pk).afirst() if str(pk).isdigit() else None
+    if freshness is None:
+        return json_response({"detail": "No Properties matches the given query."}, status=404)
+    public = settings.SESSION_COOKIE_NAME not in request.COOKIES
+    viewed_ids = []
+    if not public and hasattr(request, "session"):
+        viewed_ids = await request.session.aget("recently_viewed_properties", [])
+    # Same variant as PropertiesViewSet.retrieve gives an anonymous JSON request
+    etag, last_modified = detail_validators(freshness, ("json", None, None, None, int(pk) in viewed_ids))
+    if detail_not_modified(request, etag, last_modified):
+        return finish_detail(HttpResponseNotModified(), etag, last_modified, public)
+
+    view = viewset_for(PropertiesViewSet, request, "retrieve", pk=pk)
+    queryset = await sync_to_async(view.get_queryset)()
+    instances = await _fetch(queryset.filter(pk=pk))
+    if not instances:
+        return json_response({"detail": "No Properties matches the given query."}, status=404)
+    return finish_detail(json_response(await _serialize(view, instances[0])), etag, last_modified, public)
+
+
+@with_sync_fallback(
+    PropertiesViewSet.as_view({"get": "marketing_categories"}), replica=True, throttle_scope="search"
+)
+async def marketing_categories(request):
+    try:
+        limit = int(request.GET.get("limit", 6))
+        distance_km = float(request.GET.get("distance", 5))
+    except ValueError:
+        return await marketing_categories.fallback(request)
+
+    view = viewset_for(PropertiesViewSet, request, "marketing_categories")
+
+    async def build_categories():
+        # Anonymous visitors see the properties near the most popular university
+        university = await University.objects.afirst()
+        querysets = view.marketing_querysets(limit, distance_km, university)
+        return {
+            name: await _serialize(view, await _fetch(queryset), many=True)
+            for name, queryset in querysets.items()
+        }
+
+    categories = await aget_or_build(
+        marketing_cache_key(await aversion(MARKETING_NAMESPACE), limit, distance_km),
+        build_categories,
+        MARKETING_CACHE_SECONDS,
+        metric="marketing_categories",
+    )
+    viewed_ids = await request.session.aget("recently_viewed_properties", []) if hasattr(request, "session") else []
+    return json_response(mark_recently_viewed(categories, viewed_ids))
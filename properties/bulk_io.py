@@ -0,0 +1,244 @@
+"""
+Streaming readers and writers for bulk property data.
+
+Records are handled one at a time as plain dicts so imports can validate and
+load them in fixed-size chunks, and exports can stream any catalogue size in
+constant memory.
+"""
+import csv
+import json
+import os
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import FloatField, Func, OuterRef
+
+SUPPORTED_FORMATS = ('csv', 'ndjson', 'geojson')
+
+CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+    'geojson': 'application/geo+json',
+}
+
+_READ_SIZE = 64 * 1024
+_WRITE_SIZE = 64 * 1024
+
+
+def detect_format(path):
+    """Guess the input format from the file extension."""
+    extension = os.path.splitext(path)[1].lower().lstrip('.')
+    if extension in ('jsonl', 'ndjson'):
+        return 'ndjson'
+    if extension in ('geojson', 'json'):
+        return 'geojson'
+    if extension == 'csv':
+        return 'csv'
+    raise ValueError(f"Cannot detect the format of '{path}', pass --format explicitly")
+
+
+def iter_records(stream, fmt):
+    """Yield ``(line_number, record)`` tuples from a text stream."""
+    if fmt == 'csv':
+        return _iter_csv(stream)
+    if fmt == 'ndjson':
+        return _iter_ndjson(stream)
+    if fmt == 'geojson':
+        return _iter_geojson(stream)
+    raise ValueError(f"Unsupported format '{fmt}'")
+
+
+def _iter_csv(stream):
+    reader = csv.DictReader(stream)
+    for record in reader:
+        # Empty CSV cells mean "not provided"
+        yield reader.line_num, {
+            key: value for key, value in record.items() if key is not None and value != ''
+        }
+
+
+def _iter_ndjson(stream):
+    for line_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        yield line_number, json.loads(line)
+
+
+def _iter_geojson(stream):
+    """
+    Yield the features of a GeoJSON FeatureCollection one at a time.
+
+    The collection is decoded incrementally: only the feature currently being
+    parsed is buffered, so arbitrarily large collections stream in constant
+    memory.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    in_features = False
+    index = 0
+
+    def fill():
+        nonlocal buffer, position
+        chunk = stream.read(_READ_SIZE)
+        buffer = buffer[position:] + chunk
+        position = 0
+        return bool(chunk)
+
+    while True:
+        if not in_features:
+            marker = buffer.find('"features"', position)
+            if marker == -1:
+                # Keep a tail in case the key is split across reads
+                position = max(position, len(buffer) - len('"features"'))
+                if not fill():
+                    return
+                continue
+            bracket = buffer.find('[', marker)
+            if bracket == -1:
+                if not fill():
+                    return
+                continue
+            position = bracket + 1
+            in_features = True
+
+        # Skip separators between features
+        while position < len(buffer) and buffer[position] in ' \t\r\n,':
+            position += 1
+        if position >= len(buffer):
+            if not fill():
+                return
+            continue
+        if buffer[position] == ']':
+            return
+
+        try:
+            feature, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if not fill():
+                raise
+            continue
+        position = end
+        index += 1
+        yield index, _flatten_feature(feature)
+
+
+def _flatten_feature(feature):
+    """Turn a GeoJSON feature into a flat record with a ``location`` key."""
+    record = dict(feature.get('properties') or {})
+    if feature.get('geometry'):
+        record['location'] = feature['geometry']
+    if feature.get('id') is not None and 'id' not in record:
+        record['id'] = feature['id']
+    return record
+
+
+# Export
+def export_queryset(queryset):
+    """
+    Reduce a ``Properties`` queryset to flat export rows.
+
+    Coordinates and amenity IDs are computed in the database so rows can be
+    streamed straight from a server-side cursor without building model
+    instances or GEOS geometries.
+    """
+    from django.contrib.postgres.expressions import ArraySubquery
+
+    from properties.models import Properties, PropertyAmenity
+
+    fields = [
+        f.name for f in Properties._meta.concrete_fields
+        if f.name != 'location'
+    ]
+    return queryset.annotate(
+        longitude=Func('location', function='ST_X', output_field=FloatField()),
+        latitude=Func('location', function='ST_Y', output_field=FloatField()),
+        amenity_ids=ArraySubquery(
+            PropertyAmenity.objects.filter(property=OuterRef('pk')).order_by('amenity_id').values('amenity_id')
+        ),
+    ).values(*fields, 'longitude', 'latitude', 'amenity_ids')
+
+
+def iter_export(rows, fmt):
+    """Yield text chunks of ``rows`` encoded as ``fmt``."""
+    if fmt == 'csv':
+        chunks = _write_csv(rows)
+    elif fmt == 'ndjson':
+        chunks = _write_ndjson(rows)
+    elif fmt == 'geojson':
+        chunks = _write_geojson(rows)
+    else:
+        raise ValueError(f"Unsupported format '{fmt}'")
+    return _buffered(chunks)
+
+
+def gzip_stream(chunks):
+    """Gzip an iterable of text chunks on the fly."""
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+class _Echo:
+    """File-like object whose ``write`` returns the value, for ``csv.writer``."""
+
+    def write(self, value):
+        return value
+
+
+def _write_csv(rows):
+    writer = csv.writer(_Echo())
+    header = None
+    for row in rows:
+        if header is None:
+            header = list(row)
+            yield writer.writerow(header)
+        row = dict(row)
+        if row.get('amenity_ids') is not None:
+            # Same separator import_properties accepts
+            row['amenity_ids'] = '|'.join(str(amenity_id) for amenity_id in row['amenity_ids'])
+        yield writer.writerow([row[key] for key in header])
+
+
+def _write_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder) + '\n'
+
+
+def _write_geojson(rows):
+    yield '{"type": "FeatureCollection", "features": ['
+    separator = ''
+    for row in rows:
+        yield separator + json.dumps(_to_feature(row), cls=DjangoJSONEncoder)
+        separator = ',\n'
+    yield ']}\n'
+
+
+def _to_feature(row):
+    properties = dict(row)
+    pk = properties.pop('id', None)
+    longitude = properties.pop('longitude', None)
+    latitude = properties.pop('latitude', None)
+    geometry = None
+    if longitude is not None and latitude is not None:
+        geometry = {'type': 'Point', 'coordinates': [longitude, latitude]}
+    return {'type': 'Feature', 'id': pk, 'geometry': geometry, 'properties': properties}
+
+
+def _buffered(chunks):
+    """Coalesce many small chunks into fewer, larger writes."""
+    parts = []
+    size = 0
+    for chunk in chunks:
+        parts.append(chunk)
+        size += len(chunk)
+        if size >= _WRITE_SIZE:
+            yield ''.join(parts)
+            parts = []
+            size = 0
+    if parts:
+        yield ''.join(parts)
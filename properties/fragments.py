@@ -0,0 +1,170 @@
+"""
+Cache of serialized property features.
+
+A property serializes to the same GeoJSON feature for every visitor except
+for a few live fields: per-user ones (``distance_to_university``,
+``is_recently_viewed``) and view counters, which change without touching
+``updated_at``. The rest of a feature is cached under
+``(serializer, id, updated_at)``, so a change to the property retires its
+fragments without any explicit delete.
+
+Reviews, media and amenity links are part of the feature, so
+``properties.signals`` bumps ``updated_at`` when they change (``touch``),
+once per property when the transaction commits.
+Campus and place renames reach many properties at once and bump the
+``NAMESPACE`` version instead (``invalidate``). Reviewer names are kept as
+they were when the property last changed.
+
+A page is looked up with one ``get_many``; relations are only prefetched for
+the properties that missed, and the new fragments are stored with one
+``set_many``.
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import prefetch_related_objects
+from django.db.models.manager import BaseManager
+from django.utils import timezone
+
+from campus_stay.cache import bump_version, make_key, version
+from campus_stay.instrumentation import TimedGeoFeatureListSerializer, record_cache
+from properties.models import Properties
+
+NAMESPACE = 'properties:fragments'
+# Keys change with updated_at, so entries never go stale; the timeout only bounds memory
+CACHE_TIMEOUT = 60 * 60 * 24
+
+
+class PendingTouches:
+    """The properties touched in a transaction, marked changed with one UPDATE on commit."""
+
+    def __init__(self, using):
+        self.using = using
+        self.property_ids = set()
+
+    def __call__(self):
+        Properties.objects.using(self.using).filter(pk__in=self.property_ids).update(updated_at=timezone.now())
+
+
+def touch(property_id, using=None):
+    """Mark a property as changed when the transaction commits, retiring its cached fragments."""
+    connection = transaction.get_connection(using)
+    # A bulk change touches the same properties once per row; join the pending touch of this transaction
+    for _, callback, _ in connection.run_on_commit if connection.in_atomic_block else ():
+        if isinstance(callback, PendingTouches):
+            callback.property_ids.add(property_id)
+            return
+    pending = PendingTouches(connection.alias)
+    pending.property_ids.add(property_id)
+    transaction.on_commit(pending, using=connection.alias)
+
+
+def invalidate():
+    """Retire the fragments of every property."""
+    bump_version(NAMESPACE)
+
+
+def fragment_key(namespace_version, variant, instance):
+    return make_key(NAMESPACE, namespace_version, variant, instance.pk, instance.updated_at.timestamp())
+
+
+class FragmentCachedSerializerMixin:
+    """
+    GeoFeature serializer mixin that reuses cached features.
+
+    ``live_fields`` are left empty in the cached copy and computed for each
+    request; ``fragment_prefetches`` are the relations to prefetch for
+    properties that have to be serialized. Pass ``fragments=False`` in the
+    context to always serialize.
+    """
+    live_fields = ()
+    fragment_prefetches = ()
+
+    _fragments = None
+    _built = None
+
+    @property
+    def fragments_enabled(self):
+        return self.context.get('fragments', True)
+
+    def fragment_variant(self):
+        return type(self).__name__
+
+    def load_fragments(self, instances):
+        """Look up the fragments of a page of ``instances`` with one cache call."""
+        namespace_version = version(NAMESPACE)
+        variant = self.fragment_variant()
+        keys = {instance.pk: fragment_key(namespace_version, variant, instance) for instance in instances}
+        found = cache.get_many(keys.values())
+        self._fragments = {pk: found[key] for pk, key in keys.items() if key in found}
+        self._built = {}
+        missing = []
+        for instance in instances:
+            record_cache('property_fragments', instance.pk in self._fragments)
+            if instance.pk not in self._fragments:
+                missing.append(instance)
+        if missing and self.fragment_prefetches:
+            prefetch_related_objects(missing, *self.fragment_prefetches)
+        return keys
+
+    def to_representation(self, instance):
+        if not self.fragments_enabled:
+            return super().to_representation(instance)
+        if self._fragments is None:
+            return self._single(instance)
+
+        fragment = self._fragments.get(instance.pk)
+        if fragment is None:
+            representation = super().to_representation(instance)
+            self._built[instance.pk] = self._fragment_of(representation)
+            return representation
+        return self._with_live_fields(fragment, instance)
+
+    def _single(self, instance):
+        """An instance serialized on its own (a detail or a nested property)."""
+        key = fragment_key(version(NAMESPACE), self.fragment_variant(), instance)
+        fragment = cache.get(key)
+        record_cache('property_fragments', fragment is not None)
+        if fragment is not None:
+            return self._with_live_fields(fragment, instance)
+        if self.fragment_prefetches:
+            prefetch_related_objects([instance], *self.fragment_prefetches)
+        representation = super().to_representation(instance)
+        cache.set(key, self._fragment_of(representation), CACHE_TIMEOUT)
+        return representation
+
+    def store_fragments(self, keys):
+        """Store the fragments built since ``load_fragments`` with one cache call."""
+        if self._built:
+            cache.set_many({keys[pk]: fragment for pk, fragment in self._built.items()}, CACHE_TIMEOUT)
+
+    def _fragment_of(self, representation):
+        # Live fields keep their place in the cached copy so the output order doesn't change
+        properties = dict(representation['properties'])
+        for name in self.live_fields:
+            if name in properties:
+                properties[name] = None
+        return {**representation, 'properties': properties}
+
+    def _with_live_fields(self, fragment, instance):
+        properties = fragment['properties']
+        for name in self.live_fields:
+            if name in properties:
+                field = self.fields[name]
+                properties[name] = field.to_representation(field.get_attribute(instance))
+        return fragment
+
+
+class FragmentListSerializer(TimedGeoFeatureListSerializer):
+    """FeatureCollection list serializer that assembles pages from cached fragments."""
+
+    def to_representation(self, data):
+        if not self.child.fragments_enabled:
+            return super().to_representation(data)
+        instances = list(data.all() if isinstance(data, BaseManager) else data)
+        keys = self.child.load_fragments(instances)
+        try:
+            representation = super().to_representation(instances)
+            self.child.store_fragments(keys)
+        finally:
+            self.child._fragments = self.child._built = None
+        return representation
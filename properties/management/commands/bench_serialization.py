@@ -0,0 +1,86 @@
+import json
+import statistics
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+
+from campus_stay.renderers import ORJSONRenderer
+from properties import spatial
+from properties.api.serializers import PROPERTY_PREFETCHES, PropertiesListSerializer, PropertiesSerializer
+from properties.models import Properties
+
+SERIALIZERS = {'full': PropertiesSerializer, 'list': PropertiesListSerializer}
+
+
+class Command(BaseCommand):
+    help = (
+        "Time loading, serializing and rendering one page of properties, with GEOS geometries and "
+        "DRF's JSONRenderer against plain coordinates and the orjson renderer"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=1000, help="Properties per page (default: 1000)")
+        parser.add_argument('--repeat', type=int, default=5, help="Timed runs per variant (default: 5)")
+        parser.add_argument('--serializer', choices=SERIALIZERS, default='full', help="Serializer to time")
+        parser.add_argument('--json', help="Also write the results to this JSON file")
+
+    def handle(self, *args, **options):
+        size = options['size']
+        queryset = (
+            Properties.objects.filter(is_available=True)
+            .select_related('nearest_campus')
+            .prefetch_related(*PROPERTY_PREFETCHES)
+            .order_by('id')
+        )
+        available = queryset.count()
+        if not available:
+            raise CommandError("No data to serialize; run generate_fixtures first")
+        if available < size:
+            self.stdout.write(self.style.WARNING(f"Only {available} available properties; timing a page of {available}"))
+
+        request = RequestFactory().get('/api/v1/properties/')
+        request.user = AnonymousUser()
+        request.session = {}
+        serializer_class = SERIALIZERS[options['serializer']]
+        variants = [
+            ('geos+json', queryset, JSONRenderer()),
+            ('coords+orjson', spatial.with_coordinates(queryset), ORJSONRenderer()),
+        ]
+
+        results = []
+        outputs = {}
+        for name, variant_queryset, renderer in variants:
+            timings = {'load': [], 'serialize': [], 'render': []}
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                rows = list(variant_queryset[:size])
+                loaded = time.perf_counter()
+                # Without the fragment cache, so every run serializes the whole page
+                data = serializer_class(rows, many=True, context={'request': request, 'fragments': False}).data
+                serialized = time.perf_counter()
+                content = renderer.render(data)
+                rendered = time.perf_counter()
+                timings['load'].append(loaded - started)
+                timings['serialize'].append(serialized - loaded)
+                timings['render'].append(rendered - serialized)
+            outputs[name] = json.loads(content)
+
+            row = {'variant': name, 'properties': len(rows), 'bytes': len(content)}
+            row.update({f"{stage}_ms": round(statistics.median(values) * 1000, 2) for stage, values in timings.items()})
+            total = row['load_ms'] + row['serialize_ms'] + row['render_ms']
+            row['properties_per_second'] = round(len(rows) / total * 1000) if total else None
+            results.append(row)
+            self.stdout.write(
+                f"{name:<14} load={row['load_ms']}ms  serialize={row['serialize_ms']}ms  "
+                f"render={row['render_ms']}ms  {row['properties_per_second']} properties/s"
+            )
+
+        identical = len({json.dumps(output, sort_keys=True) for output in outputs.values()}) == 1
+        self.stdout.write(f"Identical output: {'yes' if identical else 'NO'}")
+
+        if options['json']:
+            with open(options['json'], 'w') as f:
+                json.dump(results, f, indent=2)
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from properties import recommendations
+
+
+class Command(BaseCommand):
+    help = "Rebuild the precomputed top-k similar properties index used by the recommendation endpoints"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--k',
+            type=int,
+            default=recommendations.TOP_K,
+            help=f"Neighbours stored per property (default: {recommendations.TOP_K})",
+        )
+
+    def handle(self, *args, **options):
+        if options['k'] <= 0:
+            raise CommandError("--k must be positive")
+
+        started = time.monotonic()
+        indexed = recommendations.build_index(k=options['k'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {indexed} properties with up to {options['k']} neighbours each "
+            f"in {time.monotonic() - started:.1f}s"
+        ))
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from properties import bulk_io
+from properties.models import Properties
+
+
+class Command(BaseCommand):
+    help = "Stream the property catalogue as NDJSON, GeoJSON or CSV"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--format',
+            choices=bulk_io.SUPPORTED_FORMATS,
+            default='ndjson',
+            help="Output format (default: ndjson)",
+        )
+        parser.add_argument('--output', '-o', help="Output file (default: stdout)")
+        parser.add_argument('--gzip', action='store_true', help="Gzip the output")
+        parser.add_argument('--chunk-size', type=int, default=2000, help="Rows fetched per server-side cursor batch")
+        parser.add_argument(
+            '--include-unavailable',
+            action='store_true',
+            help="Also export properties that are not available",
+        )
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError("--chunk-size must be positive")
+        if options['gzip'] and not options['output']:
+            raise CommandError("--gzip requires --output")
+
+        queryset = Properties.objects.all()
+        if not options['include_unavailable']:
+            queryset = queryset.filter(is_available=True)
+        rows = bulk_io.export_queryset(queryset.order_by('id')).iterator(chunk_size=options['chunk_size'])
+        chunks = bulk_io.iter_export(rows, options['format'])
+
+        if not options['output']:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+            return
+
+        if options['gzip']:
+            with open(options['output'], 'wb') as f:
+                for data in bulk_io.gzip_stream(chunks):
+                    f.write(data)
+        else:
+            with open(options['output'], 'w', encoding='utf-8', newline='') as f:
+                for chunk in chunks:
+                    f.write(chunk)
+
+        self.stdout.write(self.style.SUCCESS(f"Exported properties to {options['output']}"))
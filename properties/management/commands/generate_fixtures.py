@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from properties import synthetic
+
+
+class Command(BaseCommand):
+    help = "Bulk-create a synthetic dataset around the seeded Dar es Salaam universities"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--properties', type=int, default=1000, help="Number of properties to create")
+        parser.add_argument('--users', type=int, default=200, help="Number of student users to create")
+        parser.add_argument('--reviews', type=int, default=2000, help="Number of property reviews to create")
+        parser.add_argument('--messages', type=int, default=1000, help="Number of enquiry messages to create")
+        parser.add_argument('--favourites', type=int, default=1000, help="Number of favourites to create")
+        parser.add_argument(
+            '--places',
+            type=int,
+            help="Number of nearby places to create (default: a tenth of --properties, at least 20)",
+        )
+        parser.add_argument('--seed', type=int, help="Random seed for a reproducible dataset")
+
+    def handle(self, *args, **options):
+        for name in ('properties', 'users', 'reviews', 'messages', 'favourites', 'places'):
+            if options[name] is not None and options[name] < 0:
+                raise CommandError(f"--{name} cannot be negative")
+
+        counts = synthetic.generate(
+            properties=options['properties'],
+            users=options['users'],
+            reviews=options['reviews'],
+            messages=options['messages'],
+            favourites=options['favourites'],
+            places=options['places'],
+            seed=options['seed'],
+            log=self.stdout.write,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            "Synthetic data created: " + ", ".join(f"{count} {name}" for name, count in counts.items())
+        ))
+        if counts['users']:
+            self.stdout.write(
+                f"Synthetic users can log in with password '{synthetic.DEFAULT_PASSWORD}'"
+            )
@@ -0,0 +1,367 @@
+import io
+import json
+import os
+import time
+
+from django.contrib.gis.geos import GEOSException, GEOSGeometry, Point
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, models, transaction
+from django.utils import timezone
+
+from properties import spatial, tiles
+from properties.bulk_io import SUPPORTED_FORMATS, detect_format, iter_records
+from properties.models import Amenity, NearByPlaces, Properties, PropertyAmenity, PropertyNearByPlaces
+
+# Columns handled separately from the plain model fields
+RELATION_KEYS = ('amenity_ids', 'nearby_places')
+LOCATION_KEYS = ('location', 'longitude', 'latitude')
+IGNORED_KEYS = ('id',)
+# Derived from the location and recomputed after loading
+DERIVED_KEYS = ('nearest_campus', 'nearest_campus_distance')
+# CSV cells are text; accept the usual spellings (the export writes True/False)
+BOOLEAN_STRINGS = {'true': True, 't': True, '1': True, 'yes': True, 'false': False, 'f': False, '0': False, 'no': False}
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk import properties (with amenities and nearby places) from a CSV, "
+        "NDJSON or GeoJSON file"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Path to the input file")
+        parser.add_argument(
+            '--format',
+            choices=SUPPORTED_FORMATS,
+            help="Input format (detected from the file extension by default)",
+        )
+        parser.add_argument(
+            '--method',
+            choices=['bulk', 'copy'],
+            default='bulk',
+            help="Load with bulk_create (default) or PostgreSQL COPY",
+        )
+        parser.add_argument('--chunk-size', type=int, default=1000, help="Rows validated and committed per chunk")
+        parser.add_argument(
+            '--checkpoint',
+            help="Checkpoint file used to resume an interrupted import (default: <path>.checkpoint.json)",
+        )
+        parser.add_argument('--resume', action='store_true', help="Skip rows committed by a previous run")
+        parser.add_argument(
+            '--max-errors',
+            type=int,
+            default=100,
+            help="Abort once this many rows have been rejected (0 for no limit)",
+        )
+        parser.add_argument('--dry-run', action='store_true', help="Validate only, do not write anything")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f"File not found: {path}")
+        if options['method'] == 'copy' and connection.vendor != 'postgresql':
+            raise CommandError("--method copy requires a PostgreSQL database")
+        if options['chunk_size'] < 1:
+            raise CommandError("--chunk-size must be positive")
+
+        try:
+            fmt = options['format'] or detect_format(path)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        checkpoint_path = options['checkpoint'] or f"{path}.checkpoint.json"
+        checkpoint = self._load_checkpoint(checkpoint_path, path) if options['resume'] else None
+        skip = checkpoint['rows'] if checkpoint else 0
+        stats = {
+            'rows': skip,
+            'loaded': checkpoint['loaded'] if checkpoint else 0,
+            'rejected': checkpoint['rejected'] if checkpoint else 0,
+        }
+        if skip:
+            self.stdout.write(self.style.WARNING(f"Resuming after {skip} rows from {checkpoint_path}"))
+
+        self.amenity_ids = set(Amenity.objects.values_list('id', flat=True))
+        self.place_ids = set(NearByPlaces.objects.values_list('id', flat=True))
+        self.max_errors = options['max_errors']
+        self.dry_run = options['dry_run']
+        self.method = options['method']
+
+        started = time.monotonic()
+        chunk = []
+        with open(path, newline='', encoding='utf-8') as stream:
+            for seen, (line_number, record) in enumerate(iter_records(stream, fmt), start=1):
+                if seen <= skip:
+                    continue
+                chunk.append((line_number, record))
+                if len(chunk) >= options['chunk_size']:
+                    self._process_chunk(chunk, stats)
+                    self._save_checkpoint(checkpoint_path, path, stats)
+                    self._report(stats, started)
+                    chunk = []
+            if chunk:
+                self._process_chunk(chunk, stats)
+                self._save_checkpoint(checkpoint_path, path, stats)
+                self._report(stats, started)
+
+        if not self.dry_run and os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+
+        verb = "Validated" if self.dry_run else "Imported"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {stats['loaded']} properties, rejected {stats['rejected']} rows "
+            f"in {time.monotonic() - started:.1f}s"
+        ))
+
+    # Chunk processing
+    def _process_chunk(self, chunk, stats):
+        valid = []
+        for line_number, record in chunk:
+            try:
+                valid.append(self._build(record))
+            except ValidationError as e:
+                stats['rejected'] += 1
+                self.stderr.write(f"Row {line_number}: {self._format_errors(e)}")
+                if self.max_errors and stats['rejected'] >= self.max_errors:
+                    raise CommandError(
+                        f"Aborting after {stats['rejected']} rejected rows; fix the input and rerun with --resume"
+                    )
+
+        if valid and not self.dry_run:
+            with transaction.atomic():
+                if self.method == 'copy':
+                    property_ids = self._load_copy(valid)
+                else:
+                    property_ids = self._load_bulk(valid)
+                spatial.refresh_nearest_campus(property_ids)
+                # Rows that listed their nearby places keep them as given
+                spatial.refresh_nearby_places(
+                    [pk for pk, (_, _, nearby_places) in zip(property_ids, valid) if not nearby_places]
+                )
+                # Bulk inserts send no model signals
+                transaction.on_commit(tiles.bump_tiles_version)
+        stats['rows'] += len(chunk)
+        stats['loaded'] += len(valid)
+
+    def _build(self, record):
+        """Validate a record and return ``(property, amenity_ids, nearby_places)``."""
+        errors = {}
+        instance = Properties()
+        for field in Properties._meta.concrete_fields:
+            if field.primary_key or field.name in ('location',) + DERIVED_KEYS or field.name not in record:
+                continue
+            value = record[field.name]
+            if isinstance(field, models.BooleanField) and isinstance(value, str):
+                value = BOOLEAN_STRINGS.get(value.strip().lower(), value)
+            try:
+                setattr(instance, field.attname, field.to_python(value))
+            except ValidationError as e:
+                errors[field.name] = e.messages
+
+        unknown = set(record) - {f.name for f in Properties._meta.concrete_fields}
+        unknown -= set(RELATION_KEYS + LOCATION_KEYS + IGNORED_KEYS + DERIVED_KEYS)
+        if unknown:
+            errors['__all__'] = [f"Unknown columns: {', '.join(sorted(unknown))}"]
+
+        try:
+            instance.location = self._parse_location(record)
+        except (ValueError, TypeError, GEOSException) as e:
+            errors['location'] = [str(e)]
+
+        try:
+            amenity_ids = self._parse_amenity_ids(record.get('amenity_ids'))
+        except (ValueError, TypeError) as e:
+            errors['amenity_ids'] = [str(e)]
+            amenity_ids = []
+
+        try:
+            nearby_places = self._parse_nearby_places(record.get('nearby_places'))
+        except (ValueError, TypeError, KeyError) as e:
+            errors['nearby_places'] = [str(e)]
+            nearby_places = []
+
+        if errors:
+            raise ValidationError(errors)
+
+        instance.full_clean(exclude=['location'], validate_unique=False, validate_constraints=False)
+        return instance, amenity_ids, nearby_places
+
+    def _parse_location(self, record):
+        value = record.get('location')
+        if value is None and 'longitude' in record and 'latitude' in record:
+            return Point(float(record['longitude']), float(record['latitude']), srid=4326)
+        if value is None:
+            return None
+        if isinstance(value, dict):
+            value = json.dumps(value)
+        geometry = GEOSGeometry(value)
+        if geometry.geom_type != 'Point':
+            raise ValueError(f"Expected a Point, got {geometry.geom_type}")
+        if geometry.srid is None:
+            geometry.srid = 4326
+        elif geometry.srid != 4326:
+            geometry.transform(4326)
+        return geometry
+
+    def _parse_amenity_ids(self, value):
+        if value in (None, ''):
+            return []
+        if isinstance(value, str):
+            value = value.strip()
+            if value.startswith('['):
+                value = json.loads(value)
+            else:
+                value = [part for part in value.replace(';', '|').split('|') if part.strip()]
+        ids = {int(amenity_id) for amenity_id in value}
+        invalid = ids - self.amenity_ids
+        if invalid:
+            raise ValueError(f"Invalid amenity IDs: {sorted(invalid)}")
+        return sorted(ids)
+
+    def _parse_nearby_places(self, value):
+        if value in (None, ''):
+            return []
+        if isinstance(value, str):
+            value = json.loads(value)
+        places = {}
+        for item in value:
+            place_id = int(item.get('place_id', item.get('place')))
+            if place_id not in self.place_ids:
+                raise ValueError(f"Invalid nearby place ID: {place_id}")
+            places[place_id] = (
+                PropertyNearByPlaces._meta.get_field('distance').to_python(item['distance']),
+                int(item['walking_time']),
+            )
+        return [(place_id, distance, walking_time) for place_id, (distance, walking_time) in places.items()]
+
+    # Loaders
+    def _load_bulk(self, rows):
+        instances = Properties.objects.bulk_create([instance for instance, _, _ in rows])
+        amenities = []
+        nearby = []
+        for instance, (_, amenity_ids, nearby_places) in zip(instances, rows):
+            amenities.extend(
+                PropertyAmenity(property_id=instance.pk, amenity_id=amenity_id) for amenity_id in amenity_ids
+            )
+            nearby.extend(
+                PropertyNearByPlaces(
+                    property_id=instance.pk, place_id=place_id, distance=distance, walking_time=walking_time
+                )
+                for place_id, distance, walking_time in nearby_places
+            )
+        PropertyAmenity.objects.bulk_create(amenities, ignore_conflicts=True)
+        PropertyNearByPlaces.objects.bulk_create(nearby, ignore_conflicts=True)
+        return [instance.pk for instance in instances]
+
+    def _load_copy(self, rows):
+        table = Properties._meta.db_table
+        pk_column = Properties._meta.pk.column
+        with connection.cursor() as cursor:
+            # Reserve primary keys up front so related rows can be streamed too
+            cursor.execute(
+                "SELECT nextval(pg_get_serial_sequence(%s, %s)) FROM generate_series(1, %s)",
+                [table, pk_column, len(rows)],
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+
+            now = timezone.now()
+            fields = [f for f in Properties._meta.concrete_fields if not f.primary_key]
+            property_rows = []
+            amenity_rows = []
+            nearby_rows = []
+            for pk, (instance, amenity_ids, nearby_places) in zip(ids, rows):
+                instance.pk = pk
+                instance.created_at = instance.updated_at = now
+                values = [pk]
+                for field in fields:
+                    value = getattr(instance, field.attname)
+                    if field.name == 'location' and value is not None:
+                        value = value.ewkt
+                    values.append(value)
+                property_rows.append(values)
+                amenity_rows.extend((pk, amenity_id) for amenity_id in amenity_ids)
+                nearby_rows.extend(
+                    (pk, place_id, distance, walking_time) for place_id, distance, walking_time in nearby_places
+                )
+
+            _copy_rows(cursor, table, [pk_column] + [f.column for f in fields], property_rows)
+            _copy_rows(cursor, PropertyAmenity._meta.db_table, ['property_id', 'amenity_id'], amenity_rows)
+            _copy_rows(
+                cursor,
+                PropertyNearByPlaces._meta.db_table,
+                ['property_id', 'place_id', 'distance', 'walking_time'],
+                nearby_rows,
+            )
+        return ids
+
+    # Checkpoints and reporting
+    def _load_checkpoint(self, checkpoint_path, source):
+        if not os.path.exists(checkpoint_path):
+            return None
+        with open(checkpoint_path) as f:
+            checkpoint = json.load(f)
+        if checkpoint.get('source') != _source_signature(source):
+            raise CommandError(
+                f"Checkpoint {checkpoint_path} was written for a different version of {source}; "
+                f"delete it to start over"
+            )
+        return checkpoint
+
+    def _save_checkpoint(self, checkpoint_path, source, stats):
+        if self.dry_run:
+            return
+        tmp_path = f"{checkpoint_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'source': _source_signature(source), **stats}, f)
+        os.replace(tmp_path, checkpoint_path)
+
+    def _report(self, stats, started):
+        elapsed = max(time.monotonic() - started, 1e-6)
+        self.stdout.write(
+            f"{stats['rows']} rows read, {stats['loaded']} loaded, {stats['rejected']} rejected "
+            f"({stats['loaded'] / elapsed:.0f} rows/s)"
+        )
+
+    def _format_errors(self, error):
+        if hasattr(error, 'message_dict'):
+            return '; '.join(f"{field}: {' '.join(messages)}" for field, messages in error.message_dict.items())
+        return ' '.join(error.messages)
+
+
+def _source_signature(path):
+    stat = os.stat(path)
+    return {'path': os.path.abspath(path), 'size': stat.st_size, 'mtime': int(stat.st_mtime)}
+
+
+def _copy_value(value):
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    return (
+        str(value)
+        .replace('\\', '\\\\')
+        .replace('\t', '\\t')
+        .replace('\n', '\\n')
+        .replace('\r', '\\r')
+    )
+
+
+def _copy_rows(cursor, table, columns, rows):
+    """Stream rows into ``table`` with COPY ... FROM STDIN (text format)."""
+    if not rows:
+        return
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write('\t'.join(_copy_value(value) for value in row))
+        buffer.write('\n')
+    buffer.seek(0)
+    column_list = ', '.join(connection.ops.quote_name(column) for column in columns)
+    sql = f"COPY {connection.ops.quote_name(table)} ({column_list}) FROM STDIN"
+    if hasattr(cursor, 'copy_expert'):
+        # psycopg2
+        cursor.copy_expert(sql, buffer)
+    else:
+        # psycopg 3
+        with cursor.copy(sql) as copy:
+            copy.write(buffer.getvalue())
@@ -0,0 +1,60 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+
+from properties import spatial
+from properties.models import Properties
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute nearby place links (distance and walking time) and the nearest campus "
+        "of properties with a spatial join"
+    )
+
+    def add_arguments(self, parser):
+        scope = parser.add_mutually_exclusive_group(required=True)
+        scope.add_argument('--all', action='store_true', help="Rebuild the whole catalogue")
+        scope.add_argument('--since', help="Only properties updated at or after this ISO datetime")
+        scope.add_argument('--ids', help="Comma-separated property IDs")
+        parser.add_argument(
+            '--radius',
+            type=int,
+            default=spatial.NEARBY_RADIUS_M,
+            help=f"Link places within this many meters (default: {spatial.NEARBY_RADIUS_M})",
+        )
+        parser.add_argument('--batch-size', type=int, default=5000, help="Properties per statement")
+
+    def handle(self, *args, **options):
+        if options['radius'] <= 0 or options['batch_size'] <= 0:
+            raise CommandError("--radius and --batch-size must be positive")
+
+        queryset = Properties.objects.order_by('id')
+        if options['since']:
+            since = parse_datetime(options['since'])
+            if since is None:
+                raise CommandError(f"Invalid --since datetime: {options['since']}")
+            queryset = queryset.filter(updated_at__gte=since)
+        elif options['ids']:
+            try:
+                ids = [int(value) for value in options['ids'].split(',') if value.strip()]
+            except ValueError:
+                raise CommandError("--ids must be a comma-separated list of integers")
+            queryset = queryset.filter(id__in=ids)
+        property_ids = list(queryset.values_list('id', flat=True))
+
+        started = time.monotonic()
+        linked = campuses = 0
+        for offset in range(0, len(property_ids), options['batch_size']):
+            batch = property_ids[offset:offset + options['batch_size']]
+            with transaction.atomic():
+                linked += spatial.refresh_nearby_places(batch, radius_m=options['radius'])
+                campuses += spatial.refresh_nearest_campus(batch)
+            self.stdout.write(f"Processed {offset + len(batch)}/{len(property_ids)} properties")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Nearby places changed for {linked} and nearest campus for {campuses} of "
+            f"{len(property_ids)} properties in {time.monotonic() - started:.1f}s"
+        ))
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+from properties import scoring
+from properties.models import Properties
+
+
+class Command(BaseCommand):
+    help = (
+        "Compute safety, transportation, amenities and overall scores of properties "
+        "in one vectorized batch"
+    )
+
+    def add_arguments(self, parser):
+        scope = parser.add_mutually_exclusive_group()
+        scope.add_argument('--since', help="Only properties updated at or after this ISO datetime")
+        scope.add_argument('--ids', help="Comma-separated property IDs")
+        scope.add_argument('--missing', action='store_true', help="Only properties without an overall score")
+
+    def handle(self, *args, **options):
+        queryset = Properties.objects.all()
+        if options['since']:
+            since = parse_datetime(options['since'])
+            if since is None:
+                raise CommandError(f"Invalid --since datetime: {options['since']}")
+            queryset = queryset.filter(updated_at__gte=since)
+        elif options['ids']:
+            try:
+                ids = [int(value) for value in options['ids'].split(',') if value.strip()]
+            except ValueError:
+                raise CommandError("--ids must be a comma-separated list of integers")
+            queryset = queryset.filter(id__in=ids)
+        elif options['missing']:
+            queryset = queryset.filter(overall_score__isnull=True)
+
+        started = time.monotonic()
+        scored, changed = scoring.score_properties(queryset)
+        self.stdout.write(self.style.SUCCESS(
+            f"Scored {scored} properties, {changed} changed in {time.monotonic() - started:.1f}s"
+        ))
@@ -0,0 +1,40 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0008_alter_propertymedia_file'),
+        ('universities', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='properties',
+            name='nearest_campus',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='nearest_properties', to='universities.campus'),
+        ),
+        migrations.AddField(
+            model_name='properties',
+            name='nearest_campus_distance',
+            field=models.DecimalField(blank=True, decimal_places=2, help_text='Distance to the nearest campus in kilometers', max_digits=7, null=True),
+        ),
+        # Backfill (later refreshes go through properties.spatial.refresh_nearest_campus)
+        migrations.RunSQL(
+            """
+            UPDATE properties_properties AS p
+            SET nearest_campus_id = nearest.id,
+                nearest_campus_distance = ROUND((ST_DistanceSphere(p.location, nearest.location) / 1000)::numeric, 2)
+            FROM properties_properties AS candidate
+            CROSS JOIN LATERAL (
+                SELECT c.id, c.location
+                FROM universities_campus AS c
+                ORDER BY ST_DistanceSphere(c.location, candidate.location)
+                LIMIT 1
+            ) AS nearest
+            WHERE p.id = candidate.id AND candidate.location IS NOT NULL
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,26 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0009_properties_nearest_campus'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarProperty',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField(help_text='1 is the most similar')),
+                ('score', models.FloatField(help_text='Similarity in (0, 1], higher is more similar')),
+                ('property', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar', to='properties.properties')),
+                ('similar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='properties.properties')),
+            ],
+            options={
+                'verbose_name_plural': 'Similar Properties',
+                'unique_together': {('property', 'rank')},
+            },
+        ),
+    ]
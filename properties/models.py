@@ -63,10 +63,39 @@ class Properties(models.Model):
     amenities_score = models.DecimalField(max_digits=3, decimal_places=1, null=True, blank=True)
     overall_score = models.DecimalField(max_digits=3, decimal_places=1, null=True, blank=True)
 
+    #### derived location data, maintained by properties.spatial
+    nearest_campus = models.ForeignKey(
+        'universities.Campus',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='nearest_properties',
+    )
+    nearest_campus_distance = models.DecimalField(
+        max_digits=7, decimal_places=2, null=True, blank=True, help_text="Distance to the nearest campus in kilometers"
+    )
+
     #### timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored location so save signals can tell whether the property moved
+        instance._loaded_location = instance.__dict__.get('location', models.DEFERRED)
+        return instance
+
+    def location_changed(self):
+        """Whether ``location`` differs from the value loaded from the database."""
+        loaded = getattr(self, '_loaded_location', models.DEFERRED)
+        current = self.__dict__.get('location', models.DEFERRED)
+        if current is models.DEFERRED:
+            return False
+        if loaded is models.DEFERRED or loaded is None or current is None:
+            return loaded is not current
+        return not loaded.equals_exact(current)
+
     def __str__(self):
         return self.name
     class Meta:
@@ -162,3 +191,18 @@ class PropertyNearByPlaces(models.Model):
         verbose_name_plural = "Property NearBy Places"
         unique_together = ('property', 'place')
 
+
+
+class SimilarProperty(models.Model):
+    """Precomputed top-k neighbours of a property, rebuilt offline by properties.recommendations."""
+    property = models.ForeignKey('properties.Properties', on_delete=models.CASCADE, related_name='similar')
+    similar = models.ForeignKey('properties.Properties', on_delete=models.CASCADE, related_name='+')
+    rank = models.PositiveSmallIntegerField(help_text="1 is the most similar")
+    score = models.FloatField(help_text="Similarity in (0, 1], higher is more similar")
+
+    def __str__(self):
+        return f"{self.property_id} ~ {self.similar_id} (#{self.rank})"
+
+    class Meta:
+        verbose_name_plural = "Similar Properties"
+        unique_together = ('property', 'rank')
@@ -0,0 +1,208 @@
+"""
+Property recommendations from a precomputed similarity index.
+
+Every available property is described by a compact feature vector (price,
+type, bedrooms, amenities, location and scores). ``build_index`` finds each
+property's ``TOP_K`` nearest neighbours in that space with blocked NumPy
+matrix products and stores them as ``SimilarProperty`` rows, so serving
+"similar" and "recommended" lists is an indexed lookup of k rows per seed
+property instead of a scan of the catalogue.
+"""
+import numpy as np
+from django.db import transaction
+
+from favourites.models import Favourites
+from properties.models import Properties, PropertyAmenity, SimilarProperty
+from reviews.models import PropertyReview
+
+TOP_K = 20
+
+# Relative weight of each feature block in the distance between two properties
+WEIGHTS = {
+    'price': 2.0,
+    'bedrooms': 1.0,
+    'property_type': 1.5,
+    'amenities': 1.0,
+    'location': 2.0,
+    'scores': 0.5,
+}
+# Properties this far apart (km) differ by one unit of location
+LOCATION_SCALE_KM = 3.0
+KM_PER_DEGREE = 111.32
+
+# Seeds for personal recommendations; reviews rated below MIN_LIKED_RATING are not seeds
+SEED_WEIGHTS = {'favourite': 3.0, 'review': 2.0, 'viewed': 1.0}
+MIN_LIKED_RATING = 4
+MAX_SEEDS = 50
+
+
+def _center(column):
+    """Subtract the mean, imputing missing values with it (0 after centering)."""
+    if not np.isfinite(column).any():
+        return np.zeros_like(column)
+    return np.nan_to_num(column - np.nanmean(column), nan=0.0)
+
+
+def _standardize(column):
+    """Z-score a column, imputing missing values with the mean (0)."""
+    centered = _center(column)
+    std = centered.std()
+    return centered / std if std > 0 else centered
+
+
+def load_vectors(queryset=None):
+    """Return ``(ids, vectors)`` for the properties in ``queryset`` (default: available ones)."""
+    if queryset is None:
+        queryset = Properties.objects.filter(is_available=True)
+    rows = list(queryset.order_by('id').values_list(
+        'id', 'price', 'bedrooms', 'property_type', 'location',
+        'safety_score', 'transportation_score', 'amenities_score', 'overall_score',
+    ))
+    count = len(rows)
+    ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=count)
+    if not count:
+        return ids, np.zeros((0, 0), dtype=np.float32)
+
+    def column(index):
+        return np.fromiter(
+            (np.nan if row[index] is None else row[index] for row in rows), dtype=float, count=count
+        )
+
+    blocks = []
+    blocks.append(WEIGHTS['price'] * _standardize(np.log(column(1).clip(min=1)))[:, None])
+    blocks.append(WEIGHTS['bedrooms'] * _standardize(column(2))[:, None])
+
+    types = [choice for choice, _ in Properties.PROPERTY_TYPE_CHOICES]
+    type_index = {property_type: i for i, property_type in enumerate(types)}
+    one_hot = np.zeros((count, len(types)))
+    for row, (_, _, _, property_type, *_rest) in enumerate(rows):
+        if property_type in type_index:
+            one_hot[row, type_index[property_type]] = 1
+    # Scaled so two different types are WEIGHTS['property_type'] apart
+    blocks.append(WEIGHTS['property_type'] / np.sqrt(2) * one_hot)
+
+    amenity_ids = list(
+        PropertyAmenity.objects.filter(property_id__in=queryset.values('id'))
+        .values_list('amenity_id', flat=True).distinct().order_by('amenity_id')
+    )
+    amenities = np.zeros((count, len(amenity_ids)))
+    amenity_index = {amenity_id: i for i, amenity_id in enumerate(amenity_ids)}
+    for property_id, amenity_id in PropertyAmenity.objects.filter(
+        property_id__in=queryset.values('id')
+    ).values_list('property_id', 'amenity_id'):
+        row = np.searchsorted(ids, property_id)
+        if row < count and ids[row] == property_id:
+            amenities[row, amenity_index[amenity_id]] = 1
+    if amenity_ids:
+        # Normalized so the block stays comparable however many amenities exist
+        norms = np.sqrt(amenities.sum(axis=1, keepdims=True)).clip(min=1)
+        blocks.append(WEIGHTS['amenities'] / np.sqrt(2) * amenities / norms)
+
+    lng = np.fromiter((np.nan if row[4] is None else row[4].x for row in rows), dtype=float, count=count)
+    lat = np.fromiter((np.nan if row[4] is None else row[4].y for row in rows), dtype=float, count=count)
+    if np.isfinite(lat).any():
+        # Equirectangular projection around the catalogue's centre, in LOCATION_SCALE_KM units
+        lat0, lng0 = np.nanmean(lat), np.nanmean(lng)
+        x = (lng - lng0) * KM_PER_DEGREE * np.cos(np.radians(lat0)) / LOCATION_SCALE_KM
+        y = (lat - lat0) * KM_PER_DEGREE / LOCATION_SCALE_KM
+        blocks.append(WEIGHTS['location'] * np.nan_to_num(np.column_stack([x, y]), nan=0.0))
+
+    blocks.append(WEIGHTS['scores'] * np.column_stack([_center(column(i) / 10) for i in range(5, 9)]))
+
+    return ids, np.hstack(blocks).astype(np.float32)
+
+
+def nearest_neighbours(vectors, k=TOP_K, block_size=1000):
+    """
+    Return ``(indices, distances)`` of each row's ``k`` nearest other rows.
+
+    Squared Euclidean distances are computed a block of rows at a time
+    (|a|^2 + |b|^2 - 2 a.b), so memory stays at ``block_size`` x n.
+    """
+    count = len(vectors)
+    k = min(k, count - 1)
+    if k <= 0:
+        return np.zeros((count, 0), dtype=np.int64), np.zeros((count, 0))
+    squared = np.einsum('ij,ij->i', vectors, vectors)
+    indices = np.empty((count, k), dtype=np.int64)
+    distances = np.empty((count, k))
+    for start in range(0, count, block_size):
+        block = vectors[start:start + block_size]
+        rows = np.arange(len(block))
+        d2 = squared[start:start + block_size, None] + squared[None, :] - 2 * block @ vectors.T
+        d2[rows, rows + start] = np.inf
+        top = np.argpartition(d2, k - 1, axis=1)[:, :k]
+        top_d2 = np.take_along_axis(d2, top, axis=1)
+        order = np.argsort(top_d2, axis=1, kind='stable')
+        indices[start:start + len(block)] = np.take_along_axis(top, order, axis=1)
+        distances[start:start + len(block)] = np.sqrt(np.take_along_axis(top_d2, order, axis=1).clip(min=0))
+    return indices, distances
+
+
+@transaction.atomic
+def build_index(k=TOP_K, queryset=None):
+    """Rebuild the ``SimilarProperty`` index; returns the number of properties indexed."""
+    ids, vectors = load_vectors(queryset)
+    indices, distances = nearest_neighbours(vectors, k)
+    SimilarProperty.objects.all().delete()
+    SimilarProperty.objects.bulk_create(
+        (
+            SimilarProperty(
+                property_id=int(ids[row]),
+                similar_id=int(ids[indices[row, rank]]),
+                rank=rank + 1,
+                score=round(float(1 / (1 + distances[row, rank])), 4),
+            )
+            for row in range(len(ids))
+            for rank in range(indices.shape[1])
+        ),
+        batch_size=5000,
+    )
+    return len(ids)
+
+
+def similar_ids(property_id, limit=10):
+    """IDs of the properties most similar to ``property_id``, best first."""
+    return list(
+        SimilarProperty.objects.filter(property_id=property_id)
+        .order_by('rank').values_list('similar_id', flat=True)[:limit]
+    )
+
+
+def seed_weights(user=None, viewed_ids=()):
+    """Weighted seed properties from a user's favourites, good reviews and recent views."""
+    seeds = {}
+    for property_id in list(viewed_ids)[:MAX_SEEDS]:
+        seeds[property_id] = seeds.get(property_id, 0) + SEED_WEIGHTS['viewed']
+    if user is not None and user.is_authenticated:
+        favourites = Favourites.objects.filter(user=user).order_by('-added_at')
+        for property_id in favourites.values_list('property_id', flat=True)[:MAX_SEEDS]:
+            seeds[property_id] = seeds.get(property_id, 0) + SEED_WEIGHTS['favourite']
+        reviews = PropertyReview.objects.filter(reviewer=user, rating__gte=MIN_LIKED_RATING).order_by('-created_at')
+        for property_id in reviews.values_list('property_id', flat=True)[:MAX_SEEDS]:
+            seeds[property_id] = seeds.get(property_id, 0) + SEED_WEIGHTS['review']
+    return seeds
+
+
+def recommended_ids(user=None, viewed_ids=(), limit=10):
+    """
+    IDs of properties to recommend, best first.
+
+    Each seed's precomputed neighbours vote with ``seed weight x similarity``;
+    seeds themselves are not recommended. Without any seeds, the best scored
+    properties are returned.
+    """
+    seeds = seed_weights(user, viewed_ids)
+    if not seeds:
+        return list(
+            Properties.objects.filter(is_available=True, overall_score__isnull=False)
+            .order_by('-overall_score', '-view_count').values_list('id', flat=True)[:limit]
+        )
+    votes = {}
+    for property_id, similar_id, score in SimilarProperty.objects.filter(
+        property_id__in=seeds
+    ).values_list('property_id', 'similar_id', 'score'):
+        if similar_id not in seeds:
+            votes[similar_id] = votes.get(similar_id, 0) + seeds[property_id] * score
+    return sorted(votes, key=lambda similar_id: (-votes[similar_id], similar_id))[:limit]
+
@@ -0,0 +1,179 @@
+"""
+Batch scoring of properties.
+
+Features for every property in scope are loaded with a handful of
+aggregate queries into NumPy arrays, the safety, transportation, amenities
+and overall scores (0-10, one decimal) are computed with array operations,
+and the results are written back in one UPDATE that only touches rows whose
+scores changed.
+"""
+from collections import namedtuple
+
+import numpy as np
+from django.db import connection
+from django.db.models import Count, Min
+
+from properties.models import NearByPlaces, Properties, PropertyAmenity, PropertyNearByPlaces
+
+PLACE_TYPES = [choice for choice, _ in NearByPlaces.PLACE_TYPE_CHOICES]
+SERVICE_TYPES = ['grocery', 'restaurant', 'cafe', 'gym', 'library', 'park', 'hospital', 'pharmacy']
+SAFE_ELECTRICITY = ('Individual', 'Submetered')
+
+# Weights of the component scores in overall_score; value is price per bedroom
+OVERALL_WEIGHTS = {'safety': 0.3, 'transportation': 0.25, 'amenities': 0.2, 'value': 0.25}
+
+SCORE_FIELDS = ['safety_score', 'transportation_score', 'amenities_score', 'overall_score']
+
+Features = namedtuple('Features', [
+    'ids',
+    'price_per_bedroom',    # NaN when bedrooms is unknown
+    'campus_km',            # NaN when not computed
+    'is_fenced',
+    'safe_electricity',
+    'amenity_count',
+    'place_counts',         # (properties, PLACE_TYPES) nearby place counts
+    'place_nearest_km',     # (properties, PLACE_TYPES) nearest place distance, NaN when none
+])
+
+
+def load_features(queryset):
+    """Load the scoring features of every property in ``queryset``."""
+    rows = list(queryset.order_by('id').values_list(
+        'id', 'price', 'bedrooms', 'nearest_campus_distance', 'is_fenced', 'electricity_type',
+    ))
+    count = len(rows)
+    ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=count)
+    price = np.fromiter((row[1] for row in rows), dtype=float, count=count)
+    bedrooms = np.fromiter((row[2] or np.nan for row in rows), dtype=float, count=count)
+    campus_km = np.fromiter(
+        (np.nan if row[3] is None else row[3] for row in rows), dtype=float, count=count
+    )
+    is_fenced = np.fromiter((bool(row[4]) for row in rows), dtype=bool, count=count)
+    safe_electricity = np.fromiter((row[5] in SAFE_ELECTRICITY for row in rows), dtype=bool, count=count)
+
+    # Rows are ordered by id, so related aggregates map back with searchsorted
+    def row_of(property_id):
+        row = np.searchsorted(ids, property_id)
+        # A property created after the first query has no row
+        return row if row < count and ids[row] == property_id else None
+
+    id_filter = {'property_id__in': queryset.values('id')}
+    amenity_count = np.zeros(count)
+    for property_id, amenities in (
+        PropertyAmenity.objects.filter(**id_filter)
+        .values_list('property_id').annotate(total=Count('id')).order_by()
+    ):
+        row = row_of(property_id)
+        if row is not None:
+            amenity_count[row] = amenities
+
+    place_counts = np.zeros((count, len(PLACE_TYPES)))
+    place_nearest_km = np.full((count, len(PLACE_TYPES)), np.nan)
+    type_index = {place_type: i for i, place_type in enumerate(PLACE_TYPES)}
+    for property_id, place_type, places, nearest in (
+        PropertyNearByPlaces.objects.filter(**id_filter)
+        .values_list('property_id', 'place__place_type')
+        .annotate(total=Count('id'), nearest=Min('distance')).order_by()
+    ):
+        row = row_of(property_id)
+        if row is None:
+            continue
+        place_counts[row, type_index[place_type]] = places
+        place_nearest_km[row, type_index[place_type]] = float(nearest)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        price_per_bedroom = price / bedrooms
+    return Features(
+        ids, price_per_bedroom, campus_km, is_fenced, safe_electricity, amenity_count,
+        place_counts, place_nearest_km,
+    )
+
+
+def reference_prices():
+    """Sorted price per bedroom of the whole catalogue, to rank value against."""
+    rows = Properties.objects.filter(bedrooms__gt=0).values_list('price', 'bedrooms')
+    values = np.fromiter((float(price) / bedrooms for price, bedrooms in rows), dtype=float)
+    values.sort()
+    return values
+
+
+def _saturating(count, half):
+    """0 for no items, approaching 1 as ``count`` grows; 0.5 at ``half`` items."""
+    return 1 - np.power(0.5, count / half)
+
+
+def _closeness(distance_km, zero_at_km):
+    """1 at distance 0 falling linearly to 0 at ``zero_at_km``; 0 when unknown."""
+    return np.nan_to_num(np.clip(1 - distance_km / zero_at_km, 0, 1), nan=0.0)
+
+
+def compute_scores(features, reference):
+    """Return an (n, 4) array of safety, transportation, amenities and overall scores."""
+    column = {place_type: i for i, place_type in enumerate(PLACE_TYPES)}
+    counts = features.place_counts
+    nearest = features.place_nearest_km
+
+    medical_km = np.fmin(nearest[:, column['hospital']], nearest[:, column['pharmacy']])
+    safety = (
+        3
+        + 3 * features.is_fenced
+        + 1 * features.safe_electricity
+        + 1.5 * _closeness(medical_km, 2)
+        + 1.5 * _closeness(features.campus_km, 5)
+    )
+
+    transportation = (
+        6 * _saturating(counts[:, column['transport']], 2)
+        + 2.5 * _closeness(nearest[:, column['transport']], 1.5)
+        + 1.5 * _closeness(features.campus_km, 3)
+    )
+
+    service_columns = [column[place_type] for place_type in SERVICE_TYPES]
+    service_types_nearby = (counts[:, service_columns] > 0).sum(axis=1)
+    amenities = 5 * _saturating(features.amenity_count, 3) + 5 * _saturating(service_types_nearby, 3)
+
+    # Share of the catalogue that is cheaper per bedroom; unknown prices score neutral
+    if len(reference):
+        cheaper = np.searchsorted(reference, features.price_per_bedroom, side='left') / len(reference)
+    else:
+        cheaper = np.full(len(features.ids), 0.5)
+    value = 10 * (1 - np.where(np.isnan(features.price_per_bedroom), 0.5, cheaper))
+
+    overall = (
+        OVERALL_WEIGHTS['safety'] * safety
+        + OVERALL_WEIGHTS['transportation'] * transportation
+        + OVERALL_WEIGHTS['amenities'] * amenities
+        + OVERALL_WEIGHTS['value'] * value
+    )
+    scores = np.column_stack([safety, transportation, amenities, overall])
+    return np.round(np.clip(scores, 0, 10), 1)
+
+
+def write_scores(ids, scores):
+    """Write scores with a single UPDATE ... FROM unnest(); returns the number of rows changed."""
+    if not len(ids):
+        return 0
+    table = Properties._meta.db_table
+    assignments = ', '.join(f"{field} = s.{field}" for field in SCORE_FIELDS)
+    current = ', '.join(f"p.{field}" for field in SCORE_FIELDS)
+    new = ', '.join(f"s.{field}" for field in SCORE_FIELDS)
+    sql = f"""
+        UPDATE {table} AS p
+        SET {assignments}, updated_at = NOW()
+        FROM unnest(%s::bigint[], %s::numeric[], %s::numeric[], %s::numeric[], %s::numeric[])
+            AS s(id, {', '.join(SCORE_FIELDS)})
+        WHERE p.id = s.id AND ({current}) IS DISTINCT FROM ({new})
+    """
+    params = [ids.tolist()] + [scores[:, i].tolist() for i in range(len(SCORE_FIELDS))]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+
+def score_properties(queryset=None):
+    """Score the properties in ``queryset`` (default: all); returns (scored, changed)."""
+    if queryset is None:
+        queryset = Properties.objects.all()
+    features = load_features(queryset)
+    scores = compute_scores(features, reference_prices())
+    return len(features.ids), write_scores(features.ids, scores)
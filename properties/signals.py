@@ -0,0 +1,104 @@
+from django.contrib.gis.geos import GEOSGeometry
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from properties import amenities, fragments, spatial, tiles
+from properties.models import Amenity, NearByPlaces, Properties, PropertyAmenity, PropertyMedia
+from reviews.models import PropertyReview
+from universities.models import Campus
+
+
+def refresh_location_data(property_ids):
+    spatial.refresh_nearest_campus(property_ids)
+    spatial.refresh_nearby_places(property_ids)
+
+
+@receiver(post_save, sender=Properties)
+def property_saved(sender, instance, created, raw=False, **kwargs):
+    """Refresh derived location data when a property is created or moved."""
+    if raw:
+        return
+    if created or instance.location_changed():
+        property_id = instance.pk
+        transaction.on_commit(lambda: refresh_location_data([property_id]))
+    # Tiles also show price and availability, so any save redraws the tiles of both locations
+    points = _points(instance.__dict__.get('location'), getattr(instance, '_loaded_location', None))
+    transaction.on_commit(lambda: tiles.invalidate_points(points))
+    instance._loaded_location = instance.__dict__.get('location')
+
+
+@receiver(post_delete, sender=Properties)
+def property_deleted(sender, instance, **kwargs):
+    points = _points(instance.__dict__.get('location'))
+    transaction.on_commit(lambda: tiles.invalidate_points(points))
+
+
+def _points(*values):
+    """The distinct loaded point values, skipping deferred and empty ones."""
+    points = []
+    for value in values:
+        if isinstance(value, GEOSGeometry) and not any(value.equals_exact(point) for point in points):
+            points.append(value)
+    return points
+
+
+@receiver(post_save, sender=Amenity)
+@receiver(post_delete, sender=Amenity)
+def amenity_changed(sender, raw=False, **kwargs):
+    """Reload the in-process amenity registry of every worker."""
+    if raw:
+        return
+    transaction.on_commit(amenities.invalidate)
+
+
+@receiver(post_save, sender=PropertyReview)
+@receiver(post_delete, sender=PropertyReview)
+@receiver(post_save, sender=PropertyMedia)
+@receiver(post_delete, sender=PropertyMedia)
+@receiver(post_save, sender=PropertyAmenity)
+@receiver(post_delete, sender=PropertyAmenity)
+def property_part_changed(sender, instance, raw=False, using=None, **kwargs):
+    """Reviews, media and amenity links are part of the serialized property; mark it changed."""
+    if raw:
+        return
+    fragments.touch(instance.property_id, using=using)
+
+
+@receiver(post_save, sender=Campus)
+def campus_saved(sender, instance, created, raw=False, **kwargs):
+    """Refresh the nearest campus of the properties a new or moved campus can reach."""
+    if raw:
+        return
+    # Renames don't touch the properties, but their nearest_campus_name changes
+    transaction.on_commit(fragments.invalidate)
+    if created or instance.location_changed():
+        campus_id, location = instance.pk, instance.location
+        transaction.on_commit(
+            lambda: spatial.refresh_nearest_campus(spatial.properties_near_campus(campus_id, location))
+        )
+    instance._loaded_location = instance.__dict__.get('location')
+
+
+@receiver(post_delete, sender=Campus)
+def campus_deleted(sender, instance, **kwargs):
+    """The properties a removed campus served are left without one; find them another."""
+    transaction.on_commit(fragments.invalidate)
+    campus_id = instance.pk
+    transaction.on_commit(lambda: spatial.refresh_nearest_campus(spatial.properties_near_campus(campus_id)))
+
+
+@receiver(post_save, sender=NearByPlaces)
+def place_saved(sender, instance, raw=False, **kwargs):
+    """Relink the properties around a new or moved place, including those it moved away from."""
+    if raw:
+        return
+    transaction.on_commit(fragments.invalidate)
+    transaction.on_commit(lambda: spatial.refresh_nearby_places(spatial.properties_near(instance)))
+
+
+@receiver(pre_delete, sender=NearByPlaces)
+def place_deleted(sender, instance, **kwargs):
+    """Links cascade away with the place; mark the affected properties as changed."""
+    Properties.objects.filter(nearby_places__place=instance).update(updated_at=timezone.now())
@@ -0,0 +1,217 @@
+"""
+Set-based maintenance of derived location data on properties.
+
+Each refresh is a single statement over the affected properties that only
+writes rows whose value actually changes, bumping ``updated_at`` on changed
+properties so cached representations are invalidated. Candidates come from
+the GiST indexes on the ``location`` columns (KNN ``<->`` scans or bounding
+box matches); distances are measured on the sphere.
+"""
+from django.contrib.gis.measure import D
+from django.db import connection
+from django.db.models import F, FloatField, Func
+
+from properties.models import NearByPlaces, Properties, PropertyNearByPlaces
+from universities.models import Campus
+
+# KNN ranks by planar distance in degrees; re-rank a few candidates on the
+# sphere so the answer is exact away from the equator too
+KNN_CANDIDATES = 3
+
+# Places within this straight-line distance are linked to a property
+NEARBY_RADIUS_M = 2000
+# Walking time assumes 4.8 km/h along streets ~30% longer than the straight line
+WALKING_METERS_PER_MINUTE = 80
+WALKING_DETOUR_FACTOR = 1.3
+
+NEAREST_CAMPUS_SQL = """
+    UPDATE {properties} AS p
+    SET nearest_campus_id = nearest.campus_id,
+        nearest_campus_distance = nearest.distance_km,
+        updated_at = NOW()
+    FROM (
+        SELECT candidate.id AS property_id, campus.id AS campus_id, campus.distance_km
+        FROM {properties} AS candidate
+        LEFT JOIN LATERAL (
+            SELECT knn.id, ROUND((knn.meters / 1000)::numeric, 2) AS distance_km
+            FROM (
+                SELECT c.id, ST_DistanceSphere(c.location, candidate.location) AS meters
+                FROM {campuses} AS c
+                WHERE candidate.location IS NOT NULL
+                ORDER BY c.location <-> candidate.location
+                LIMIT {candidates}
+            ) AS knn
+            ORDER BY knn.meters
+            LIMIT 1
+        ) AS campus ON TRUE
+        {where}
+    ) AS nearest
+    WHERE p.id = nearest.property_id
+      AND (
+          p.nearest_campus_id IS DISTINCT FROM nearest.campus_id
+          OR p.nearest_campus_distance IS DISTINCT FROM nearest.distance_km
+      )
+"""
+
+
+def refresh_nearest_campus(property_ids=None):
+    """
+    Recompute ``nearest_campus`` and ``nearest_campus_distance``.
+
+    Only ``property_ids`` are refreshed, or the whole catalogue when None.
+    Returns the number of properties whose nearest campus changed.
+    """
+    params = []
+    where = ''
+    if property_ids is not None:
+        property_ids = list(property_ids)
+        if not property_ids:
+            return 0
+        where = 'WHERE candidate.id = ANY(%s)'
+        params.append(property_ids)
+
+    sql = NEAREST_CAMPUS_SQL.format(
+        properties=Properties._meta.db_table,
+        campuses=Campus._meta.db_table,
+        candidates=KNN_CANDIDATES,
+        where=where,
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+
+# Stored campus distances are rounded to 10 m; compare with half of that to spare
+DISTANCE_ROUNDING_M = 5
+
+CAMPUS_REACH_SQL = """
+    SELECT id FROM {properties}
+    WHERE location IS NOT NULL
+      AND (
+          nearest_campus_id IS NULL
+          OR nearest_campus_id = %(campus)s
+          {closer}
+      )
+"""
+
+
+def properties_near_campus(campus_id, location=None):
+    """
+    IDs of properties whose nearest campus can change with a campus change.
+
+    These are the properties the campus served (what it moves away from),
+    those without a campus and, for a campus at ``location``, those closer to
+    it than to their current nearest campus. Pass no location for a removed
+    campus.
+    """
+    params = {'campus': campus_id, 'slack': DISTANCE_ROUNDING_M}
+    closer = ''
+    if location is not None:
+        closer = (
+            'OR ST_DistanceSphere(location, ST_GeomFromEWKT(%(point)s))'
+            ' <= nearest_campus_distance * 1000 + %(slack)s'
+        )
+        params['point'] = location.ewkt
+    sql = CAMPUS_REACH_SQL.format(properties=Properties._meta.db_table, closer=closer)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+NEARBY_PLACES_SQL = """
+    WITH scope AS (
+        SELECT id, location FROM {properties} {where}
+    ),
+    candidates AS (
+        SELECT scope.id AS property_id, n.id AS place_id,
+               ST_DistanceSphere(scope.location, n.location) AS meters
+        FROM scope
+        JOIN {places} AS n
+          -- Index-assisted bounding box in degrees, then the exact distance on the sphere
+          ON ST_DWithin(
+              n.location, scope.location,
+              %(radius)s / 111320.0 / GREATEST(COS(RADIANS(ST_Y(scope.location))), 0.01)
+          )
+        WHERE scope.location IS NOT NULL
+          AND ST_DistanceSphere(scope.location, n.location) <= %(radius)s
+    ),
+    upserted AS (
+        INSERT INTO {links} AS link (property_id, place_id, distance, walking_time)
+        SELECT property_id, place_id,
+               ROUND((meters / 1000)::numeric, 2),
+               GREATEST(1, CEIL(meters * %(detour)s / %(speed)s))::integer
+        FROM candidates
+        ON CONFLICT (property_id, place_id) DO UPDATE
+            SET distance = EXCLUDED.distance, walking_time = EXCLUDED.walking_time
+            WHERE (link.distance, link.walking_time) IS DISTINCT FROM (EXCLUDED.distance, EXCLUDED.walking_time)
+        RETURNING property_id
+    ),
+    deleted AS (
+        DELETE FROM {links} AS link
+        USING scope
+        WHERE link.property_id = scope.id
+          AND NOT EXISTS (
+              SELECT 1 FROM candidates
+              WHERE candidates.property_id = link.property_id AND candidates.place_id = link.place_id
+          )
+        RETURNING link.property_id
+    )
+    UPDATE {properties}
+    SET updated_at = NOW()
+    WHERE id IN (SELECT property_id FROM upserted UNION SELECT property_id FROM deleted)
+"""
+
+
+def refresh_nearby_places(property_ids=None, radius_m=NEARBY_RADIUS_M):
+    """
+    Link properties to every ``NearByPlaces`` within ``radius_m``.
+
+    Distances and walking times are computed in one spatial join and
+    upserted; links to places that are no longer in range are removed.
+    Only ``property_ids`` are refreshed, or the whole catalogue when None.
+    Returns the number of properties whose links changed.
+    """
+    params = {
+        'radius': radius_m,
+        'detour': WALKING_DETOUR_FACTOR,
+        'speed': WALKING_METERS_PER_MINUTE,
+    }
+    where = ''
+    if property_ids is not None:
+        property_ids = list(property_ids)
+        if not property_ids:
+            return 0
+        where = 'WHERE id = ANY(%(ids)s)'
+        params['ids'] = property_ids
+
+    sql = NEARBY_PLACES_SQL.format(
+        properties=Properties._meta.db_table,
+        places=NearByPlaces._meta.db_table,
+        links=PropertyNearByPlaces._meta.db_table,
+        where=where,
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+
+def properties_near(place, radius_m=NEARBY_RADIUS_M):
+    """IDs of properties that are, or were, within range of ``place``."""
+    linked = PropertyNearByPlaces.objects.filter(place=place).values_list('property_id', flat=True)
+    in_range = Properties.objects.filter(
+        location__distance_lte=(place.location, D(m=radius_m))
+    ).values_list('id', flat=True)
+    return set(linked) | set(in_range)
+
+
+def with_coordinates(queryset):
+    """
+    Load ``location`` as plain ``location_lng``/``location_lat`` floats instead of a geometry.
+
+    Serializers using ``PointCoordinatesField`` then emit GeoJSON without a
+    GEOS object per row. For read paths only: ``location`` itself is deferred.
+    """
+    return queryset.defer('location').annotate(
+        location_lng=Func(F('location'), function='ST_X', output_field=FloatField()),
+        location_lat=Func(F('location'), function='ST_Y', output_field=FloatField()),
+    )
@@ -0,0 +1,293 @@
+"""
+Synthetic catalogue generator for local load testing.
+
+Everything is created with ``bulk_create`` around the seeded Dar es Salaam
+universities, so tens of thousands of rows load in seconds. A fixed ``seed``
+always produces the same dataset shape.
+"""
+import math
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.gis.geos import Point
+from django.core.management import call_command
+from django.db import transaction
+from django.utils import timezone
+
+from favourites.models import Favourites
+from properties import spatial, tiles
+from properties.models import Amenity, NearByPlaces, Properties, PropertyAmenity
+from reviews.models import PropertyReview
+from universities.models import University
+from user_messages.models import Enquiry, EnquiryMessage, EnquiryStatus
+from users.models import StudentProfile, User
+
+EMAIL_DOMAIN = 'synthetic.campusstay.test'
+DEFAULT_PASSWORD = 'campusstay-synthetic'
+
+METERS_PER_DEGREE = 111320
+
+NEIGHBOURHOODS = [
+    'Sinza', 'Mwenge', 'Ubungo', 'Mikocheni', 'Kijitonyama', 'Makumbusho',
+    'Mabibo', 'Kinondoni', 'Upanga', 'Kariakoo', 'Tabata', 'Survey', 'Changanyikeni',
+]
+STREETS = ['Shekilango Rd', 'Sam Nujoma Rd', 'Morogoro Rd', 'Bagamoyo Rd', 'Mandela Rd', 'Kawawa Rd']
+FIRST_NAMES = ['Amani', 'Neema', 'Baraka', 'Rehema', 'Juma', 'Zawadi', 'Hamisi', 'Upendo', 'Faraja', 'Imani']
+LAST_NAMES = ['Mushi', 'Mollel', 'Kimaro', 'Mwakyusa', 'Swai', 'Massawe', 'Lema', 'Mrema', 'Shirima', 'Temba']
+COURSES = ['Computer Science', 'Civil Engineering', 'Accounting', 'Law', 'Medicine', 'Architecture', 'Education']
+REVIEW_COMMENTS = [
+    'Close to campus and quiet at night.',
+    'Water supply is reliable, landlord responds quickly.',
+    'A bit pricey for the size but well maintained.',
+    'Power cuts sometimes, otherwise great.',
+    'Secure compound and friendly neighbours.',
+    'Rooms are small and transport is far.',
+]
+MESSAGE_TEMPLATES = [
+    'Is this room still available for next semester?',
+    'Can I come and view the property this weekend?',
+    'Is water and electricity included in the rent?',
+    'Yes, it is still available. When would you like to visit?',
+    'The rent is payable every three months.',
+]
+
+# property_type: (weight, monthly price range in TZS, bedroom range)
+PROPERTY_PROFILES = {
+    'single_room': (30, (60000, 150000), (1, 1)),
+    'shared_room': (15, (40000, 90000), (1, 1)),
+    'master_bedroom': (12, (100000, 250000), (1, 1)),
+    'self_contained': (15, (150000, 350000), (1, 1)),
+    'hostel': (10, (50000, 120000), (1, 4)),
+    'apartment': (10, (300000, 900000), (1, 3)),
+    'house': (5, (400000, 1500000), (2, 5)),
+    'condo': (3, (600000, 2000000), (2, 4)),
+}
+
+
+def random_point_near(rng, origin, mean_km=1.5, max_km=6):
+    """Random point around ``origin``, denser close to it."""
+    distance = min(rng.expovariate(1 / (mean_km * 1000)), max_km * 1000)
+    bearing = rng.uniform(0, 2 * math.pi)
+    dy = distance * math.cos(bearing)
+    dx = distance * math.sin(bearing)
+    latitude = origin.y + dy / METERS_PER_DEGREE
+    longitude = origin.x + dx / (METERS_PER_DEGREE * math.cos(math.radians(origin.y)))
+    return Point(round(longitude, 7), round(latitude, 7), srid=4326)
+
+
+def generate(properties=0, users=0, reviews=0, messages=0, favourites=0, places=None, seed=None, log=None):
+    """Create a synthetic dataset and return the number of rows per model."""
+    rng = random.Random(seed)
+    log = log or (lambda message: None)
+
+    if not University.objects.exists():
+        call_command('seed_universities')
+    if not Amenity.objects.exists():
+        call_command('seed_amenities')
+    universities = list(University.objects.all())
+    amenity_ids = list(Amenity.objects.values_list('id', flat=True))
+
+    counts = {}
+    with transaction.atomic():
+        if places is None:
+            places = max(20, properties // 10) if properties else 0
+        counts['places'] = _create_places(rng, universities, places)
+        log(f"Created {counts['places']} nearby places")
+
+        property_ids = _create_properties(rng, universities, amenity_ids, properties)
+        counts['properties'] = len(property_ids)
+        spatial.refresh_nearest_campus(property_ids)
+        spatial.refresh_nearby_places(property_ids)
+        transaction.on_commit(tiles.bump_tiles_version)
+        log(f"Created {counts['properties']} properties")
+
+        student_users = _create_students(rng, universities, users)
+        counts['users'] = len(student_users)
+        log(f"Created {counts['users']} student users")
+
+        # Relations link this run's properties and students; the existing catalogue is only
+        # used when the run created none (e.g. adding reviews to an already seeded database)
+        all_property_ids = property_ids or list(Properties.objects.values_list('id', flat=True))
+        all_students = student_users or list(
+            User.objects.filter(roles='student', student_profile__isnull=False).select_related('student_profile')
+        )
+
+        counts['reviews'] = _create_reviews(rng, all_students, all_property_ids, reviews)
+        counts['favourites'] = _create_favourites(rng, all_students, all_property_ids, favourites)
+        counts['messages'] = _create_messages(rng, all_students, all_property_ids, messages)
+        log(
+            f"Created {counts['reviews']} reviews, {counts['favourites']} favourites "
+            f"and {counts['messages']} enquiry messages"
+        )
+    return counts
+
+
+def _create_places(rng, universities, count):
+    if not count:
+        return 0
+    place_types = [choice for choice, _ in NearByPlaces.PLACE_TYPE_CHOICES]
+    objs = []
+    for i in range(count):
+        university = rng.choice(universities)
+        place_type = rng.choice(place_types)
+        area = rng.choice(NEIGHBOURHOODS)
+        objs.append(NearByPlaces(
+            name=f"{area} {dict(NearByPlaces.PLACE_TYPE_CHOICES)[place_type]} {i + 1}",
+            place_type=place_type,
+            location=random_point_near(rng, university.location, mean_km=2),
+            address=f"{rng.choice(STREETS)}, {area}, Dar es Salaam",
+        ))
+    return len(NearByPlaces.objects.bulk_create(objs, batch_size=1000))
+
+
+def _create_properties(rng, universities, amenity_ids, count):
+    if not count:
+        return []
+    types = list(PROPERTY_PROFILES)
+    weights = [PROPERTY_PROFILES[t][0] for t in types]
+    today = timezone.now().date()
+    objs = []
+    for _ in range(count):
+        property_type = rng.choices(types, weights)[0]
+        _, (min_price, max_price), (min_beds, max_beds) = PROPERTY_PROFILES[property_type]
+        university = rng.choice(universities)
+        area = rng.choice(NEIGHBOURHOODS)
+        bedrooms = rng.randint(min_beds, max_beds)
+        label = dict(Properties.PROPERTY_TYPE_CHOICES)[property_type]
+        objs.append(Properties(
+            name=f"{area} {label}",
+            title=f"{label} in {area} near {university.name}"[:100],
+            description=f"{bedrooms} bedroom {label.lower()} in {area}, a short trip to {university.name}.",
+            property_type=property_type,
+            price=round(rng.uniform(min_price, max_price), -3),
+            bedrooms=bedrooms,
+            toilets=rng.randint(1, max(1, bedrooms)),
+            address=f"{rng.choice(STREETS)}, {area}, Dar es Salaam",
+            location=random_point_near(rng, university.location),
+            size=round(rng.uniform(9, 25) * bedrooms, 2),
+            available_from=today + timedelta(days=rng.randint(0, 120)),
+            lease_duration=rng.choice([3, 6, 6, 12, 12, 12, 24]),
+            is_furnished=rng.random() < 0.4,
+            is_special_needs=rng.random() < 0.1,
+            is_available=rng.random() < 0.9,
+            is_fenced=rng.random() < 0.6,
+            view_count=int(rng.paretovariate(1.5) * 10),
+            windows_type=rng.choice(['Aluminum', 'Nyavu', None]),
+            electricity_type=rng.choice(['Submetered', 'Shared', 'Individual', 'None']),
+            water_supply=rng.random() < 0.8,
+        ))
+    created = Properties.objects.bulk_create(objs, batch_size=1000)
+
+    links = []
+    for prop in created:
+        for amenity_id in rng.sample(amenity_ids, rng.randint(0, min(5, len(amenity_ids)))):
+            links.append(PropertyAmenity(property_id=prop.pk, amenity_id=amenity_id))
+    PropertyAmenity.objects.bulk_create(links, batch_size=5000)
+    return [prop.pk for prop in created]
+
+
+def _create_students(rng, universities, count):
+    if not count:
+        return []
+    offset = User.objects.filter(email__endswith=f"@{EMAIL_DOMAIN}").count()
+    # Hash once: hashing per user would dominate the run time
+    password = make_password(DEFAULT_PASSWORD)
+    users = []
+    for i in range(offset, offset + count):
+        first_name = rng.choice(FIRST_NAMES)
+        last_name = rng.choice(LAST_NAMES)
+        users.append(User(
+            username=f"synthetic{i}",
+            email=f"student{i}@{EMAIL_DOMAIN}",
+            password=password,
+            first_name=first_name,
+            last_name=last_name,
+            full_name=f"{first_name} {last_name}",
+            mobile=f"+2557{rng.randint(10000000, 99999999)}",
+            roles='student',
+        ))
+    users = User.objects.bulk_create(users, batch_size=1000)
+    profiles = StudentProfile.objects.bulk_create(
+        [
+            StudentProfile(user=user, university=rng.choice(universities), course=rng.choice(COURSES))
+            for user in users
+        ],
+        batch_size=1000,
+    )
+    for user, profile in zip(users, profiles):
+        user.student_profile = profile
+    return users
+
+
+def _create_reviews(rng, students, property_ids, count):
+    if not count or not students or not property_ids:
+        return 0
+    count = min(count, len(students) * len(property_ids))
+    pairs = set()
+    while len(pairs) < count:
+        pairs.add((rng.choice(students).pk, rng.choice(property_ids)))
+    objs = [
+        PropertyReview(
+            reviewer_id=user_id,
+            property_id=property_id,
+            rating=rng.choices([1, 2, 3, 4, 5], [1, 2, 5, 8, 6])[0],
+            comment=rng.choice(REVIEW_COMMENTS),
+        )
+        for user_id, property_id in pairs
+    ]
+    return len(PropertyReview.objects.bulk_create(objs, batch_size=2000))
+
+
+def _create_favourites(rng, students, property_ids, count):
+    if not count or not students or not property_ids:
+        return 0
+    count = min(count, len(students) * len(property_ids))
+    pairs = set()
+    while len(pairs) < count:
+        pairs.add((rng.choice(students).pk, rng.choice(property_ids)))
+    objs = [Favourites(user_id=user_id, property_id=property_id) for user_id, property_id in pairs]
+    return len(Favourites.objects.bulk_create(objs, batch_size=2000, ignore_conflicts=True))
+
+
+def _create_messages(rng, students, property_ids, count):
+    if not count or not students or not property_ids:
+        return 0
+    existing = set(
+        Enquiry.objects.filter(
+            student_id__in=[student.student_profile.pk for student in students]
+        ).values_list('student_id', 'property_id')
+    )
+    # Roughly four messages per conversation
+    enquiry_count = min(max(1, count // 4), len(students) * len(property_ids) - len(existing))
+    senders = {}
+    while len(senders) < enquiry_count:
+        student = rng.choice(students)
+        pair = (student.student_profile.pk, rng.choice(property_ids))
+        if pair not in existing:
+            senders[pair] = student.pk
+    enquiries = Enquiry.objects.bulk_create(
+        [
+            Enquiry(
+                student_id=profile_id,
+                property_id=property_id,
+                status=rng.choice([EnquiryStatus.PENDING, EnquiryStatus.IN_PROGRESS, EnquiryStatus.RESOLVED]),
+            )
+            for profile_id, property_id in senders
+        ],
+        batch_size=1000,
+    )
+    if not enquiries:
+        return 0
+
+    messages = []
+    for i in range(count):
+        enquiry = enquiries[i % len(enquiries)]
+        messages.append(EnquiryMessage(
+            enquiry_id=enquiry.pk,
+            sender_id=senders[(enquiry.student_id, enquiry.property_id)],
+            content=rng.choice(MESSAGE_TEMPLATES),
+            is_read=rng.random() < 0.5,
+        ))
+    # bulk_create skips EnquiryMessage.save(), which re-saves the enquiry per message
+    return len(EnquiryMessage.objects.bulk_create(messages, batch_size=5000))
@@ -1,3 +1,936 @@
-from django.test import TestCase
+import gzip
+import io
+import json
+import os
+import tempfile
+from decimal import Decimal
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.gis.geos import Point
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connections
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from favourites.models import Favourites
+from properties import amenities, bulk_io, fragments, recommendations, scoring, spatial, tiles
+from properties.api.serializers import PropertiesSerializer
+from properties.api.views import PropertiesViewSet
+from properties.models import Amenity, NearByPlaces, Properties, PropertyAmenity, PropertyNearByPlaces
+from reviews.models import PropertyReview
+from universities.models import Campus, University
+from users.models import StudentProfile, User
+
+
+class BulkReaderTests(SimpleTestCase):
+    """Test the streaming readers used by import_properties."""
+
+    def test_csv_drops_empty_cells(self):
+        stream = io.StringIO("name,price,bedrooms\nFirst,1000,\nSecond,2000,3\n")
+
+        records = list(bulk_io.iter_records(stream, 'csv'))
+
+        self.assertEqual(records[0], (2, {'name': 'First', 'price': '1000'}))
+        self.assertEqual(records[1], (3, {'name': 'Second', 'price': '2000', 'bedrooms': '3'}))
+
+    def test_ndjson_skips_blank_lines(self):
+        stream = io.StringIO('{"name": "First"}\n\n{"name": "Second"}\n')
+
+        records = list(bulk_io.iter_records(stream, 'ndjson'))
+
+        self.assertEqual(records, [(1, {'name': 'First'}), (3, {'name': 'Second'})])
+
+    def test_geojson_streams_features_across_reads(self):
+        collection = {
+            'type': 'FeatureCollection',
+            'features': [
+                {
+                    'type': 'Feature',
+                    'geometry': {'type': 'Point', 'coordinates': [39.2, -6.78]},
+                    'properties': {'name': f'Property {i}', 'price': '1000'},
+                }
+                for i in range(3)
+            ],
+        }
+        stream = io.StringIO(json.dumps(collection, indent=2))
+
+        # Force the decoder to work across many small reads
+        original_read_size = bulk_io._READ_SIZE
+        bulk_io._READ_SIZE = 8
+        try:
+            records = list(bulk_io.iter_records(stream, 'geojson'))
+        finally:
+            bulk_io._READ_SIZE = original_read_size
+
+        self.assertEqual(len(records), 3)
+        self.assertEqual(records[2][1]['name'], 'Property 2')
+        self.assertEqual(records[0][1]['location'], {'type': 'Point', 'coordinates': [39.2, -6.78]})
+
+    def test_detect_format(self):
+        self.assertEqual(bulk_io.detect_format('listings.csv'), 'csv')
+        self.assertEqual(bulk_io.detect_format('listings.jsonl'), 'ndjson')
+        self.assertEqual(bulk_io.detect_format('listings.geojson'), 'geojson')
+        with self.assertRaises(ValueError):
+            bulk_io.detect_format('listings.xlsx')
+
+
+class BulkWriterTests(SimpleTestCase):
+    """Test the streaming writers used by the property export."""
+
+    rows = [
+        {'id': 1, 'name': 'First', 'price': Decimal('1000.00'), 'longitude': 39.2, 'latitude': -6.78, 'amenity_ids': [1, 2]},
+        {'id': 2, 'name': 'Second', 'price': Decimal('2000.00'), 'longitude': None, 'latitude': None, 'amenity_ids': []},
+    ]
+
+    def test_geojson_export_round_trips_through_reader(self):
+        text = ''.join(bulk_io.iter_export(iter(self.rows), 'geojson'))
+
+        records = [record for _, record in bulk_io.iter_records(io.StringIO(text), 'geojson')]
+
+        self.assertEqual(records[0]['location'], {'type': 'Point', 'coordinates': [39.2, -6.78]})
+        self.assertEqual(records[0]['price'], '1000.00')
+        self.assertNotIn('location', records[1])
+
+    def test_csv_export_joins_amenity_ids(self):
+        text = ''.join(bulk_io.iter_export(iter(self.rows), 'csv'))
+
+        records = [record for _, record in bulk_io.iter_records(io.StringIO(text), 'csv')]
+
+        self.assertEqual(records[0]['amenity_ids'], '1|2')
+        self.assertEqual(records[1]['name'], 'Second')
+
+    def test_gzip_stream(self):
+        chunks = bulk_io.iter_export(iter(self.rows), 'ndjson')
+
+        data = gzip.decompress(b''.join(bulk_io.gzip_stream(chunks))).decode()
+
+        self.assertEqual([json.loads(line)['id'] for line in data.splitlines()], [1, 2])
+
+
+class ImportPropertiesCommandTests(TestCase):
+    """Test the import_properties command end to end on small files."""
+
+    header = 'name,property_type,price,lease_duration,is_furnished,longitude,latitude,amenity_ids\n'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.wifi = Amenity.objects.create(name='WiFi', description='Fibre', icon='wifi')
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def write(self, name, text):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        return path
+
+    def import_file(self, path, **options):
+        out, err = io.StringIO(), io.StringIO()
+        call_command('import_properties', path, stdout=out, stderr=err, **options)
+        return out.getvalue(), err.getvalue()
+
+    def listings(self):
+        return self.write('listings.csv', self.header + (
+            f'Sinza Room,single_room,80000,6,true,39.2200,-6.7800,{self.wifi.id}\n'
+            'Broken Room,single_room,not a price,6,false,39.2210,-6.7800,\n'
+            'Mwenge House,house,300000,12,0,39.2300,-6.7700,\n'
+        ))
+
+    def test_loads_valid_rows_and_reports_bad_ones(self):
+        for method in ('bulk', 'copy'):
+            with self.subTest(method=method):
+                path = self.listings()
+
+                out, err = self.import_file(path, method=method)
+
+                self.assertIn('Row 3: price:', err)
+                self.assertIn('Imported 2 properties, rejected 1 rows', out)
+                room = Properties.objects.get(name='Sinza Room')
+                self.assertTrue(room.is_furnished)
+                self.assertEqual(list(room.amenities.values_list('amenity_id', flat=True)), [self.wifi.id])
+                self.assertAlmostEqual(room.location.x, 39.22)
+                self.assertFalse(os.path.exists(f'{path}.checkpoint.json'))
+                Properties.objects.all().delete()
+
+    def test_resume_skips_committed_rows(self):
+        path = self.listings()
+
+        with self.assertRaises(CommandError):
+            self.import_file(path, chunk_size=1, max_errors=1)
+        self.assertEqual(list(Properties.objects.values_list('name', flat=True)), ['Sinza Room'])
+
+        out, _ = self.import_file(path, chunk_size=1, max_errors=0, resume=True)
+
+        self.assertIn('Resuming after 1 rows', out)
+        self.assertEqual(
+            sorted(Properties.objects.values_list('name', flat=True)), ['Mwenge House', 'Sinza Room']
+        )
+
+    def test_csv_booleans_round_trip_through_export(self):
+        path = self.write('booleans.csv', self.header + ''.join(
+            f'Room {value},single_room,80000,6,{value},,,\n' for value in ('true', 'false', '1', '0', 'True')
+        ))
+        self.import_file(path)
+        expected = {'Room true': True, 'Room false': False, 'Room 1': True, 'Room 0': False, 'Room True': True}
+        self.assertEqual(dict(Properties.objects.values_list('name', 'is_furnished')), expected)
+
+        exported = os.path.join(self.directory, 'export.csv')
+        call_command('export_properties', format='csv', output=exported, stdout=io.StringIO())
+        Properties.objects.all().delete()
+        self.import_file(exported)
+
+        self.assertEqual(dict(Properties.objects.values_list('name', 'is_furnished')), expected)
+
+
+class NearestCampusTests(TestCase):
+    """Test the precomputed nearest campus of a property."""
+
+    @classmethod
+    def setUpTestData(cls):
+        university = University.objects.create(
+            name='University of Dar es Salaam',
+            address='Ubungo',
+            website='https://www.udsm.ac.tz',
+            location=Point(39.2083, -6.7735, srid=4326),
+        )
+        cls.mlimani = Campus.objects.create(
+            name='Mlimani', university=university, address='Ubungo', location=Point(39.2083, -6.7735, srid=4326)
+        )
+        cls.muhimbili = Campus.objects.create(
+            name='Muhimbili', university=university, address='Upanga', location=Point(39.2750, -6.8040, srid=4326)
+        )
+        cls.property = Properties.objects.create(
+            name='Sinza Room',
+            property_type='single_room',
+            price=Decimal('80000'),
+            lease_duration=6,
+            location=Point(39.2200, -6.7800, srid=4326),
+        )
+
+    def test_refresh_sets_nearest_campus_and_distance(self):
+        spatial.refresh_nearest_campus([self.property.pk])
+
+        self.property.refresh_from_db()
+        self.assertEqual(self.property.nearest_campus, self.mlimani)
+        self.assertAlmostEqual(float(self.property.nearest_campus_distance), 1.48, delta=0.05)
+
+    def test_refresh_only_writes_changed_rows(self):
+        self.assertEqual(spatial.refresh_nearest_campus(), 1)
+        self.assertEqual(spatial.refresh_nearest_campus(), 0)
+
+        Properties.objects.filter(pk=self.property.pk).update(location=Point(39.2740, -6.8030, srid=4326))
+
+        self.assertEqual(spatial.refresh_nearest_campus([self.property.pk]), 1)
+        self.property.refresh_from_db()
+        self.assertEqual(self.property.nearest_campus, self.muhimbili)
+
+    def test_location_changed_tracks_loaded_value(self):
+        prop = Properties.objects.get(pk=self.property.pk)
+        self.assertFalse(prop.location_changed())
+
+        prop.location = Point(39.2740, -6.8030, srid=4326)
+
+        self.assertTrue(prop.location_changed())
+        self.assertFalse(Properties.objects.only('id').get(pk=self.property.pk).location_changed())
+
+    def test_campus_reach_skips_properties_it_cannot_win(self):
+        spatial.refresh_nearest_campus()
+        far = Properties.objects.create(
+            name='Kigamboni Room', property_type='single_room', price=Decimal('50000'), lease_duration=6,
+            location=Point(39.3200, -6.8500, srid=4326),
+        )
+        spatial.refresh_nearest_campus([far.pk])
+
+        # Muhimbili serves the far property and can't get closer to Sinza than Mlimani already is
+        self.assertEqual(spatial.properties_near_campus(self.muhimbili.pk, self.muhimbili.location), [far.pk])
+        self.assertEqual(
+            sorted(spatial.properties_near_campus(self.muhimbili.pk, Point(39.2210, -6.7805, srid=4326))),
+            sorted([self.property.pk, far.pk]),
+        )
+
+    def test_renaming_a_campus_skips_the_refresh(self):
+        campus = Campus.objects.get(pk=self.muhimbili.pk)
+        campus.name = 'Muhimbili Campus'
+
+        with mock.patch.object(spatial, 'refresh_nearest_campus') as refresh:
+            with self.captureOnCommitCallbacks(execute=True):
+                campus.save()
+
+        refresh.assert_not_called()
+
+    def test_moving_a_campus_refreshes_the_properties_it_reaches(self):
+        spatial.refresh_nearest_campus()
+        campus = Campus.objects.get(pk=self.muhimbili.pk)
+        campus.location = Point(39.2205, -6.7802, srid=4326)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            campus.save()
+
+        self.property.refresh_from_db()
+        self.assertEqual(self.property.nearest_campus, self.muhimbili)
+
+
+class NearbyPlacesRefreshTests(TestCase):
+    """Test the set-based nearby place linking."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.property = Properties.objects.create(
+            name='Sinza Room',
+            property_type='single_room',
+            price=Decimal('80000'),
+            lease_duration=6,
+            location=Point(39.2200, -6.7800, srid=4326),
+        )
+        # About 1.1 km east, and about 5.5 km east
+        cls.market = NearByPlaces.objects.create(
+            name='Sinza Market', place_type='grocery', location=Point(39.2300, -6.7800, srid=4326), address='Sinza'
+        )
+        cls.hospital = NearByPlaces.objects.create(
+            name='Mwananyamala Hospital', place_type='hospital', location=Point(39.2700, -6.7800, srid=4326),
+            address='Mwananyamala',
+        )
+
+    def test_links_places_within_radius(self):
+        self.assertEqual(spatial.refresh_nearby_places([self.property.pk]), 1)
+
+        link = PropertyNearByPlaces.objects.get(property=self.property)
+        self.assertEqual(link.place, self.market)
+        self.assertAlmostEqual(float(link.distance), 1.10, delta=0.02)
+        self.assertEqual(link.walking_time, 18)
+
+    def test_refresh_is_idempotent_and_removes_stale_links(self):
+        spatial.refresh_nearby_places()
+        self.assertEqual(spatial.refresh_nearby_places(), 0)
+
+        NearByPlaces.objects.filter(pk=self.market.pk).update(location=Point(39.2600, -6.7800, srid=4326))
+
+        self.assertEqual(spatial.refresh_nearby_places(), 1)
+        self.assertFalse(PropertyNearByPlaces.objects.filter(property=self.property).exists())
+
+    def test_larger_radius_links_more_places(self):
+        spatial.refresh_nearby_places(radius_m=6000)
+
+        self.assertEqual(PropertyNearByPlaces.objects.filter(property=self.property).count(), 2)
+
+
+class ScoringTests(TestCase):
+    """Test the batch property scoring pipeline."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.central = Properties.objects.create(
+            name='Sinza Apartment',
+            property_type='apartment',
+            price=Decimal('300000'),
+            bedrooms=3,
+            lease_duration=6,
+            is_fenced=True,
+            electricity_type='Individual',
+            location=Point(39.2200, -6.7800, srid=4326),
+        )
+        cls.remote = Properties.objects.create(
+            name='Kibamba Room',
+            property_type='single_room',
+            price=Decimal('400000'),
+            bedrooms=1,
+            lease_duration=6,
+            electricity_type='Shared',
+            location=Point(39.0500, -6.7300, srid=4326),
+        )
+        NearByPlaces.objects.create(
+            name='Sinza Stand', place_type='transport', location=Point(39.2210, -6.7800, srid=4326), address='Sinza'
+        )
+        NearByPlaces.objects.create(
+            name='Sinza Market', place_type='grocery', location=Point(39.2250, -6.7800, srid=4326), address='Sinza'
+        )
+        spatial.refresh_nearby_places()
+
+    def test_scores_are_in_range_and_rank_properties(self):
+        scored, changed = scoring.score_properties()
+
+        self.assertEqual((scored, changed), (2, 2))
+        central = Properties.objects.get(pk=self.central.pk)
+        remote = Properties.objects.get(pk=self.remote.pk)
+        for prop in (central, remote):
+            for field in scoring.SCORE_FIELDS:
+                self.assertTrue(0 <= getattr(prop, field) <= 10)
+        self.assertGreater(central.safety_score, remote.safety_score)
+        self.assertGreater(central.transportation_score, remote.transportation_score)
+        self.assertGreater(central.overall_score, remote.overall_score)
+
+    def test_rescoring_only_writes_changed_rows(self):
+        scoring.score_properties()
+
+        self.assertEqual(scoring.score_properties(), (2, 0))
+
+        Properties.objects.filter(pk=self.remote.pk).update(is_fenced=True)
+
+        self.assertEqual(scoring.score_properties(Properties.objects.filter(pk=self.remote.pk)), (1, 1))
+
+
+class RecommendationTests(APITestCase):
+    """Test the similarity index and the recommendation endpoints."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='student', email='student@example.com', password='testpass123', mobile='+255700000000',
+            roles='student',
+        )
+
+        def create(name, property_type, price, bedrooms, lng):
+            return Properties.objects.create(
+                name=name, property_type=property_type, price=Decimal(price), bedrooms=bedrooms,
+                lease_duration=6, location=Point(lng, -6.78, srid=4326),
+            )
+
+        cls.sinza_room = create('Sinza Room', 'single_room', '80000', 1, 39.220)
+        cls.sinza_room_next_door = create('Sinza Room 2', 'single_room', '85000', 1, 39.221)
+        cls.mikocheni_house = create('Mikocheni House', 'house', '900000', 4, 39.260)
+        cls.msasani_house = create('Msasani House', 'house', '950000', 4, 39.265)
+        recommendations.build_index(k=2)
+
+    def test_similar_ranks_nearest_neighbour_first(self):
+        response = self.client.get(f'/api/v1/properties/{self.sinza_room.id}/similar/')
+
+        ids = [feature['id'] for feature in response.json()['features']]
+        self.assertEqual(ids, [self.sinza_room_next_door.id, self.mikocheni_house.id])
+
+    def test_similar_skips_unavailable_properties(self):
+        Properties.objects.filter(pk=self.sinza_room_next_door.pk).update(is_available=False)
+
+        response = self.client.get(f'/api/v1/properties/{self.sinza_room.id}/similar/?limit=1')
+
+        ids = [feature['id'] for feature in response.json()['features']]
+        self.assertEqual(ids, [self.mikocheni_house.id])
+
+    def test_recommended_follows_favourites(self):
+        Favourites.objects.create(user=self.user, property=self.mikocheni_house)
+        self.client.force_authenticate(user=self.user)
+
+        response = self.client.get('/api/v1/properties/recommended/?limit=1')
+
+        ids = [feature['id'] for feature in response.json()['features']]
+        self.assertEqual(ids, [self.msasani_house.id])
+
+    def test_recommended_without_seeds_falls_back_to_scores(self):
+        Properties.objects.filter(pk=self.msasani_house.pk).update(overall_score=Decimal('8.5'))
+
+        response = self.client.get('/api/v1/properties/recommended/')
+
+        ids = [feature['id'] for feature in response.json()['features']]
+        self.assertEqual(ids, [self.msasani_house.id])
+
+
+class TileTests(APITestCase):
+    """Test the clustered property map tiles."""
+
+    @classmethod
+    def setUpTestData(cls):
+        for i, lng in enumerate([39.2200, 39.2202]):
+            Properties.objects.create(
+                name=f'Sinza Room {i}', property_type='single_room', price=Decimal(80000 + i * 10000),
+                lease_duration=6, location=Point(lng, -6.7800, srid=4326),
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def tile_url(self, z, lng=39.2201, lat=-6.7800):
+        x, y = tiles.tile_for_point(lng, lat, z)
+        return f'/api/v1/properties/tiles/{z}/{x}/{y}/'
+
+    def test_tile_for_point(self):
+        self.assertEqual(tiles.tile_for_point(0, 0, 0), (0, 0))
+        self.assertEqual(tiles.tile_for_point(0.1, -0.1, 1), (1, 1))
+        self.assertEqual(tiles.tile_for_point(-180, 90, 3), (0, 0))
+
+    def test_low_zoom_returns_clusters(self):
+        data = self.client.get(self.tile_url(8)).json()
+
+        self.assertEqual(data['kind'], 'clusters')
+        [cluster] = data['clusters']
+        row = dict(zip(data['fields'], cluster))
+        self.assertEqual((row['count'], row['min_price'], row['max_price'], row['id']), (2, 80000, 90000, None))
+
+    def test_high_zoom_returns_points(self):
+        data = self.client.get(self.tile_url(17)).json()
+
+        self.assertEqual(data['kind'], 'points')
+        self.assertEqual([row[1] for row in data['points']], [80000, 90000])
+
+    def test_vector_tile(self):
+        response = self.client.get(self.tile_url(8) + '?mvt=1')
+
+        self.assertEqual(response['Content-Type'], tiles.MVT_CONTENT_TYPE)
+        self.assertTrue(response.content)
+
+    def test_tiles_are_cached_and_invalidated_on_move(self):
+        url = self.tile_url(8)
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            self.client.get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            prop = Properties.objects.get(name='Sinza Room 0')
+            # Same z8 tile, a different cluster cell
+            prop.location = Point(39.0000, -6.7800, srid=4326)
+            prop.save()
+
+        data = self.client.get(url).json()
+        self.assertEqual([row[2] for row in data['clusters']], [1, 1])
+
+    def test_out_of_range_tile(self):
+        response = self.client.get('/api/v1/properties/tiles/2/4/0/')
+
+        self.assertEqual(response.status_code, 404)
+
+
+class ViewportTests(APITestCase):
+    """Test the bounding-box and polygon viewport filters on the property list."""
+
+    @classmethod
+    def setUpTestData(cls):
+        for i, lng in enumerate([39.2200, 39.2300, 39.2400]):
+            Properties.objects.create(
+                name=f'Sinza Room {i}', property_type='single_room', price=Decimal(80000 + i * 10000),
+                lease_duration=6, location=Point(lng, -6.7800, srid=4326),
+            )
+        Properties.objects.create(
+            name='Kigamboni House', property_type='house', price=Decimal('500000'),
+            lease_duration=12, location=Point(39.3200, -6.8600, srid=4326),
+        )
+
+    def test_in_bbox_matches_only_the_viewport(self):
+        response = self.client.get('/api/v1/properties/?in_bbox=39.21,-6.79,39.235,-6.77')
+
+        data = response.json()
+        self.assertEqual(sorted(f['properties']['name'] for f in data['features']), ['Sinza Room 0', 'Sinza Room 1'])
+        self.assertFalse(data['truncated'])
+
+    def test_within_polygon(self):
+        polygon = json.dumps({
+            'type': 'Polygon',
+            'coordinates': [[[39.3, -6.87], [39.34, -6.87], [39.34, -6.85], [39.3, -6.85], [39.3, -6.87]]],
+        })
+
+        response = self.client.get('/api/v1/properties/', {'within': polygon, 'compact': '1'})
+
+        data = response.json()
+        self.assertEqual(data['fields'], ['id', 'price', 'lng', 'lat'])
+        self.assertEqual([row[1:] for row in data['results']], [[500000.0, 39.32, -6.86]])
+
+    @override_settings(VIEWPORT_MAX_RESULTS=2)
+    def test_caps_results_and_asks_to_zoom_in(self):
+        response = self.client.get('/api/v1/properties/?in_bbox=39,-7,39.5,-6.5&compact=1')
+
+        data = response.json()
+        self.assertEqual(len(data['results']), 2)
+        self.assertTrue(data['truncated'])
+        self.assertEqual(data['detail'], 'Too many results, zoom in')
+
+    def test_rejects_malformed_viewport(self):
+        self.assertEqual(self.client.get('/api/v1/properties/?in_bbox=39,-7,39.5').status_code, 400)
+        self.assertEqual(self.client.get('/api/v1/properties/?within=nonsense').status_code, 400)
+
+
+@override_settings(ROOT_URLCONF='campus_stay.urls_asgi')
+class AsyncReadViewTests(TestCase):
+    """Test that the async read views answer exactly like the DRF views they shadow."""
+
+    @classmethod
+    def setUpTestData(cls):
+        University.objects.create(
+            name='University of Dar es Salaam', address='Ubungo', website='https://www.udsm.ac.tz',
+            location=Point(39.2083, -6.7735, srid=4326),
+        )
+        for i in range(3):
+            cls.property = Properties.objects.create(
+                name=f'Sinza Room {i}', property_type='single_room', price=Decimal(70000 + i * 10000),
+                lease_duration=6, location=Point(39.2200 + i / 1000, -6.7800, srid=4326),
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    async def assertMatchesSyncView(self, path):
+        response = await self.async_client.get(path)
+        with self.settings(ROOT_URLCONF='campus_stay.urls'):
+            expected = await self.async_client.get(path)
+        self.assertEqual(response.status_code, expected.status_code)
+        self.assertEqual(response.json(), expected.json())
+        return response
+
+    async def test_list(self):
+        response = await self.assertMatchesSyncView('/api/v1/properties/?ordering=price&page_size=2')
+
+        self.assertEqual(response.json()['count'], 3)
+
+    async def test_invalid_filters(self):
+        response = await self.assertMatchesSyncView('/api/v1/properties/?amenities=999999')
+
+        self.assertEqual(response.status_code, 400)
+
+    async def test_detail(self):
+        await self.assertMatchesSyncView(f'/api/v1/properties/{self.property.id}/')
+
+    async def test_detail_stays_async_under_production_middleware(self):
+        # settingsprod appends view tracking to the shared middleware list
+        middleware = [*settings.MIDDLEWARE, 'middleware.property_tracking.PropertyViewTrackingMiddleware']
+
+        with self.settings(MIDDLEWARE=middleware), mock.patch.object(PropertiesViewSet, 'retrieve') as retrieve:
+            # The handler logs every middleware it has to adapt to sync
+            with self.assertNoLogs('django.request', 'DEBUG'):
+                response = await self.async_client.get(f'/api/v1/properties/{self.property.id}/')
+
+        self.assertEqual(response.status_code, 200)
+        retrieve.assert_not_called()
+        await self.property.arefresh_from_db()
+        self.assertEqual(self.property.view_count, 1)
+        await self.assertMatchesSyncView('/api/v1/properties/999999/')
+
+    async def test_detail_shares_the_sync_validators(self):
+        path = f'/api/v1/properties/{self.property.id}/'
+        response = await self.assertMatchesSyncView(path)
+
+        with self.settings(ROOT_URLCONF='campus_stay.urls'):
+            expected = await self.async_client.get(path)
+        self.assertEqual(response['ETag'], expected['ETag'])
+        self.assertEqual(response['Last-Modified'], expected['Last-Modified'])
+        self.assertEqual((await self.async_client.get(path, headers={'If-None-Match': response['ETag']})).status_code, 304)
+
+    async def test_universities_list_shares_the_sync_etag(self):
+        response = await self.assertMatchesSyncView('/api/v1/universities/')
+
+        with self.settings(ROOT_URLCONF='campus_stay.urls'):
+            expected = await self.async_client.get('/api/v1/universities/')
+        self.assertEqual(response['ETag'], expected['ETag'])
+
+    async def test_marketing_categories_are_cached(self):
+        first = await self.async_client.get('/api/v1/properties/marketing-categories/')
+
+        with self.assertNumQueries(0):
+            second = await self.async_client.get('/api/v1/properties/marketing-categories/')
+
+        self.assertEqual(first.json(), second.json())
+        self.assertEqual(len(first.json()['cheap']['features']), 3)
+
+    async def test_authenticated_requests_use_the_drf_view(self):
+        response = await self.async_client.get('/api/v1/properties/', headers={'Authorization': 'Bearer invalid'})
+
+        self.assertEqual(response.status_code, 401)
+
+
+@skipUnless(settings.REPLICA_DATABASE, "No read replica configured (SUPABASE_REPLICA_DB_HOST)")
+class ReplicaRoutingTests(APITestCase):
+    """Test that read-only property actions use the replica, except right after the user wrote."""
+
+    databases = {'default', 'replica'}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='landlord', email='landlord@example.com', password='testpass123', mobile='+255700000001',
+            roles='landlord',
+        )
+        cls.property = Properties.objects.create(
+            name='Sinza Room', property_type='single_room', price=Decimal('80000'),
+            lease_duration=6, location=Point(39.2200, -6.7800, srid=4326),
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def replica_queries(self, method, path, **kwargs):
+        with CaptureQueriesContext(connections['replica']) as queries:
+            getattr(self.client, method)(path, **kwargs)
+        return len(queries)
+
+    def test_list_reads_from_the_replica(self):
+        self.assertGreater(self.replica_queries('get', '/api/v1/properties/'), 0)
+
+    def test_writes_go_to_the_primary_and_keep_the_writer_there(self):
+        self.client.force_authenticate(user=self.user)
+
+        self.assertEqual(
+            self.replica_queries('patch', f'/api/v1/properties/{self.property.id}/', data={'price': '85000'}),
+            0,
+        )
+        self.assertEqual(self.replica_queries('get', f'/api/v1/properties/{self.property.id}/'), 0)
+
+
+class AmenityTests(APITestCase):
+    """Test the amenity registry, the amenity endpoint and filtering by amenity ids."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.wifi = Amenity.objects.create(name='WiFi', description='Fibre internet', icon='wifi')
+        cls.parking = Amenity.objects.create(name='Parking', description='Off-street parking', icon='car')
+        cls.both = Properties.objects.create(
+            name='Sinza Room', property_type='single_room', price=Decimal('80000'),
+            lease_duration=6, location=Point(39.2200, -6.7800, srid=4326),
+        )
+        cls.wifi_only = Properties.objects.create(
+            name='Mwenge Room', property_type='single_room', price=Decimal('90000'),
+            lease_duration=6, location=Point(39.2300, -6.7700, srid=4326),
+        )
+        PropertyAmenity.objects.create(property=cls.both, amenity=cls.wifi)
+        PropertyAmenity.objects.create(property=cls.both, amenity=cls.parking)
+        PropertyAmenity.objects.create(property=cls.wifi_only, amenity=cls.wifi)
+
+    def setUp(self):
+        cache.clear()
+        amenities.invalidate()
+
+    def test_list_is_served_from_the_registry(self):
+        self.client.get('/api/v1/amenities/')
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/v1/amenities/')
+
+        self.assertEqual([amenity['name'] for amenity in response.json()], ['Parking', 'WiFi'])
+        not_modified = self.client.get('/api/v1/amenities/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_saving_an_amenity_reloads_the_registry(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Amenity.objects.create(name='Laundry', description='Shared washer', icon='washer')
+
+        names = [amenity['name'] for amenity in self.client.get('/api/v1/amenities/').json()]
+        self.assertEqual(names, ['Laundry', 'Parking', 'WiFi'])
+
+    def test_properties_carry_amenity_ids(self):
+        response = self.client.get(f'/api/v1/properties/{self.both.id}/')
+
+        self.assertEqual(response.json()['properties']['amenities'], sorted([self.wifi.id, self.parking.id]))
+
+    def test_filter_requires_every_amenity(self):
+        for query in (f'amenities={self.wifi.id},{self.parking.id}', f'amenities={self.wifi.id}&amenities={self.parking.id}'):
+            response = self.client.get(f'/api/v1/properties/?{query}')
+
+            self.assertEqual([feature['id'] for feature in response.json()['features']], [self.both.id])
+
+    def test_filter_rejects_unknown_amenities(self):
+        response = self.client.get('/api/v1/properties/?amenities=999999')
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_filter_rejects_fractional_amenity_ids(self):
+        for query in (f'amenities={self.wifi.id}.9', f'amenities={self.wifi.id}.9&amenities={self.parking.id}'):
+            response = self.client.get(f'/api/v1/properties/?{query}')
+
+            self.assertEqual(response.status_code, 400)
+
+
+class CoordinateFastPathTests(APITestCase):
+    """Test that points emitted from plain coordinates match the GEOS geometry output."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.property = Properties.objects.create(
+            name='Sinza Room', property_type='single_room', price=Decimal('80000'),
+            lease_duration=6, location=Point(39.2213, -6.7801, srid=4326),
+        )
+
+    def test_list_geometry_matches_geometry_serialization(self):
+        response = self.client.get('/api/v1/properties/')
+
+        expected = json.loads(json.dumps(PropertiesSerializer(Properties.objects.get(pk=self.property.pk)).data['geometry']))
+        self.assertEqual(response.json()['features'][0]['geometry'], expected)
+        self.assertEqual(expected['coordinates'], [39.2213, -6.7801])
+
+    def test_reads_do_not_load_the_geometry(self):
+        instance = spatial.with_coordinates(Properties.objects.filter(pk=self.property.pk)).get()
+
+        self.assertNotIn('location', instance.__dict__)
+        self.assertEqual(
+            PropertiesSerializer(instance).data['geometry'],
+            {'type': 'Point', 'coordinates': [39.2213, -6.7801]},
+        )
+
+
+class ConditionalDetailTests(APITestCase):
+    """Test ETag/Last-Modified validation of the property detail."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='student', email='student@example.com', password='testpass123', mobile='+255700000000',
+            roles='student',
+        )
+        cls.property = Properties.objects.create(
+            name='Sinza Room', property_type='single_room', price=Decimal('80000'),
+            lease_duration=6, location=Point(39.2213, -6.7801, srid=4326),
+        )
+        cls.path = f'/api/v1/properties/{cls.property.id}/'
+
+    def test_anonymous_responses_are_public(self):
+        response = self.client.get(self.path)
+
+        self.assertTrue(response.has_header('ETag'))
+        self.assertTrue(response.has_header('Last-Modified'))
+        self.assertIn('public', response['Cache-Control'])
+
+    def test_public_responses_do_not_start_a_session_under_production_middleware(self):
+        # settingsprod appends view tracking to the shared middleware list
+        middleware = [*settings.MIDDLEWARE, 'middleware.property_tracking.PropertyViewTrackingMiddleware']
+
+        with self.settings(MIDDLEWARE=middleware):
+            response = self.client.get(self.path)
+            not_modified = self.client.get(self.path, HTTP_IF_NONE_MATCH=response['ETag'])
+
+        self.assertEqual(not_modified.status_code, 304)
+        for public in (response, not_modified):
+            self.assertIn('public', public['Cache-Control'])
+            self.assertNotIn(settings.SESSION_COOKIE_NAME, public.cookies)
+        self.property.refresh_from_db()
+        self.assertEqual(self.property.view_count, 2)
+
+    def test_visitors_with_a_session_keep_their_recently_viewed_list(self):
+        middleware = [*settings.MIDDLEWARE, 'middleware.property_tracking.PropertyViewTrackingMiddleware']
+        # Reading the test client's session saves one and sets its cookie
+        session_key = self.client.session.session_key
+
+        with self.settings(MIDDLEWARE=middleware):
+            response = self.client.get(self.path)
+
+        self.assertIn('private', response['Cache-Control'])
+        self.assertEqual(self.client.session.session_key, session_key)
+        self.assertEqual(self.client.session['recently_viewed_properties'], [self.property.id])
+
+    def test_authenticated_responses_are_private(self):
+        self.client.force_authenticate(user=self.user)
+
+        response = self.client.get(self.path)
+
+        self.assertIn('private', response['Cache-Control'])
+        self.client.force_authenticate(user=None)
+        self.assertNotEqual(self.client.get(self.path)['ETag'], response['ETag'])
+
+    def test_not_modified_before_serializing(self):
+        response = self.client.get(self.path)
+
+        with self.assertNumQueries(1):
+            not_modified = self.client.get(self.path, HTTP_IF_NONE_MATCH=f"W/{response['ETag']}")
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified['ETag'], response['ETag'])
+        self.assertEqual(
+            self.client.get(self.path, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304
+        )
+
+    def test_changing_the_student_university_changes_the_validator(self):
+        near = University.objects.create(
+            name='University of Dar es Salaam', address='Ubungo', website='https://www.udsm.ac.tz',
+            location=Point(39.2083, -6.7735, srid=4326),
+        )
+        far = University.objects.create(
+            name='University of Dodoma', address='Dodoma', website='https://www.udom.ac.tz',
+            location=Point(35.7516, -6.1630, srid=4326),
+        )
+        profile = StudentProfile.objects.create(user=self.user, university=near)
+        self.client.force_authenticate(user=User.objects.get(pk=self.user.pk))
+        response = self.client.get(self.path)
+
+        profile.university = far
+        profile.save()
+        self.client.force_authenticate(user=User.objects.get(pk=self.user.pk))
+        changed = self.client.get(self.path, HTTP_IF_NONE_MATCH=response['ETag'])
+
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(
+            changed.json()['properties']['distance_to_university'],
+            response.json()['properties']['distance_to_university'],
+        )
+
+    def test_new_review_changes_the_validator(self):
+        etag = self.client.get(self.path)['ETag']
+        PropertyReview.objects.create(property=self.property, reviewer=self.user, rating=4, comment='Safi')
+
+        response = self.client.get(self.path, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class FragmentCacheTests(APITestCase):
+    """Test that property pages are assembled from cached fragments and stay current."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='student', email='student@example.com', password='testpass123', mobile='+255700000000',
+            roles='student',
+        )
+        for i in range(3):
+            cls.property = Properties.objects.create(
+                name=f'Sinza Room {i}', property_type='single_room', price=Decimal(70000 + i * 10000),
+                lease_duration=6, location=Point(39.2200 + i / 1000, -6.7800, srid=4326),
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def features(self, path='/api/v1/properties/'):
+        return {feature['id']: feature['properties'] for feature in self.client.get(path).json()['features']}
+
+    def test_cached_page_matches_and_skips_relations(self):
+        with CaptureQueriesContext(connections['default']) as cold:
+            expected = self.client.get('/api/v1/properties/').json()
+        with CaptureQueriesContext(connections['default']) as warm:
+            response = self.client.get('/api/v1/properties/').json()
+
+        self.assertEqual(response, expected)
+        self.assertLess(len(warm), len(cold))
+        self.assertFalse(any('properties_propertymedia' in query['sql'] for query in warm.captured_queries))
+
+    def test_reviews_retire_the_fragment(self):
+        self.features()
+        with self.captureOnCommitCallbacks(execute=True):
+            PropertyReview.objects.create(property=self.property, reviewer=self.user, rating=4, comment='Safi')
+
+        self.assertEqual(self.features()[self.property.id]['review_count'], 1)
+
+    def test_bulk_changes_touch_each_property_once(self):
+        amenities = [Amenity.objects.create(name=f'Amenity {i}') for i in range(3)]
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            for amenity in amenities:
+                PropertyAmenity.objects.create(property=self.property, amenity=amenity)
+        touches = [callback for callback in callbacks if isinstance(callback, fragments.PendingTouches)]
+
+        self.assertEqual(len(touches), 1)
+        self.assertEqual(touches[0].property_ids, {self.property.id})
+        with self.assertNumQueries(1):
+            touches[0]()
+
+    def test_view_counters_are_live(self):
+        self.features()
+        Properties.objects.filter(pk=self.property.pk).update(view_count=7)
+
+        self.assertEqual(self.features()[self.property.id]['view_count'], 7)
+
+    def test_detail_reuses_the_list_fragment(self):
+        expected = self.client.get(f'/api/v1/properties/{self.property.id}/').json()
+        cache.clear()
+        self.client.get('/api/v1/properties/')
+
+        # The validator and the property row; no relations
+        with self.assertNumQueries(2):
+            detail = self.client.get(f'/api/v1/properties/{self.property.id}/').json()
+        self.assertEqual(detail, expected)
+
+    def test_marketing_page_prefetches_only_misses(self):
+        self.client.force_authenticate(user=self.user)
+        self.client.get('/api/v1/properties/marketing-categories/')
+
+        with CaptureQueriesContext(connections['default']) as warm:
+            self.client.get('/api/v1/properties/marketing-categories/')
+
+        self.assertFalse(any('properties_propertymedia' in query['sql'] for query in warm.captured_queries))
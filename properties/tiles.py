@@ -0,0 +1,168 @@
+"""
+Map tiles of available property locations.
+
+Tiles follow the XYZ scheme in Web Mercator. Up to ``CLUSTER_MAX_ZOOM`` the
+properties of a tile are grouped server-side by snapping them to a grid of
+``CLUSTER_CELLS`` x ``CLUSTER_CELLS`` cells (``ST_SnapToGrid``); beyond it
+every property is returned as a bare id/price/point. A tile is rendered
+either as compact JSON arrays or as a Mapbox vector tile (``ST_AsMVT``).
+
+Rendered tiles are cached per tile. Saving or deleting a property drops the
+tiles that contain its old and new location at every zoom level; bulk
+loads bump the ``NAMESPACE`` version instead, which retires every cached
+tile at once.
+"""
+import math
+
+from django.core.cache import cache
+from django.db import connection
+
+from campus_stay.cache import bump_version, get_or_build, make_key, version
+from properties.models import Properties
+
+MAX_ZOOM = 22
+CLUSTER_MAX_ZOOM = 14
+# Grid cells per tile side when clustering (32 px cells on a 256 px tile)
+CLUSTER_CELLS = 8
+MVT_EXTENT = 4096
+MVT_LAYER = 'properties'
+MVT_CONTENT_TYPE = 'application/vnd.mapbox-vector-tile'
+
+NAMESPACE = 'properties:tiles'
+CACHE_TIMEOUT = 60 * 60
+FORMATS = ('json', 'mvt')
+
+# Half the width of the Web Mercator square, in meters
+MERCATOR_HALF_WIDTH = 20037508.342789244
+
+CLUSTER_FIELDS = ['lng', 'lat', 'count', 'min_price', 'max_price', 'id']
+POINT_FIELDS = ['id', 'price', 'lng', 'lat']
+
+POINTS_SQL = """
+    WITH bounds AS (
+        SELECT ST_TileEnvelope(%(z)s, %(x)s, %(y)s) AS tile
+    ),
+    points AS (
+        SELECT p.id, p.price, ST_Transform(p.location, 3857) AS geom
+        FROM {properties} AS p, bounds
+        WHERE p.is_available
+          AND p.location && ST_Transform(bounds.tile, 4326)
+          AND ST_Intersects(ST_Transform(p.location, 3857), bounds.tile)
+    ),
+    features AS ({features})
+"""
+
+CLUSTER_FEATURES = """
+    SELECT ST_Centroid(ST_Collect(geom)) AS geom,
+           COUNT(*) AS count,
+           MIN(price) AS min_price,
+           MAX(price) AS max_price,
+           CASE WHEN COUNT(*) = 1 THEN MIN(id) END AS id
+    FROM points
+    GROUP BY ST_SnapToGrid(geom, %(cell)s)
+"""
+
+POINT_FEATURES = "SELECT geom, id, price FROM points"
+
+JSON_SELECT = {
+    'clusters': """
+        SELECT ROUND(ST_X(ST_Transform(geom, 4326))::numeric, 6)::float8,
+               ROUND(ST_Y(ST_Transform(geom, 4326))::numeric, 6)::float8,
+               count, min_price::float8, max_price::float8, id
+        FROM features ORDER BY count DESC
+    """,
+    'points': """
+        SELECT id, price::float8,
+               ROUND(ST_X(ST_Transform(geom, 4326))::numeric, 6)::float8,
+               ROUND(ST_Y(ST_Transform(geom, 4326))::numeric, 6)::float8
+        FROM features ORDER BY id
+    """,
+}
+
+MVT_SELECT = """
+    SELECT ST_AsMVT(tile, %(layer)s, %(extent)s, 'geom')
+    FROM (
+        SELECT ST_AsMVTGeom(features.geom, bounds.tile, %(extent)s, 64, true) AS geom, {columns}
+        FROM features, bounds
+    ) AS tile
+"""
+MVT_COLUMNS = {
+    'clusters': 'count, min_price::float8 AS min_price, max_price::float8 AS max_price, id',
+    'points': 'id, price::float8 AS price',
+}
+
+
+def is_valid_tile(z, x, y):
+    return 0 <= z <= MAX_ZOOM and 0 <= x < 2 ** z and 0 <= y < 2 ** z
+
+
+def tile_for_point(lng, lat, z):
+    """XYZ tile containing a WGS84 point at zoom ``z``."""
+    n = 2 ** z
+    lat = max(min(lat, 85.0511), -85.0511)
+    x = int((lng + 180) / 360 * n)
+    y = int((1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def tiles_version():
+    return version(NAMESPACE)
+
+
+def bump_tiles_version():
+    """Retire every cached tile, e.g. after a bulk load that bypasses model signals."""
+    bump_version(NAMESPACE)
+
+
+def _cache_key(current_version, z, x, y, fmt):
+    return make_key(NAMESPACE, current_version, f"{z}/{x}/{y}", fmt)
+
+
+def invalidate_points(points):
+    """Drop the cached tiles containing any of ``points`` at every zoom level."""
+    current_version = tiles_version()
+    keys = [
+        _cache_key(current_version, z, *tile_for_point(point.x, point.y, z), fmt)
+        for point in points
+        for z in range(MAX_ZOOM + 1)
+        for fmt in FORMATS
+    ]
+    if keys:
+        cache.delete_many(keys)
+
+
+def render_tile(z, x, y, fmt='json'):
+    """Query one tile: a dict of compact arrays for ``json``, bytes for ``mvt``."""
+    kind = 'clusters' if z <= CLUSTER_MAX_ZOOM else 'points'
+    params = {
+        'z': z,
+        'x': x,
+        'y': y,
+        'cell': 2 * MERCATOR_HALF_WIDTH / 2 ** z / CLUSTER_CELLS,
+        'layer': MVT_LAYER,
+        'extent': MVT_EXTENT,
+    }
+    base = POINTS_SQL.format(
+        properties=Properties._meta.db_table,
+        features=CLUSTER_FEATURES if kind == 'clusters' else POINT_FEATURES,
+    )
+    with connection.cursor() as cursor:
+        if fmt == 'mvt':
+            cursor.execute(base + MVT_SELECT.format(columns=MVT_COLUMNS[kind]), params)
+            return bytes(cursor.fetchone()[0] or b'')
+        cursor.execute(base + JSON_SELECT[kind], params)
+        rows = [list(row) for row in cursor.fetchall()]
+    return {
+        'z': z,
+        'x': x,
+        'y': y,
+        'kind': kind,
+        'fields': CLUSTER_FIELDS if kind == 'clusters' else POINT_FIELDS,
+        kind: rows,
+    }
+
+
+def get_tile(z, x, y, fmt='json'):
+    """Return a rendered tile from the cache, rendering it on a miss."""
+    key = _cache_key(tiles_version(), z, x, y, fmt)
+    return get_or_build(key, lambda: render_tile(z, x, y, fmt), CACHE_TIMEOUT, metric='property_tiles')
@@ -2,16 +2,19 @@ from rest_framework_gis.serializers import GeoFeatureModelSerializer
 from rest_framework import serializers
 from universities.models import University, Campus  # Import the actual model classes
 
+from campus_stay.instrumentation import TimedGeoFeatureListSerializer, TimedSerializerMixin
 
-class UniversitySerializer(GeoFeatureModelSerializer):
+
+class UniversitySerializer(TimedSerializerMixin, GeoFeatureModelSerializer):
     class Meta:
         model = University  # Use the actual class, not a string
         geo_field = 'location'
+        list_serializer_class = TimedGeoFeatureListSerializer
         fields = ['id', 'name', 'logo', 'address', 'website', 'created_at', 'updated_at']
         read_only_fields = ['created_at', 'updated_at']
 
 
-class CampusSerializer(GeoFeatureModelSerializer):
+class CampusSerializer(TimedSerializerMixin, GeoFeatureModelSerializer):
     university = serializers.PrimaryKeyRelatedField(
         queryset=University.objects.all(),  # Use the actual queryset, not a string
     )
@@ -20,5 +23,30 @@ class CampusSerializer(GeoFeatureModelSerializer):
     class Meta:
         model = Campus  # Use the actual class, not a string
         geo_field = 'location'
+        list_serializer_class = TimedGeoFeatureListSerializer
         fields = ['id', 'name', 'university', 'university_name', 'address', 'created_at', 'updated_at']
-        read_only_fields = ['created_at', 'updated_at']
\ No newline at end of file
+        read_only_fields = ['created_at', 'updated_at']
+
+class UniversityWithCampusesSerializer(UniversitySerializer):
+    """University feature with its campuses; expects ``prefetch_related('campuses')``."""
+    campuses = CampusSerializer(many=True, read_only=True)
+
+    class Meta(UniversitySerializer.Meta):
+        fields = UniversitySerializer.Meta.fields + ['campuses']
+
+    def to_representation(self, instance):
+        feature = super().to_representation(instance)
+        # Campuses sit beside the feature's properties as a list of campus features
+        feature['campuses'] = feature['properties'].pop('campuses')['features']
+        return feature
+
+
+class NearestCampusSerializer(CampusSerializer):
+    """Campus feature with its distance from the query point; expects a ``distance`` annotation."""
+    distance_km = serializers.SerializerMethodField()
+
+    class Meta(CampusSerializer.Meta):
+        fields = CampusSerializer.Meta.fields + ['distance_km']
+
+    def get_distance_km(self, obj) -> float:
+        return round(obj.distance.km, 2)
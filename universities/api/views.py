@@ -1,15 +1,35 @@
+from django.contrib.gis.db.models.functions import Distance, GeometryDistance
+from django.contrib.gis.geos import Point
 from rest_framework import viewsets, filters, permissions, status
+from rest_framework.decorators import action
 from rest_framework.response import Response
 from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter
 from drf_spectacular.openapi import OpenApiTypes
+from universities.cache import cached_response
 from universities.models import University, Campus
-from universities.api.serializers import UniversitySerializer, CampusSerializer
+from properties.models import Properties
+from universities.api.serializers import (
+    CampusSerializer,
+    NearestCampusSerializer,
+    UniversitySerializer,
+    UniversityWithCampusesSerializer,
+)
+
+MAX_NEAREST = 20
 
 
 @extend_schema_view(
     list=extend_schema(
-        description="List all universities",
-        summary="Get all universities (public endpoint)"
+        description="List all universities. Responses carry a strong ETag; send If-None-Match to get 304 Not Modified.",
+        summary="Get all universities (public endpoint)",
+        parameters=[
+            OpenApiParameter(
+                name="include",
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description="Set to 'campuses' to embed each university's campuses.",
+            ),
+        ],
     ),
     retrieve=extend_schema(
         description="Retrieve a single university by ID with its associated campuses",
@@ -40,6 +60,23 @@ class UniversitiesViewSet(viewsets.ModelViewSet):
     serializer_class = UniversitySerializer
     filter_backends = [filters.SearchFilter]
     search_fields = ['name', 'address']
+    throttle_scopes = {'list': 'search'}
+
+    def include_campuses(self):
+        return self.action == 'retrieve' or (
+            self.action == 'list' and self.request.query_params.get('include') == 'campuses'
+        )
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.include_campuses():
+            queryset = queryset.prefetch_related('campuses')
+        return queryset
+
+    def get_serializer_class(self):
+        if self.include_campuses():
+            return UniversityWithCampusesSerializer
+        return super().get_serializer_class()
 
     def get_permissions(self):
         if self.action == 'list':
@@ -52,11 +89,13 @@ class UniversitiesViewSet(viewsets.ModelViewSet):
 
     def list(self, request, *args, **kwargs):
         """
-        List all universities
+        List all universities, served from the versioned catalogue cache.
         """
-        queryset = self.filter_queryset(self.get_queryset())
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        def build_data():
+            queryset = self.filter_queryset(self.get_queryset())
+            return self.get_serializer(queryset, many=True).data
+
+        return cached_response(request, 'universities', build_data)
 
     def retrieve(self, request, *args, **kwargs):
         """
@@ -64,20 +103,7 @@ class UniversitiesViewSet(viewsets.ModelViewSet):
         """
         instance = self.get_object()
         serializer = self.get_serializer(instance)
-        data = serializer.data
-        
-        # Add associated campuses to the response
-        campuses = instance.campuses.all()
-        campus_serializer = CampusSerializer(campuses, many=True, context={'request': request})
-        
-        # Handle GeoFeatureModelSerializer response format
-        campus_data = campus_serializer.data
-        if isinstance(campus_data, dict) and 'features' in campus_data:
-            data['campuses'] = campus_data['features']
-        else:
-            data['campuses'] = campus_data
-        
-        return Response(data)
+        return Response(serializer.data)
 
     def create(self, request, *args, **kwargs):
         """
@@ -121,7 +147,7 @@ class UniversitiesViewSet(viewsets.ModelViewSet):
 
 @extend_schema_view(
     list=extend_schema(
-        description="List all campuses",
+        description="List all campuses. Responses carry a strong ETag; send If-None-Match to get 304 Not Modified.",
         summary="Get all campuses (authenticated users only)"
     ),
     retrieve=extend_schema(
@@ -159,14 +185,67 @@ class CampusViewSet(viewsets.ModelViewSet):
             return [permissions.IsAdminUser()]
         return [permissions.IsAuthenticated()]
 
-    def list(self, request, *args, **kwargs):
+    @extend_schema(
+        description="Campuses nearest to a point or to a property, closest first (authenticated users only).",
+        parameters=[
+            OpenApiParameter(name="lat", type=OpenApiTypes.FLOAT, location=OpenApiParameter.QUERY,
+                             description="Latitude of the point (with lng)."),
+            OpenApiParameter(name="lng", type=OpenApiTypes.FLOAT, location=OpenApiParameter.QUERY,
+                             description="Longitude of the point (with lat)."),
+            OpenApiParameter(name="property_id", type=OpenApiTypes.INT, location=OpenApiParameter.QUERY,
+                             description="Use this property's location instead of lat/lng."),
+            OpenApiParameter(name="k", type=OpenApiTypes.INT, location=OpenApiParameter.QUERY,
+                             description=f"Number of campuses to return (default 5, max {MAX_NEAREST})."),
+        ],
+        responses=NearestCampusSerializer(many=True),
+    )
+    @action(detail=False, methods=['get'], url_path='nearest')
+    def nearest(self, request):
         """
-        List all campuses (authenticated users only).
+        Nearest campuses by KNN search on the campus location index.
         """
-        queryset = self.filter_queryset(self.get_queryset())
-        serializer = self.get_serializer(queryset, many=True)
+        try:
+            k = min(int(request.query_params.get('k', 5)), MAX_NEAREST)
+            if k < 1:
+                raise ValueError
+        except ValueError:
+            return Response({"error": f"k must be an integer between 1 and {MAX_NEAREST}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        property_id = request.query_params.get('property_id')
+        if property_id:
+            point = (
+                Properties.objects.filter(pk=property_id).values_list('location', flat=True).first()
+                if property_id.isdigit() else None
+            )
+            if point is None:
+                return Response({"error": "Property not found or has no location"},
+                                status=status.HTTP_404_NOT_FOUND)
+        else:
+            try:
+                point = Point(float(request.query_params['lng']), float(request.query_params['lat']), srid=4326)
+            except (KeyError, ValueError):
+                return Response({"error": "Provide lat and lng, or property_id"},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+        campuses = (
+            Campus.objects.select_related('university')
+            .annotate(distance=Distance('location', point))
+            .order_by(GeometryDistance('location', point))[:k]
+        )
+        serializer = NearestCampusSerializer(campuses, many=True, context={'request': request})
         return Response(serializer.data)
 
+    def list(self, request, *args, **kwargs):
+        """
+        List all campuses (authenticated users only), served from the versioned catalogue cache.
+        """
+        def build_data():
+            queryset = self.filter_queryset(self.get_queryset())
+            return self.get_serializer(queryset, many=True).data
+
+        return cached_response(request, 'campuses', build_data, public=False)
+
     def retrieve(self, request, *args, **kwargs):
         """
         Retrieve a single campus by ID (authenticated users only).
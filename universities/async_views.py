@@ -0,0 +1,19 @@
+"""
+Async variant of the university list, routed by ``campus_stay.urls_asgi``.
+
+See ``campus_stay.async_views`` for when a request takes the async path.
+"""
+from campus_stay.async_views import viewset_for, with_sync_fallback
+from universities.api.views import UniversitiesViewSet
+from universities.cache import acached_response
+
+
+@with_sync_fallback(UniversitiesViewSet.as_view({"get": "list", "post": "create"}), throttle_scope="search")
+async def university_list(request):
+    view = viewset_for(UniversitiesViewSet, request, "list")
+
+    async def build_data():
+        queryset = view.filter_queryset(view.get_queryset())
+        return view.get_serializer([university async for university in queryset], many=True).data
+
+    return await acached_response(request, "universities", build_data)
@@ -0,0 +1,80 @@
+"""
+Versioned cache for the university and campus catalogue.
+
+Every cached response is keyed on a catalogue version that is bumped by the
+signals in ``universities.signals`` whenever a university or campus is
+saved or deleted, so stale entries are never read and simply expire. The
+version also makes a strong ETag, which lets a conditional GET be answered
+with 304 before the catalogue is queried. A miss is rebuilt by one worker
+at a time (``campus_stay.cache.get_or_build``).
+"""
+from django.http import HttpResponseNotModified
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from rest_framework import status
+from rest_framework.response import Response
+
+from campus_stay.async_views import json_response
+from campus_stay.cache import (
+    aget_or_build, aversion, bump_version, digest, etag_matches, get_or_build, make_key, version,
+)
+
+NAMESPACE = 'universities:catalogue'
+# Cached responses outlive a version bump only until they expire
+CACHE_TIMEOUT = 60 * 60 * 24
+# How long browsers and proxies may reuse a response without revalidating
+MAX_AGE = 60 * 5
+
+
+def catalogue_version():
+    return version(NAMESPACE)
+
+
+async def acatalogue_version():
+    return await aversion(NAMESPACE)
+
+
+def bump_catalogue_version():
+    bump_version(NAMESPACE)
+
+
+def _variant(request, current_version, scope, fmt):
+    """The ETag and cache key of a response; both cover the version, format and full query string."""
+    variant = digest(f"{scope}:{fmt}:{request.get_full_path()}")
+    return f'"{current_version}-{variant}"', make_key(NAMESPACE, current_version, variant)
+
+
+def _finish(response, etag, public):
+    response['ETag'] = etag
+    patch_cache_control(response, public=public, private=not public, max_age=MAX_AGE)
+    patch_vary_headers(response, ['Accept'] if public else ['Accept', 'Authorization'])
+    return response
+
+
+def cached_response(request, scope, build_data, public=True):
+    """
+    Return the catalogue response for ``request`` from the cache.
+
+    ``build_data`` is only called on a cache miss. The ETag covers the
+    catalogue version, the negotiated format and the full query string.
+    """
+    etag, key = _variant(request, catalogue_version(), scope, request.accepted_renderer.format)
+    if etag_matches(request, etag):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = Response(get_or_build(key, build_data, CACHE_TIMEOUT, metric=scope))
+    return _finish(response, etag, public)
+
+
+async def acached_response(request, scope, abuild_data, public=True):
+    """
+    Async ``cached_response`` for plain Django requests answered with JSON.
+
+    ``abuild_data`` is a coroutine function; the ETag and cache entries are
+    shared with the sync path.
+    """
+    etag, key = _variant(request, await acatalogue_version(), scope, 'json')
+    if etag_matches(request, etag):
+        response = HttpResponseNotModified()
+    else:
+        response = json_response(await aget_or_build(key, abuild_data, CACHE_TIMEOUT, metric=scope))
+    return _finish(response, etag, public)
@@ -24,6 +24,23 @@ class Campus(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored location so save signals can tell whether the campus moved
+        instance._loaded_location = instance.__dict__.get('location', models.DEFERRED)
+        return instance
+
+    def location_changed(self):
+        """Whether ``location`` differs from the value loaded from the database."""
+        loaded = getattr(self, '_loaded_location', models.DEFERRED)
+        current = self.__dict__.get('location', models.DEFERRED)
+        if current is models.DEFERRED:
+            return False
+        if loaded is models.DEFERRED or loaded is None or current is None:
+            return loaded is not current
+        return not loaded.equals_exact(current)
+
     def __str__(self):
         return self.name
     class Meta:
@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from universities.cache import bump_catalogue_version
+from universities.models import Campus, University
+
+
+@receiver([post_save, post_delete], sender=University)
+@receiver([post_save, post_delete], sender=Campus)
+def invalidate_catalogue(sender, **kwargs):
+    """Any university or campus write (API, admin or shell) invalidates the cached catalogue."""
+    bump_catalogue_version()
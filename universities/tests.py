@@ -1,3 +1,174 @@
-from django.test import TestCase
+from django.contrib.gis.geos import Point
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.test import APITestCase
 
-# Create your tests here.
+from universities.models import Campus, University
+from users.models import User
+
+
+class CatalogueCacheTests(APITestCase):
+    """Test the cached, ETag-aware university and campus lists."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.university = University.objects.create(
+            name='University of Dar es Salaam',
+            address='University Road, Ubungo',
+            website='https://www.udsm.ac.tz',
+            location=Point(39.2083, -6.7735, srid=4326),
+        )
+        Campus.objects.create(
+            name='Mwalimu Nyerere Mlimani Campus',
+            university=cls.university,
+            address='Mlimani',
+            location=Point(39.2080, -6.7790, srid=4326),
+        )
+        cls.user = User.objects.create_user(
+            username='student', email='student@example.com', password='testpass123', mobile='+255700000000',
+            roles='student',
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_list_sets_etag_and_cache_control(self):
+        response = self.client.get('/api/v1/universities/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['ETag'].startswith('"'))
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('max-age=300', response['Cache-Control'])
+
+    def test_conditional_get_returns_304_without_queries(self):
+        etag = self.client.get('/api/v1/universities/')['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/v1/universities/', HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_repeat_request_is_served_from_cache(self):
+        first = self.client.get('/api/v1/universities/')
+
+        with self.assertNumQueries(0):
+            second = self.client.get('/api/v1/universities/')
+
+        self.assertEqual(first.json(), second.json())
+
+    def test_query_string_is_part_of_the_etag(self):
+        etag = self.client.get('/api/v1/universities/')['ETag']
+
+        self.assertNotEqual(self.client.get('/api/v1/universities/?search=Dar')['ETag'], etag)
+
+    def test_writes_invalidate_the_catalogue(self):
+        etag = self.client.get('/api/v1/universities/')['ETag']
+
+        self.university.name = 'UDSM'
+        self.university.save()
+        response = self.client.get('/api/v1/universities/', HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['features'][0]['properties']['name'], 'UDSM')
+
+    def test_campus_list_is_private(self):
+        self.client.force_authenticate(user=self.user)
+
+        response = self.client.get('/api/v1/campuses/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('private', response['Cache-Control'])
+        self.assertEqual(len(response.json()['features']), 1)
+
+
+class UniversityWithCampusesTests(APITestCase):
+    """Test embedding campuses in university responses."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='student', email='student@example.com', password='testpass123', mobile='+255700000000',
+            roles='student',
+        )
+        for i in range(3):
+            university = University.objects.create(
+                name=f'University {i}',
+                address='Dar es Salaam',
+                website='https://example.ac.tz',
+                location=Point(39.2 + i / 100, -6.77, srid=4326),
+            )
+            for j in range(2):
+                Campus.objects.create(
+                    name=f'Campus {i}.{j}',
+                    university=university,
+                    address='Dar es Salaam',
+                    location=Point(39.2 + i / 100, -6.78 - j / 100, srid=4326),
+                )
+        cls.university = university
+
+    def setUp(self):
+        cache.clear()
+
+    def test_retrieve_embeds_campuses_in_two_queries(self):
+        self.client.force_authenticate(user=self.user)
+
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/v1/universities/{self.university.id}/')
+
+        data = response.json()
+        self.assertEqual(data['type'], 'Feature')
+        self.assertNotIn('campuses', data['properties'])
+        self.assertEqual(len(data['campuses']), 2)
+        self.assertEqual(data['campuses'][0]['properties']['university_name'], self.university.name)
+
+    def test_list_includes_campuses_on_request(self):
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/v1/universities/?include=campuses')
+
+        features = response.json()['features']
+        self.assertEqual(len(features), 3)
+        self.assertTrue(all(len(feature['campuses']) == 2 for feature in features))
+
+    def test_list_omits_campuses_by_default(self):
+        features = self.client.get('/api/v1/universities/').json()['features']
+
+        self.assertNotIn('campuses', features[0])
+
+
+class NearestCampusEndpointTests(APITestCase):
+    """Test the nearest campuses lookup."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='student', email='student@example.com', password='testpass123', mobile='+255700000000',
+            roles='student',
+        )
+        university = University.objects.create(
+            name='University of Dar es Salaam',
+            address='Ubungo',
+            website='https://www.udsm.ac.tz',
+            location=Point(39.2083, -6.7735, srid=4326),
+        )
+        Campus.objects.create(name='Mlimani', university=university, address='Ubungo',
+                              location=Point(39.2083, -6.7735, srid=4326))
+        Campus.objects.create(name='Muhimbili', university=university, address='Upanga',
+                              location=Point(39.2750, -6.8040, srid=4326))
+
+    def setUp(self):
+        self.client.force_authenticate(user=self.user)
+
+    def test_orders_by_distance(self):
+        response = self.client.get('/api/v1/campuses/nearest/?lat=-6.8030&lng=39.2740&k=2')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        features = response.json()['features']
+        self.assertEqual([feature['properties']['name'] for feature in features], ['Muhimbili', 'Mlimani'])
+        self.assertLess(features[0]['properties']['distance_km'], features[1]['properties']['distance_km'])
+
+    def test_requires_a_point(self):
+        response = self.client.get('/api/v1/campuses/nearest/')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
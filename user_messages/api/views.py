@@ -3,10 +3,11 @@ from rest_framework import status, viewsets, mixins, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Q
+from django.db.models import Prefetch, Q
 from drf_spectacular.utils import extend_schema, OpenApiParameter, extend_schema_view
 from drf_spectacular.types import OpenApiTypes
 
+from campus_stay import metrics
 from user_messages.models import Enquiry, EnquiryMessage, EnquiryStatus
 from .serializers import EnquirySerializer, CreateEnquirySerializer, EnquiryMessageSerializer
 
@@ -39,7 +40,12 @@ class EnquiryViewSet(viewsets.ModelViewSet):
         Return all enquiries.
         """
         try:
-            queryset = Enquiry.objects.all().select_related('property', 'student').prefetch_related('messages')
+            # Everything the serializer reads per enquiry, so a page doesn't query per row
+            queryset = Enquiry.objects.all().select_related(
+                'property__nearest_campus', 'student__user', 'student__university'
+            ).prefetch_related(
+                Prefetch('messages', queryset=EnquiryMessage.objects.select_related('sender'))
+            )
             return queryset.order_by('-updated_at')
         except Exception as e:
             logger.error(f"Error in get_queryset: {str(e)}")
@@ -116,6 +122,7 @@ class EnquiryMessageViewSet(mixins.CreateModelMixin,
             enquiry=enquiry,
             sender=self.request.user
         )
+        metrics.ENQUIRY_MESSAGES.labels(self.request.user.roles or 'unknown').inc()
         
         # Mark the enquiry as in progress if it was pending
         if enquiry.status == EnquiryStatus.PENDING:
@@ -1,11 +1,16 @@
 from django.test import TestCase, Client
 from django.urls import reverse
 from django.contrib.auth import get_user_model
+from django.contrib.gis.geos import Point
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 from django.utils import timezone
 
 from properties.models import Properties
+from universities.models import University
 from users.models import StudentProfile
 from user_messages.models import Enquiry, EnquiryMessage, EnquiryStatus
 
@@ -496,3 +501,48 @@ class EnquirySerializerTest(TestCase):
         self.assertEqual(data['sender_name'], self.student_user.get_full_name())
         self.assertIn('created_at', data)
         self.assertFalse(data['is_read'])
+
+
+class EnquiryListQueryTest(APITestCase):
+    """Test that the enquiry list doesn't query per enquiry or message."""
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password='testpass123', mobile='+255700000000',
+            roles='admin',
+        )
+        self.university = University.objects.create(
+            name='University of Dar es Salaam', address='Ubungo', website='https://www.udsm.ac.tz',
+            location=Point(39.2083, -6.7735, srid=4326),
+        )
+        self.property = Properties.objects.create(
+            name='Sinza Room', property_type='single_room', price=80000,
+            lease_duration=6, location=Point(39.2213, -6.7801, srid=4326),
+        )
+
+    def add_enquiry(self, i):
+        student = User.objects.create_user(
+            username=f'student{i}', email=f'student{i}@example.com', password='testpass123',
+            mobile=f'+25571000000{i}', roles='student', first_name='Neema', last_name=f'Mushi{i}',
+        )
+        profile = StudentProfile.objects.create(user=student, university=self.university, course='Law')
+        enquiry = Enquiry.objects.create(property=self.property, student=profile)
+        for content in ('Is it available?', 'Can I visit?'):
+            EnquiryMessage.objects.create(enquiry=enquiry, sender=student, content=content)
+
+    def list_queries(self):
+        cache.clear()
+        self.client.force_authenticate(user=self.admin)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/v1/messages/enquiries/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(queries)
+
+    def test_queries_do_not_grow_with_enquiries(self):
+        self.add_enquiry(1)
+        one = self.list_queries()
+        self.add_enquiry(2)
+        self.add_enquiry(3)
+
+        self.assertEqual(self.list_queries(), one)
@@ -7,6 +7,7 @@ from django.contrib.auth import get_user_model
 from .serializers import UserSerializer, StudentProfileSerializer
 from users.models import StudentProfile
 import logging
+import time
 from django.contrib.auth import authenticate
 from rest_framework.views import APIView
 from google.oauth2 import id_token
@@ -14,6 +15,7 @@ from google.auth.transport import requests
 from django.db import transaction
 from .serializers import CustomTokenObtainPairSerializer
 from rest_framework_simplejwt.views import TokenObtainPairView
+from campus_stay import metrics
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -23,6 +25,10 @@ User = get_user_model()
 class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all().select_related('student_profile')
     serializer_class = UserSerializer
+    # Registration and sign-in share the strict per-IP auth rate (campus_stay.throttling)
+    throttle_scopes = {
+        'create': 'auth', 'login': 'auth', 'google_login': 'auth', 'complete_google_onboarding': 'auth',
+    }
     
     def get_permissions(self):
         if self.action in ['create', 'login', 'google_login']:
@@ -131,6 +137,7 @@ class UserViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        started = time.perf_counter()
         user = authenticate(username=username_or_email, password=password)
         
         if user is None:
@@ -141,16 +148,19 @@ class UserViewSet(viewsets.ModelViewSet):
                 user = None
         
         if user is None:
+            metrics.AUTH_LOGIN_SECONDS.labels('failure').observe(time.perf_counter() - started)
             return Response({'detail': 'Invalid credentials'}, status=status.HTTP_401_UNAUTHORIZED)
         
         refresh = CustomTokenObtainPairSerializer.get_token(user)
         serializer = self.get_serializer(user)
-        
-        return Response({
+        data = {
             'refresh': str(refresh),
             'access': str(refresh.access_token),
             'user': serializer.data
-        })
+        }
+        metrics.AUTH_LOGIN_SECONDS.labels('success').observe(time.perf_counter() - started)
+        
+        return Response(data)
     
     @action(detail=False, methods=['post'])
     def google_login(self, request):
@@ -327,3 +337,4 @@ class UserViewSet(viewsets.ModelViewSet):
 
 class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
+    throttle_scope = 'auth'